@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ConcensusConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.concensus'
+    
+    def ready(self):
+        """
+        Importa los signals y los trabajos en segundo plano cuando la app está lista
+        """
+        import apps.concensus.infrastructure.signals
+        import apps.concensus.infrastructure.tasks
@@ -1,12 +1,13 @@
 """ Se encargará de recibir y enviar mensajes a los usuarios conectados """
 import json
 import logging
-import redis
 from channels.generic.websocket import AsyncWebsocketConsumer
-from asgiref.sync import sync_to_async, async_to_sync
+from asgiref.sync import sync_to_async
 from django.apps import apps
 from django.conf import settings
 
+from apps.shared.infrastructure.presence import presence
+
 logger = logging.getLogger(__name__)
 
 class GroupConsumer(AsyncWebsocketConsumer):
@@ -23,14 +24,6 @@ class GroupConsumer(AsyncWebsocketConsumer):
         """
         self.group_id = self.scope['url_route']['kwargs']['group_id']
         self.group_name = f'group_{self.group_id}'
-        #self.redis = redis.StrictRedis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
-        self.redis = redis.StrictRedis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            password=settings.REDIS_PASSWORD,  # Agrega la autenticación
-            db=0
-        )
-
 
         await self.channel_layer.group_add(
             self.group_name,
@@ -38,7 +31,11 @@ class GroupConsumer(AsyncWebsocketConsumer):
         )
         await self.accept()
 
-        await self.increment_connection_count()
+        user = self.scope.get('user')
+        self.user_id = user.id if user is not None and user.is_authenticated else None
+        await presence.join(self.group_name, self.channel_name, self.user_id)
+        self.heartbeat = presence.start_heartbeat(self.group_name, self.channel_name, self.user_id)
+        await presence.publish_connection_count(self.group_name)
 
     async def disconnect(self, close_code):
         """
@@ -50,7 +47,11 @@ class GroupConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
 
-        await self.decrement_connection_count()
+        heartbeat = getattr(self, 'heartbeat', None)
+        if heartbeat is not None:
+            heartbeat.cancel()
+        await presence.leave(self.group_name, self.channel_name)
+        await presence.publish_connection_count(self.group_name)
 
     # 2. Método de Envío de Mensajes del WebSocket del Servidor
     async def receive(self, text_data):
@@ -106,63 +107,6 @@ class GroupConsumer(AsyncWebsocketConsumer):
         }))
 
     # 3. Métodos Adicionales: Conteo de Conexiones y Notificación de Nuevo Tema
-    @sync_to_async
-    def increment_connection_count(self):
-        """
-        Incrementa el contador de conexiones activas en el grupo y notifica a los clientes.
-        
-        TODO: AGREGAR EL ID DEL USUARIO MAS ID DE GRUPO PARA SUAMR +1 SI AUN NO ESTA EL REGISTRO
-        Actualmente si se detiene docker y luego se inicia se quedan guardadas las conexiones y toca borrar manualmente
-        esto se controlaria con el id de usuario y el id de grupo sumar +1 si aun no esta el registro. 
-        Si se detiene el docker se construye desde cero no hay problema ya q los datos se crean segun la interacion del usuario
-        """
-        connection_count = self.get_connection_count() + 1
-        self.set_connection_count(connection_count)
-        self.notify_connection_count(connection_count)
-
-
-    @sync_to_async
-    def decrement_connection_count(self):
-        """
-        Decrementa el contador de conexiones activas en el grupo y notifica a los clientes.
-        """
-        connection_count = self.get_connection_count() - 1
-        if connection_count < 0:
-            connection_count = 0
-        self.set_connection_count(connection_count)
-        self.notify_connection_count(connection_count)
-
-
-    def get_connection_count(self):
-        """
-        Obtiene el número actual de conexiones activas desde Redis.
-        """
-        connection_count = self.redis.get(self.group_name)
-        return int(connection_count) if connection_count else 0
-
-
-    def set_connection_count(self, count):
-        """
-        Establece el número de conexiones activas en Redis.
-        """
-        self.redis.set(self.group_name, count)
-
-
-    def notify_connection_count(self, count):
-        """
-        Notifica a los clientes el número actualizado de conexiones activas en el grupo.
-        """
-        async_to_sync(self.channel_layer.group_send)(
-            self.group_name,
-            {
-                'type': 'group_message',
-                'message': {
-                    'type': 'connection_count',
-                    'active_connections': count
-                }
-            }
-        )
-
     """ async def notify_new_topic(self, topic_added):
         
         #Notifica a los clientes que se ha añadido un nuevo tema al grupo.
@@ -1,37 +1,39 @@
 import json
 import logging
-import redis
 from channels.generic.websocket import AsyncWebsocketConsumer
-from asgiref.sync import sync_to_async, async_to_sync
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from apps.shared.infrastructure.presence import presence
+
 logger = logging.getLogger(__name__)
 
 class PhaseThreeConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.group_id = self.scope['url_route']['kwargs']['group_id']
         self.group_name = f'phase3_group_{self.group_id}'
-        self.redis = redis.StrictRedis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            password=settings.REDIS_PASSWORD,  # Agrega la autenticación
-            db=0
-        )   
-
         await self.channel_layer.group_add(
             self.group_name,
             self.channel_name
         )
         await self.accept()
 
-        await self.increment_connection_count()
+        user = self.scope.get('user')
+        self.user_id = user.id if user is not None and user.is_authenticated else None
+        await presence.join(self.group_name, self.channel_name, self.user_id)
+        self.heartbeat = presence.start_heartbeat(self.group_name, self.channel_name, self.user_id)
+        await presence.publish_connection_count(self.group_name)
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(
             self.group_name,
             self.channel_name
         )
-        await self.decrement_connection_count()
+        heartbeat = getattr(self, 'heartbeat', None)
+        if heartbeat is not None:
+            heartbeat.cancel()
+        await presence.leave(self.group_name, self.channel_name)
+        await presence.publish_connection_count(self.group_name)
 
     async def receive(self, text_data):
         pass
@@ -41,36 +43,3 @@ class PhaseThreeConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'message': message
         }))
-
-    @sync_to_async
-    def increment_connection_count(self):
-        connection_count = self.get_connection_count() + 1
-        self.set_connection_count(connection_count)
-        self.notify_connection_count(connection_count)
-
-    @sync_to_async
-    def decrement_connection_count(self):
-        connection_count = self.get_connection_count() - 1
-        if (connection_count < 0):
-            connection_count = 0
-        self.set_connection_count(connection_count)
-        self.notify_connection_count(connection_count)
-
-    def get_connection_count(self):
-        connection_count = self.redis.get(self.group_name)
-        return int(connection_count) if connection_count else 0
-
-    def set_connection_count(self, count):
-        self.redis.set(self.group_name, count)
-
-    def notify_connection_count(self, count):
-        async_to_sync(self.channel_layer.group_send)(
-            self.group_name,
-            {
-                'type': 'group_message',
-                'message': {
-                    'type': 'connection_count',
-                    'active_connections': count
-                }
-            }
-        )
@@ -1,11 +1,12 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
-from django.core.cache import cache
 from rest_framework.exceptions import PermissionDenied
 
 from apps.concensus.domain.entities.debate import Debate
 from apps.concensus.domain.entities.debate_message import Message
+from apps.concensus.domain.services.chat_buffer_service import chat_buffer_service, new_ulid
 from apps.custom_auth.models import Group, User
+from apps.shared.infrastructure.presence import presence
 import json
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -29,10 +30,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close(code=403)
             return
 
-        # Agregar usuario a Redis
-        connected_users = cache.get(f"chat_users_{self.debate_id}", set())
-        connected_users.add(self.scope['user'].id)
-        cache.set(f"chat_users_{self.debate_id}", connected_users)
+        # Registrar la conexión en la presencia del debate
+        self.presence_room = f"chat_{self.debate_id}"
+        await presence.join(self.presence_room, self.channel_name, self.scope['user'].id)
+        self.heartbeat = presence.start_heartbeat(self.presence_room, self.channel_name, self.scope['user'].id)
 
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -44,9 +45,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
         await self.send_initial_messages(debate)
 
     async def disconnect(self, close_code):
-        connected_users = cache.get(f"chat_users_{self.debate_id}", set())
-        connected_users.discard(self.scope['user'].id)
-        cache.set(f"chat_users_{self.debate_id}", connected_users)
+        # Solo las conexiones aceptadas llegaron a registrarse en la presencia
+        if hasattr(self, 'heartbeat'):
+            self.heartbeat.cancel()
+            await presence.leave(self.presence_room, self.channel_name)
 
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -55,24 +57,19 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def receive(self, text_data):
         data = json.loads(text_data)
-        user = self.scope['user']
-        group_id = self.group_id
-        debate_id = self.debate_id
-        message_text = data['text']
-        posture = data.get('posture', 'neutral')
-        parent_id = data.get('parent')
-
-        parent = None
-        if parent_id:
-            parent = await sync_to_async(Message.objects.get)(id=parent_id)
-
-        message = await sync_to_async(Message.objects.create)(
-            user=user,
-            group_id=group_id,
-            debate_id=debate_id,
+        message_text = data.get('text')
+        if not message_text:
+            return
+
+        # Se difunde en cuanto queda en el buffer; el volcado a la base de datos es por lotes
+        message = await chat_buffer_service.append(
+            user=self.scope['user'],
+            group_id=self.group_id,
+            debate_id=self.debate_id,
             text=message_text,
-            posture=posture,
-            parent=parent
+            posture=data.get('posture', 'neutral'),
+            parent=data.get('parent'),
+            client_id=data.get('client_id'),
         )
 
         await self.channel_layer.group_send(
@@ -80,12 +77,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
             {
                 'type': 'chat_message',
                 'message': {
-                    'id': message.id,
-                    'user': user.username,
-                    'text': message_text,
-                    'posture': posture,
-                    'parent': parent_id,
-                    'created_at': message.created_at.isoformat()
+                    'id': message['id'],
+                    'user': message['user'],
+                    'text': message['text'],
+                    'posture': message['posture'],
+                    'parent': message['parent'],
+                    'created_at': message['created_at']
                 }
             }
         )
@@ -135,7 +132,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 group_id=self.group_id,
                 debate_id=self.debate_id,
                 text=text,
-                posture='neutral'
+                posture='neutral',
+                client_id=new_ulid()
             )
 
             await self.channel_layer.group_send(
@@ -143,7 +141,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 {
                     'type': 'chat_message',
                     'message': {
-                        'id': message.id,
+                        'id': message.client_id,
                         'user': self.scope['user'].username,
                         'text': text,
                         'posture': 'neutral',
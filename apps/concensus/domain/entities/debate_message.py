@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from apps.concensus.domain.entities.debate import Debate
 from apps.custom_auth.domain.entities.group import Group
@@ -20,7 +21,10 @@ class Message(models.Model):
     text = models.TextField()
     posture = models.CharField(max_length=10, choices=POSTURES, default='neutral')
     parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='replies')
-    created_at = models.DateTimeField(auto_now_add=True)
+    # ULID con el que se difundió el mensaje por WebSocket antes de guardarlo; hace idempotente el volcado
+    client_id = models.CharField(max_length=26, unique=True, null=True, blank=True, editable=False)
+    # Instante de recepción en el consumer, no el del volcado por lotes
+    created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f'Message by {self.user.username} in {self.debate.title}'
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+from apps.custom_auth.domain.entities.group import Group
+
+
+class GroupPairwiseMatrix(models.Model):
+    """
+    Matriz de preferencias por pares de un grupo, mantenida de forma incremental
+
+    counts[a][b] es el número de usuarios que ponen el tópico topic_ids[a] por
+    encima de topic_ids[b] en su FinalTopicOrder. Se actualiza con el delta de
+    cada papeleta al guardarla o reemplazarla.
+    """
+    group = models.OneToOneField(Group, on_delete=models.CASCADE, primary_key=True, related_name='pairwise_matrix')
+    topic_ids = ArrayField(models.IntegerField(), default=list)
+    counts = ArrayField(ArrayField(models.IntegerField()), default=list)
+    ballots = models.IntegerField(default=0)
+    # Crece con cada cambio de la matriz; acompaña a los rankings provisionales
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Pairwise matrix of {self.group_id}: {len(self.topic_ids)} topics, {self.ballots} ballots'
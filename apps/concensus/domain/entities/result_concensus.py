@@ -7,5 +7,10 @@ class ConsensusResult(models.Model):
     idGroup = models.ForeignKey(Group, on_delete=models.CASCADE)
     idTopic = models.ForeignKey(RecommendedTopic, on_delete=models.CASCADE)
     final_value = models.FloatField()
+    # Número de cálculo del grupo que produjo el resultado; crece en cada ejecución
+    version = models.PositiveIntegerField(default=1)
 
-#select * from concensus_consensusresult;
\ No newline at end of file
+    class Meta:
+        unique_together = ('idGroup', 'idTopic')
+
+#select * from concensus_consensusresult;
@@ -0,0 +1,357 @@
+"""
+Buffer de escritura de los mensajes del chat de debates (write-behind)
+
+El ChatConsumer no escribe cada mensaje en la base de datos antes de
+difundirlo: le asigna un ULID (o usa el que envía el cliente), lo añade a una
+lista en Redis por debate y lo difunde de inmediato. Un trabajo de la cola
+vuelca la lista con bulk_create cada CHAT_FLUSH_INTERVAL segundos.
+
+Garantía de entrega: el mensaje se guarda en Redis antes de difundirse y solo
+sale de la lista después de confirmarse su inserción, así que un reinicio de
+daphne o del worker no pierde mensajes ya difundidos (al menos una vez). Como
+client_id es único y el volcado ignora los conflictos, reintentar un lote ya
+insertado no duplica filas.
+"""
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import List, Optional, Tuple
+
+import redis
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.shared.infrastructure.redis_client import get_async_redis, get_redis
+from apps.shared.infrastructure.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY_PREFIX = 'chat:buffer:'
+DIRTY_KEY = 'chat:buffer:dirty'
+LOCK_KEY = 'chat:buffer:lock:{debate_id}'
+LOCK_TTL = 60  # Segundos; se renueva con cada lote volcado
+FLUSH_TASK = 'concensus.flush_chat_messages'
+
+_CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_ULID_RE = re.compile(r'^[0-9A-HJKMNP-TV-Z]{26}$')
+
+# Quita el debate de los pendientes solo si su lista sigue vacía; si entró un
+# mensaje después del último lote, el siguiente ciclo lo vuelca
+_SETTLE_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# Descarta de la cabeza de la lista el lote ya insertado si el cerrojo sigue
+# siendo del volcado (ARGV[1]) y la lista empieza por ese mismo lote, y renueva
+# el cerrojo. Los mensajes solo se añaden al final, así que el lote leído sigue
+# en la cabeza salvo que otro volcado lo haya recortado
+_TRIM_SCRIPT = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return -1
+end
+local count = tonumber(ARGV[2])
+if redis.call('LINDEX', KEYS[1], 0) ~= ARGV[3] or redis.call('LINDEX', KEYS[1], count - 1) ~= ARGV[4] then
+    return 0
+end
+redis.call('LTRIM', KEYS[1], count, -1)
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+return 1
+"""
+
+# Libera el cerrojo solo si sigue siendo del volcado que lo tomó
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def new_ulid() -> str:
+    """
+    ULID: 48 bits de milisegundos y 80 aleatorios en base32 de Crockford,
+    ordenable por instante de creación
+    """
+    value = (int(time.time() * 1000) << 80) | int.from_bytes(os.urandom(10), 'big')
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def is_ulid(value) -> bool:
+    return isinstance(value, str) and bool(_ULID_RE.match(value))
+
+
+def ulid_time(value: str) -> datetime:
+    """
+    Instante codificado en los 48 bits de milisegundos de un ULID
+    """
+    milliseconds = 0
+    for char in value[:10]:
+        milliseconds = (milliseconds << 5) | _CROCKFORD.index(char)
+    return datetime.fromtimestamp(milliseconds / 1000, tz=dt_timezone.utc)
+
+
+class ChatBufferService:
+    """
+    Acumula en Redis y vuelca por lotes los mensajes del chat de debates
+    """
+
+    def __init__(self):
+        self.flush_interval = settings.CHAT_FLUSH_INTERVAL
+        self.batch_size = settings.CHAT_FLUSH_BATCH_SIZE
+        self.max_batches = settings.CHAT_FLUSH_MAX_BATCHES
+
+    def _key(self, debate_id) -> str:
+        return f'{BUFFER_KEY_PREFIX}{debate_id}'
+
+    async def append(self, user, group_id, debate_id, text: str, posture: str = 'neutral',
+                     parent=None, client_id: Optional[str] = None) -> dict:
+        """
+        Registra un mensaje para volcarlo y devuelve el payload a difundir
+
+        Args:
+            parent: id numérico o ULID del mensaje al que responde
+            client_id: ULID generado por el cliente; si no es válido se genera uno
+
+        Returns:
+            Mensaje con 'id' = ULID, en el formato que reciben los clientes
+        """
+        client_id = client_id.upper() if isinstance(client_id, str) else None
+        message = {
+            'id': client_id if is_ulid(client_id) else new_ulid(),
+            'user': user.username,
+            'user_id': str(user.id),
+            'group_id': str(group_id) if group_id is not None else None,
+            'debate_id': int(debate_id),
+            'text': text,
+            'posture': posture,
+            'parent': parent,
+            'created_at': timezone.now().isoformat(),
+        }
+        debate_id = str(debate_id)
+        try:
+            client = get_async_redis()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.rpush(self._key(debate_id), json.dumps(message))
+                pipe.sadd(DIRTY_KEY, debate_id)
+                # Un único volcado programado por debate e intervalo. Se reprograma en
+                # cada mensaje (la clave es idempotente) para que un volcado descartado
+                # o un encolado fallido no dejen el debate sin volcar
+                task_queue.schedule(pipe, FLUSH_TASK, debate_id, delay=self.flush_interval, debate_id=debate_id)
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Buffer del chat no disponible, guardando el mensaje {message['id']} directamente: {str(e)}")
+            await sync_to_async(self.persist)([message])
+        return message
+
+    def persist(self, messages: List[dict]):
+        """
+        Inserta un lote de mensajes del buffer; los ya insertados se ignoran
+        """
+        Message = apps.get_model('concensus', 'Message')
+
+        numeric_parents = {int(m['parent']) for m in messages if str(m.get('parent') or '').isdigit()}
+        existing = set(Message.objects.filter(id__in=numeric_parents).values_list('id', flat=True))
+
+        rows = []
+        for m in messages:
+            parent = m.get('parent')
+            rows.append(Message(
+                client_id=m['id'],
+                user_id=m['user_id'],
+                group_id=m.get('group_id'),
+                debate_id=m['debate_id'],
+                text=m['text'],
+                posture=m.get('posture') or 'neutral',
+                parent_id=int(parent) if str(parent or '').isdigit() and int(parent) in existing else None,
+                created_at=parse_datetime(m['created_at']) or timezone.now(),
+            ))
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    Message.objects.bulk_create(rows, ignore_conflicts=True)
+            except IntegrityError as e:
+                # Un mensaje de un usuario o debate eliminado no debe bloquear el resto del lote
+                logger.warning(f"Lote del chat con filas inválidas, insertando una a una: {str(e)}")
+                for row in rows:
+                    try:
+                        with transaction.atomic():
+                            Message.objects.bulk_create([row], ignore_conflicts=True)
+                    except IntegrityError:
+                        logger.error(f"Mensaje {row.client_id} descartado: referencia inválida")
+
+            # Respuestas a mensajes difundidos con ULID: el id numérico del padre
+            # solo se conoce tras insertarlo
+            replies = {m['id']: m['parent'] for m in messages if is_ulid(m.get('parent'))}
+            if replies:
+                ids = dict(
+                    Message.objects.filter(client_id__in=set(replies) | set(replies.values()))
+                    .values_list('client_id', 'id')
+                )
+                updates = [
+                    Message(id=ids[child], parent_id=ids[parent])
+                    for child, parent in replies.items()
+                    if child in ids and parent in ids
+                ]
+                Message.objects.bulk_update(updates, ['parent'])
+
+    def flush(self, debate_id) -> bool:
+        """
+        Vuelca los mensajes pendientes de un debate en lotes de batch_size,
+        como mucho max_batches lotes por ejecución; si quedan más, se
+        reprograma el volcado para no retener el worker con un debate muy activo
+
+        Returns:
+            False si el volcado debe reintentarse (otro volcado en curso, cerrojo perdido o error)
+        """
+        debate_id = str(debate_id)
+        key = self._key(debate_id)
+        client = get_redis()
+        lock = LOCK_KEY.format(debate_id=debate_id)
+        token = os.urandom(16).hex()
+        if not client.set(lock, token, nx=True, ex=LOCK_TTL):
+            return False
+
+        total = 0
+        try:
+            for _ in range(self.max_batches):
+                raw = client.lrange(key, 0, self.batch_size - 1)
+                if not raw:
+                    if client.eval(_SETTLE_SCRIPT, 2, key, DIRTY_KEY, debate_id):
+                        break
+                    continue
+                self.persist([json.loads(item) for item in raw])
+                # Recorta solo si el lote leído sigue en la cabeza de la lista y
+                # el cerrojo es nuestro; si no, otro volcado ya lo insertó
+                if client.eval(_TRIM_SCRIPT, 2, key, lock, token, len(raw), raw[0], raw[-1], LOCK_TTL) != 1:
+                    logger.warning(f"Volcado del debate {debate_id} interrumpido: cerrojo perdido o buffer modificado")
+                    return False
+                total += len(raw)
+            else:
+                task_queue.enqueue_now(FLUSH_TASK, debate_id, debate_id=debate_id)
+        except (DatabaseError, redis.RedisError) as e:
+            logger.error(f"Error volcando los mensajes del debate {debate_id}: {str(e)}")
+            return False
+        finally:
+            try:
+                client.eval(_RELEASE_SCRIPT, 1, lock, token)
+            except redis.RedisError:
+                pass
+
+        if total:
+            logger.info(f"Volcados {total} mensajes del chat del debate {debate_id}")
+        return True
+
+    def replay(self, debate_id, after: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[dict], bool]:
+        """
+        Mensajes de un debate posteriores a 'after', incluidos los que aún no se volcaron
+
+        Los mensajes se ordenan por (created_at, id) tanto en la base de datos
+        como en el buffer, y 'after' se resuelve a esa misma posición: un cliente
+        con el reloj desviado genera ULIDs desordenados, así que comparar ULIDs
+        saltaría mensajes al paginar.
+
+        Args:
+            after: Último id visto por el cliente (ULID o id numérico); None desde el principio
+            limit: Máximo de mensajes a devolver
+
+        Returns:
+            (mensajes en el formato del WebSocket del más antiguo al más
+            reciente, si quedan más mensajes después del último)
+        """
+        Message = apps.get_model('concensus', 'Message')
+        limit = limit or settings.CHAT_REPLAY_LIMIT
+
+        after = str(after).strip().upper() if after else None
+        if after and not (after.isdigit() or is_ulid(after)):
+            logger.warning(f"Id de replay no válido en el debate {debate_id}: {after}")
+            after = None
+
+        try:
+            buffered = [json.loads(item) for item in get_redis().lrange(self._key(debate_id), 0, -1)]
+        except redis.RedisError as e:
+            logger.warning(f"No se pudo leer el buffer del chat del debate {debate_id}: {str(e)}")
+            buffered = []
+
+        queryset = Message.objects.filter(debate_id=debate_id)
+        boundary = self._position(debate_id, after, buffered) if after else None
+        if boundary:
+            created_at, row_id, _ = boundary
+            if row_id is not None:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=row_id))
+            else:
+                queryset = queryset.filter(created_at__gt=created_at)
+
+        rows = queryset.order_by('created_at', 'id').values(
+            'id', 'client_id', 'user__username', 'text', 'posture', 'parent_id', 'parent__client_id', 'created_at'
+        )[:limit + 1]
+        ordered = [
+            (row['created_at'], {
+                'id': row['client_id'] or row['id'],
+                'user': row['user__username'],
+                'text': row['text'],
+                'posture': row['posture'],
+                'parent': row['parent__client_id'] or row['parent_id'],
+                'created_at': row['created_at'].isoformat(),
+            })
+            for row in rows
+        ]
+
+        seen = {message['id'] for _, message in ordered}
+        for message in buffered:
+            created_at = parse_datetime(message['created_at'])
+            if message['id'] in seen or created_at is None:
+                continue
+            if boundary and (created_at, message['id']) <= (boundary[0], boundary[2]):
+                continue
+            seen.add(message['id'])
+            ordered.append((created_at, {
+                field: message.get(field) for field in ('id', 'user', 'text', 'posture', 'parent', 'created_at')
+            }))
+
+        # Orden estable: con el mismo created_at se conserva el orden por id de la base de datos
+        ordered.sort(key=lambda item: item[0])
+        messages = [message for _, message in ordered]
+        return messages[:limit], len(messages) > limit
+
+    @staticmethod
+    def _position(debate_id, after: str, buffered: List[dict]) -> Optional[Tuple]:
+        """
+        Posición (created_at, id numérico o None, id del mensaje) del mensaje
+        'after', buscado en la base de datos y después en el buffer
+        """
+        Message = apps.get_model('concensus', 'Message')
+        lookup = {'id': int(after)} if after.isdigit() else {'client_id': after}
+        row = Message.objects.filter(debate_id=debate_id, **lookup).values('id', 'client_id', 'created_at').first()
+        if row:
+            return row['created_at'], row['id'], row['client_id'] or str(row['id'])
+
+        for message in buffered:
+            if message['id'] == after:
+                created_at = parse_datetime(message['created_at'])
+                return (created_at, None, after) if created_at else None
+
+        if is_ulid(after):
+            # Mensaje desconocido (p. ej. descartado): el ULID lleva el instante en que se creó
+            return ulid_time(after), None, after
+        return None
+
+
+# Instancia global del servicio
+chat_buffer_service = ChatBufferService()
@@ -0,0 +1,101 @@
+"""
+Cache en Redis de los rankings de consenso
+
+Cada grupo tiene en Redis un token de estado que se renueva cada vez que cambia
+algo de lo que depende el cálculo (papeletas, expertise, tópicos, fases o
+miembros; ver infrastructure/signals.py). Los rankings se guardan bajo
+(grupo, método, token), así que una lectura repetida sin cambios no vuelve a
+cargar las papeletas ni a ejecutar el algoritmo, y tras una escritura las
+entradas anteriores dejan de encontrarse y caducan por TTL.
+
+El token es aleatorio en lugar de un contador: si Redis pierde la clave del
+grupo se genera uno nuevo y ninguna entrada antigua puede volver a servirse.
+"""
+import json
+import logging
+import uuid
+from typing import List, Optional
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from apps.shared.infrastructure.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = 'consensus:state:{group_id}'
+RESULT_KEY = 'consensus:result:{group_id}:{method}:{state}'
+
+
+class ConsensusCache:
+    """
+    Rankings por (grupo, método, estado de las papeletas)
+    """
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl or settings.CONSENSUS_CACHE_TTL
+
+    def state(self, group_id) -> Optional[str]:
+        """
+        Token del estado actual del grupo, creándolo si no existe
+        """
+        key = STATE_KEY.format(group_id=group_id)
+        try:
+            client = get_redis()
+            token = client.get(key)
+            if token is None:
+                client.set(key, uuid.uuid4().hex, nx=True)
+                token = client.get(key)
+            return token.decode() if isinstance(token, bytes) else token
+        except redis.RedisError as e:
+            logger.warning(f"Redis no disponible para el estado de consenso del grupo {group_id}: {str(e)}")
+            return None
+
+    def get(self, group_id, method: str, state: Optional[str]) -> Optional[List[dict]]:
+        if state is None:
+            return None
+        try:
+            raw = get_redis().get(RESULT_KEY.format(group_id=group_id, method=method, state=state))
+        except redis.RedisError as e:
+            logger.warning(f"Error leyendo la cache de consenso del grupo {group_id}: {str(e)}")
+            return None
+        return json.loads(raw) if raw else None
+
+    def set(self, group_id, method: str, state: Optional[str], results: List[dict]):
+        """
+        Guarda un ranking bajo el estado con el que se leyeron los datos; si
+        hubo una escritura mientras se calculaba, el estado ya cambió y la
+        entrada nunca se sirve
+        """
+        if state is None:
+            return
+        try:
+            get_redis().set(
+                RESULT_KEY.format(group_id=group_id, method=method, state=state),
+                json.dumps(results),
+                ex=self.ttl
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Error guardando la cache de consenso del grupo {group_id}: {str(e)}")
+
+    def invalidate(self, group_id):
+        """
+        Renueva el estado del grupo cuando se confirma la transacción en curso
+        """
+        if not group_id:
+            return
+
+        def renew():
+            try:
+                get_redis().set(STATE_KEY.format(group_id=group_id), uuid.uuid4().hex)
+            except redis.RedisError as e:
+                logger.error(f"No se pudo invalidar la cache de consenso del grupo {group_id}: {str(e)}")
+
+        # Renovarlo antes del commit dejaría que una lectura concurrente
+        # guardara datos antiguos bajo el estado nuevo
+        transaction.on_commit(renew)
+
+
+# Instancia global de la cache
+consensus_cache = ConsensusCache()
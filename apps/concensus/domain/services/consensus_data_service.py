@@ -0,0 +1,106 @@
+"""
+Carga de los datos de una votación de consenso
+
+Reúne en un número constante de consultas (sin importar cuántos miembros o
+tópicos tenga el grupo) las posiciones finales, el nivel de expertise y las
+etiquetas de todos los miembros, y las entrega como matrices
+usuarios x tópicos que los algoritmos de votación consumen directamente.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.apps import apps
+
+logger = logging.getLogger(__name__)
+
+# Expertise asignada cuando el usuario no la indicó para un tópico
+DEFAULT_EXPERTISE = 1
+
+
+class ConsensusData:
+    """
+    Datos de votación de un grupo
+
+    Attributes:
+        topics: RecommendedTopic del grupo ordenados por nombre (columnas de las matrices)
+        topic_names: Nombres de los tópicos en el mismo orden
+        user_ids: Miembros que completaron la fase 2 (filas de las matrices)
+        positions: Matriz usuarios x tópicos con posFinal; NaN si el usuario no ordenó el tópico
+        expertise: Matriz usuarios x tópicos con el nivel de expertise (DEFAULT_EXPERTISE si falta)
+        labels: Nombre de tópico -> etiquetas asignadas por los usuarios
+        pairwise: Matriz de preferencias por pares almacenada (GroupPairwiseMatrix) si está al día, o None
+    """
+
+    def __init__(self, topics: List, user_ids: List[str]):
+        self.topics = topics
+        self.topic_names = [topic.topic_name for topic in topics]
+        self.user_ids = user_ids
+        self.positions = np.full((len(user_ids), len(topics)), np.nan)
+        self.expertise = np.full((len(user_ids), len(topics)), DEFAULT_EXPERTISE, dtype=np.int64)
+        self.labels: Dict[str, List[str]] = {topic_name: [] for topic_name in self.topic_names}
+        self.pairwise: Optional[np.ndarray] = None
+        self.topic_index = {topic.id: column for column, topic in enumerate(topics)}
+        self.user_index = {user_id: row for row, user_id in enumerate(user_ids)}
+        self.topics_by_name = {}
+        for topic in topics:
+            self.topics_by_name.setdefault(topic.topic_name, topic)
+
+    def ballots(self) -> np.ndarray:
+        """
+        Posiciones como papeletas: las ausentes valen -inf y pierden frente a cualquier posición asignada
+        """
+        return np.where(np.isnan(self.positions), -np.inf, self.positions)
+
+
+def load_consensus_data(group) -> ConsensusData:
+    """
+    Carga las posiciones, expertise y etiquetas de todos los miembros del grupo
+
+    Raises:
+        ValueError: Si no todos los miembros completaron las fases 1 y 2
+    """
+    UserPhase = apps.get_model('concensus', 'UserPhase')
+    RecommendedTopic = apps.get_model('concensus', 'RecommendedTopic')
+    FinalTopicOrder = apps.get_model('concensus', 'FinalTopicOrder')
+    UserExpertise = apps.get_model('concensus', 'UserExpertise')
+    GroupPairwiseMatrix = apps.get_model('concensus', 'GroupPairwiseMatrix')
+
+    # Usuarios que completaron la fase 2
+    user_ids = list(
+        UserPhase.objects.filter(group=group, phase=2).order_by('user_id').values_list('user_id', flat=True)
+    )
+    if len(user_ids) != group.users.count():
+        raise ValueError("Not all users have completed phase 1 and 2")
+
+    topics = list(RecommendedTopic.objects.filter(group=group).order_by('topic_name', 'id'))
+    data = ConsensusData(topics, user_ids)
+
+    orders = FinalTopicOrder.objects.filter(
+        idGroup=group, idUser_id__in=user_ids
+    ).values_list(
+        'idUser_id', 'idTopic_id', 'posFinal', 'label', 'idUser__first_name', 'idUser__last_name'
+    ).order_by('idUser_id', 'idTopic_id')
+    for user_id, topic_id, position, label, first_name, last_name in orders:
+        column = data.topic_index.get(topic_id)
+        if column is None:
+            continue
+        data.positions[data.user_index[user_id], column] = position
+        if label:
+            data.labels[topics[column].topic_name].append(f"{first_name} {last_name} rated it as {label}")
+
+    expertise = UserExpertise.objects.filter(
+        group=group, user_id__in=user_ids
+    ).values_list('user_id', 'topic_id', 'expertise_level')
+    for user_id, topic_id, level in expertise:
+        column = data.topic_index.get(topic_id)
+        if column is not None:
+            data.expertise[data.user_index[user_id], column] = level
+
+    # La matriz incremental solo se usa si cubre exactamente estos tópicos y usuarios
+    matrix = GroupPairwiseMatrix.objects.filter(group=group).first()
+    if matrix and list(matrix.topic_ids) == [topic.id for topic in topics] and matrix.ballots == len(user_ids):
+        data.pairwise = np.array(matrix.counts, dtype=np.int64).reshape(len(topics), len(topics))
+
+    logger.debug(f"Datos de consenso del grupo {group.id}: {len(user_ids)} usuarios, {len(topics)} tópicos")
+    return data
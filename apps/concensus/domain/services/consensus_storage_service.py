@@ -0,0 +1,103 @@
+"""
+Persistencia por lotes de papeletas (FinalTopicOrder) y resultados de consenso
+
+Ambas escrituras son upserts con bulk_create(update_conflicts=True) sobre las
+claves únicas de cada tabla: una sentencia para todas las filas en lugar de
+borrar y crear fila por fila. Deben ejecutarse dentro de una transacción.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from django.apps import apps
+from django.db.models import Max
+
+from apps.concensus.domain.services.consensus_cache import consensus_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ConsensusStorageService:
+    """
+    Escrituras por lotes del cálculo de consenso
+    """
+
+    def save_final_topic_order(self, group_id, user_id, orders: List[dict]) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Reemplaza la papeleta de un usuario en un grupo
+
+        La papeleta anterior se lee aquí, así que la matriz por pares del grupo
+        debe estar ya bloqueada (pairwise_matrix_service.lock) para que dos
+        envíos simultáneos no partan de la misma papeleta anterior.
+
+        Args:
+            orders: Datos validados por FinalTopicOrder (idTopic, posFinal, label)
+
+        Returns:
+            (anterior, nueva): topic_id -> posición de la papeleta reemplazada y de la guardada
+        """
+        FinalTopicOrder = apps.get_model('concensus', 'FinalTopicOrder')
+
+        existing = FinalTopicOrder.objects.filter(idGroup_id=group_id, idUser_id=user_id)
+        previous = dict(existing.values_list('idTopic_id', 'posFinal'))
+
+        rows = [
+            FinalTopicOrder(
+                idGroup_id=group_id,
+                idUser_id=user_id,
+                idTopic_id=order['idTopic'].id,
+                posFinal=order['posFinal'],
+                label=order.get('label'),
+            )
+            for order in orders
+        ]
+        FinalTopicOrder.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['idGroup', 'idUser', 'idTopic'],
+            update_fields=['posFinal', 'label'],
+        )
+
+        current = {row.idTopic_id: row.posFinal for row in rows}
+        # Tópicos que estaban en la papeleta anterior y ya no están
+        existing.exclude(idTopic_id__in=list(current)).delete()
+        # bulk_create no emite post_save, así que la cache se invalida aquí
+        consensus_cache.invalidate(group_id)
+        return previous, current
+
+    def save_results(self, group, rankings: List[Tuple[int, float]]) -> int:
+        """
+        Guarda el resultado de un cálculo de consenso como una nueva versión
+
+        Args:
+            rankings: (topic_id, final_value) de cada tópico
+
+        Returns:
+            Versión asignada; los clientes la comparan con la que tienen para
+            detectar resultados desactualizados
+        """
+        Group = apps.get_model('custom_auth', 'Group')
+        ConsensusResult = apps.get_model('concensus', 'ConsensusResult')
+
+        # Serializa los cálculos concurrentes del mismo grupo
+        Group.objects.select_for_update().filter(id=group.id).first()
+        results = ConsensusResult.objects.filter(idGroup=group)
+        version = (results.aggregate(latest=Max('version'))['latest'] or 0) + 1
+
+        ConsensusResult.objects.bulk_create(
+            [
+                ConsensusResult(idGroup=group, idTopic_id=topic_id, final_value=final_value, version=version)
+                for topic_id, final_value in rankings
+            ],
+            update_conflicts=True,
+            unique_fields=['idGroup', 'idTopic'],
+            update_fields=['final_value', 'version'],
+        )
+        # Resultados de tópicos que ya no forman parte del cálculo
+        results.exclude(version=version).delete()
+
+        logger.info(f"Resultados de consenso del grupo {group.id} guardados: versión {version}, {len(rankings)} tópicos")
+        return version
+
+
+# Instancia global del servicio
+consensus_storage_service = ConsensusStorageService()
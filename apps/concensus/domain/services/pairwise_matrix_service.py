@@ -0,0 +1,174 @@
+"""
+Matriz de preferencias por pares de cada grupo, mantenida de forma incremental
+
+Cada vez que un usuario guarda o reemplaza su FinalTopicOrder se suma a la
+matriz persistida (GroupPairwiseMatrix) la diferencia entre las preferencias
+por pares de su papeleta nueva y las de la anterior: O(T²) por papeleta, sin
+releer las del resto del grupo. Con la matriz al día se puede publicar un
+ranking provisional en la fase 2 tras cada papeleta, y el cálculo final de los
+métodos por pares se reduce al cierre sobre los conteos almacenados.
+
+Si cambian los tópicos del grupo (por ejemplo, un TopicAddedUser) la matriz se
+reconstruye desde las FinalTopicOrder guardadas, porque un tópico nuevo queda
+por debajo de los ya ordenados en todas las papeletas anteriores.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.apps import apps
+
+from apps.concensus.domain.services.schulze_service import pairwise_preferences
+from apps.concensus.domain.services.voting_methods import PairwiseVotingMethod, get_voting_method
+
+logger = logging.getLogger(__name__)
+
+
+class PairwiseMatrixService:
+    """
+    Mantenimiento de GroupPairwiseMatrix y rankings provisionales
+    """
+
+    @staticmethod
+    def _topic_ids(group_id) -> List[int]:
+        # Mismo orden de columnas que load_consensus_data
+        RecommendedTopic = apps.get_model('concensus', 'RecommendedTopic')
+        return list(
+            RecommendedTopic.objects.filter(group_id=group_id).order_by('topic_name', 'id').values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def _ballot_pairwise(positions: Dict[int, int], column: Dict[int, int]) -> np.ndarray:
+        """
+        Preferencias por pares de una única papeleta (topic_id -> posición)
+        """
+        ballot = np.full((1, len(column)), -np.inf)
+        for topic_id, position in positions.items():
+            index = column.get(topic_id)
+            if index is not None:
+                ballot[0, index] = position
+        return pairwise_preferences(ballot)
+
+    def lock(self, group_id):
+        """
+        Matriz del grupo bloqueada (SELECT ... FOR UPDATE) hasta el commit
+
+        Se toma antes de leer la papeleta anterior del usuario: las papeletas
+        del mismo grupo se serializan y una papeleta enviada dos veces no se
+        cuenta dos veces.
+        """
+        GroupPairwiseMatrix = apps.get_model('concensus', 'GroupPairwiseMatrix')
+        matrix, _ = GroupPairwiseMatrix.objects.select_for_update().get_or_create(group_id=group_id)
+        return matrix
+
+    def apply_ballot(self, group_id, previous: Dict[int, int], current: Dict[int, int], matrix=None):
+        """
+        Aplica a la matriz del grupo el reemplazo de una papeleta
+
+        Debe llamarse dentro de la transacción que guarda las FinalTopicOrder,
+        con la matriz bloqueada (lock) desde antes de leer la papeleta anterior,
+        de modo que dos papeletas simultáneas no pierden ni duplican deltas.
+
+        Args:
+            previous: topic_id -> posición de la papeleta anterior ({} si no había)
+            current: topic_id -> posición de la papeleta nueva
+            matrix: Matriz devuelta por lock; si no se pasa se bloquea aquí
+        """
+        topic_ids = self._topic_ids(group_id)
+        if matrix is None:
+            matrix = self.lock(group_id)
+
+        if list(matrix.topic_ids) != topic_ids:
+            self.rebuild(group_id, matrix, topic_ids)
+            return matrix
+
+        column = {topic_id: index for index, topic_id in enumerate(topic_ids)}
+        counts = np.array(matrix.counts, dtype=np.int64).reshape(len(topic_ids), len(topic_ids))
+        counts += self._ballot_pairwise(current, column) - self._ballot_pairwise(previous, column)
+
+        matrix.counts = counts.tolist()
+        matrix.ballots += int(bool(current)) - int(bool(previous))
+        matrix.version += 1
+        matrix.save(update_fields=['counts', 'ballots', 'version', 'updated_at'])
+        logger.debug(f"Matriz por pares del grupo {group_id} actualizada ({matrix.ballots} papeletas)")
+        return matrix
+
+    def rebuild(self, group_id, matrix=None, topic_ids: Optional[List[int]] = None):
+        """
+        Recalcula la matriz del grupo desde todas sus FinalTopicOrder
+        """
+        FinalTopicOrder = apps.get_model('concensus', 'FinalTopicOrder')
+
+        if topic_ids is None:
+            topic_ids = self._topic_ids(group_id)
+        if matrix is None:
+            matrix = self.lock(group_id)
+
+        column = {topic_id: index for index, topic_id in enumerate(topic_ids)}
+        rows = FinalTopicOrder.objects.filter(idGroup_id=group_id).values_list('idUser_id', 'idTopic_id', 'posFinal')
+        voters: Dict[str, int] = {}
+        entries = []
+        for user_id, topic_id, position in rows:
+            voters.setdefault(user_id, len(voters))
+            if topic_id in column:
+                entries.append((voters[user_id], column[topic_id], position))
+
+        ballots = np.full((len(voters), len(topic_ids)), -np.inf)
+        for row, index, position in entries:
+            ballots[row, index] = position
+
+        matrix.topic_ids = topic_ids
+        matrix.counts = pairwise_preferences(ballots).tolist()
+        matrix.ballots = len(voters)
+        matrix.version += 1
+        matrix.save()
+        logger.info(f"Matriz por pares del grupo {group_id} reconstruida: {len(topic_ids)} tópicos, {len(voters)} papeletas")
+        return matrix
+
+    def provisional_ranking(self, group, matrix=None) -> Optional[List[dict]]:
+        """
+        Ranking con las papeletas recibidas hasta ahora según el método del grupo
+
+        Args:
+            matrix: GroupPairwiseMatrix ya cargada (por ejemplo, la que devolvió apply_ballot)
+
+        Returns:
+            Lista de resultados (id_topic, topic_name, final_value) o None si
+            el método del grupo no es por pares (la votación posicional depende
+            del expertise) o no hay matriz
+        """
+        GroupPairwiseMatrix = apps.get_model('concensus', 'GroupPairwiseMatrix')
+        RecommendedTopic = apps.get_model('concensus', 'RecommendedTopic')
+
+        method = get_voting_method(group.voting_type)
+        if not isinstance(method, PairwiseVotingMethod):
+            return None
+
+        try:
+            if matrix is None:
+                matrix = GroupPairwiseMatrix.objects.get(group=group)
+            if not matrix.topic_ids:
+                return None
+            names = dict(RecommendedTopic.objects.filter(id__in=matrix.topic_ids).values_list('id', 'topic_name'))
+            topic_ids = [topic_id for topic_id in matrix.topic_ids if topic_id in names]
+            if len(topic_ids) != len(matrix.topic_ids):
+                return None
+            ids_by_name = {}
+            for topic_id in topic_ids:
+                ids_by_name.setdefault(names[topic_id], topic_id)
+
+            counts = np.array(matrix.counts, dtype=np.int64)
+            ranking = method.rank_pairwise(counts, [names[topic_id] for topic_id in topic_ids])
+            return [
+                {"id_topic": ids_by_name[topic_name], "topic_name": topic_name, "final_value": final_value}
+                for topic_name, final_value in ranking
+            ]
+        except GroupPairwiseMatrix.DoesNotExist:
+            return None
+        except Exception as e:
+            logger.error(f"Error calculando el ranking provisional del grupo {group.id}: {str(e)}")
+            return None
+
+
+# Instancia global del servicio
+pairwise_matrix_service = PairwiseMatrixService()
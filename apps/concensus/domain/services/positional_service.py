@@ -0,0 +1,36 @@
+"""
+Votación posicional ponderada por expertise
+
+El valor final de cada tópico es la media de las posiciones asignadas por los
+usuarios ponderada por su nivel de expertise en ese tópico:
+
+    valor = sum(posición * expertise) / sum(expertise)
+
+Una posición ausente cuenta como 0 y su expertise sigue sumando al divisor.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+def weighted_positional_ranking(positions: np.ndarray, expertise: np.ndarray, topic_names: Sequence[str]) -> List[Tuple[str, float]]:
+    """
+    Calcula el valor ponderado de cada tópico y los ordena de mayor a menor
+
+    Args:
+        positions: Matriz usuarios x tópicos con las posiciones (NaN si falta)
+        expertise: Matriz usuarios x tópicos con el nivel de expertise
+        topic_names: Nombres de las columnas; su orden decide los empates
+
+    Returns:
+        Lista (tópico, valor ponderado) ordenada por valor descendente
+    """
+    weighted = (np.nan_to_num(positions, nan=0.0) * expertise).sum(axis=0)
+    total_expertise = expertise.sum(axis=0)
+    values = np.divide(
+        weighted, total_expertise,
+        out=np.zeros(len(topic_names), dtype=float),
+        where=total_expertise > 0
+    )
+    ranking = np.lexsort((np.arange(len(topic_names)), -values))
+    return [(topic_names[i], float(values[i])) for i in ranking]
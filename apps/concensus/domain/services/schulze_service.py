@@ -0,0 +1,156 @@
+"""
+Motor del método de Schulze sobre matrices de NumPy
+
+Las papeletas se representan como una matriz usuarios x tópicos con la posición
+que cada usuario asignó a cada tópico (mayor valor = mayor preferencia). Un
+tópico sin posición para un usuario queda por debajo de todos los que sí
+ordenó. A partir de esa matriz:
+
+    d[a, b] = usuarios que prefieren a sobre b        (comparación por pares)
+    p[a, b] = d[a, b] si d[a, b] > d[b, a], si no 0   (enlaces directos)
+    p       = cierre de caminos más anchos (Floyd-Warshall max-min)
+
+Un tópico gana a otro si p[a, b] > p[b, a]; el valor final de cada tópico es el
+número de tópicos a los que gana. Los empates en ese valor se resuelven por el
+orden en que llegan los tópicos (alfabético en load_consensus_data), de modo que el
+resultado no depende del orden de los diccionarios de entrada.
+"""
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Celdas booleanas por bloque de usuarios al comparar pares (acota la memoria)
+PAIRWISE_BLOCK_CELLS = 1 << 24
+
+
+class SchulzeResult:
+    """
+    Resultado completo de una votación de Schulze
+
+    Attributes:
+        topics: Tópicos en el orden de las filas/columnas de las matrices
+        pairwise: Matriz d de preferencias por pares (tópicos x tópicos)
+        strength: Matriz p de fortalezas de los caminos más anchos
+        wins: Tópicos a los que gana cada tópico
+        ranking: Índices de los tópicos del ganador al último
+    """
+
+    def __init__(self, topics: List[str], pairwise: np.ndarray, strength: np.ndarray, wins: np.ndarray, ranking: np.ndarray):
+        self.topics = topics
+        self.pairwise = pairwise
+        self.strength = strength
+        self.wins = wins
+        self.ranking = ranking
+
+    def sorted_topics(self) -> List[Tuple[str, int]]:
+        """
+        Lista (tópico, tópicos a los que gana) ordenada del ganador al último
+        """
+        return [(self.topics[i], int(self.wins[i])) for i in self.ranking]
+
+    def strength_dict(self) -> Dict[str, Dict[str, int]]:
+        """
+        Matriz de fortalezas como diccionario anidado por nombre de tópico
+        """
+        return {
+            topic: {other: int(self.strength[i, j]) for j, other in enumerate(self.topics) if i != j}
+            for i, topic in enumerate(self.topics)
+        }
+
+
+def build_ballots(positions_data: Dict[str, Dict[str, int]], topic_names: Sequence[str], voters: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Construye la matriz de papeletas usuarios x tópicos
+
+    Las posiciones ausentes se guardan como -inf para que pierdan frente a
+    cualquier posición asignada y empaten entre sí.
+    """
+    if voters is None:
+        voters = sorted({user for topic in topic_names for user in positions_data.get(topic, {})})
+    voter_index = {user: row for row, user in enumerate(voters)}
+
+    ballots = np.full((len(voters), len(topic_names)), -np.inf)
+    for column, topic in enumerate(topic_names):
+        for user, pos in positions_data.get(topic, {}).items():
+            row = voter_index.get(user)
+            if row is not None:
+                ballots[row, column] = pos
+    return ballots
+
+
+def pairwise_preferences(ballots: np.ndarray) -> np.ndarray:
+    """
+    Matriz d donde d[a, b] es el número de papeletas que ponen a por encima de b
+    """
+    voters, topics = ballots.shape
+    pairwise = np.zeros((topics, topics), dtype=np.int64)
+    if not voters or not topics:
+        return pairwise
+
+    block = max(1, PAIRWISE_BLOCK_CELLS // max(1, topics * topics))
+    for start in range(0, voters, block):
+        chunk = ballots[start:start + block]
+        pairwise += (chunk[:, :, None] > chunk[:, None, :]).sum(axis=0)
+    return pairwise
+
+
+def widest_paths(pairwise: np.ndarray) -> np.ndarray:
+    """
+    Fortaleza de los caminos más anchos entre cada par de tópicos
+
+    Floyd-Warshall en la variante max-min: en cada paso k se relajan todos los
+    pares a la vez con una operación vectorizada sobre la matriz completa.
+    """
+    strength = np.where(pairwise > pairwise.T, pairwise, 0)
+    np.fill_diagonal(strength, 0)
+    for k in range(strength.shape[0]):
+        np.maximum(strength, np.minimum(strength[:, k:k + 1], strength[k:k + 1, :]), out=strength)
+    # La diagonal no participa en el resultado; se deja en 0 como en la matriz d
+    np.fill_diagonal(strength, 0)
+    return strength
+
+
+def schulze(positions_data: Dict[str, Dict[str, int]], topic_names: Sequence[str], voters: Optional[Sequence[str]] = None) -> SchulzeResult:
+    """
+    Ejecuta el método de Schulze sobre las posiciones de los usuarios
+
+    Args:
+        positions_data: Tópico -> {usuario: posición}, mayor posición = mayor preferencia
+        topic_names: Tópicos a ordenar; su orden decide los empates
+        voters: Usuarios a considerar (por defecto, todos los que aparecen en positions_data)
+    """
+    topic_names = list(topic_names)
+    return schulze_ballots(build_ballots(positions_data, topic_names, voters), topic_names)
+
+
+def schulze_ballots(ballots: np.ndarray, topic_names: Sequence[str]) -> SchulzeResult:
+    """
+    Ejecuta el método de Schulze sobre una matriz de papeletas usuarios x tópicos
+
+    Args:
+        ballots: Posiciones (mayor = preferido), -inf donde el usuario no ordenó el tópico
+        topic_names: Nombres de las columnas; su orden decide los empates
+    """
+    return schulze_pairwise(pairwise_preferences(ballots), topic_names)
+
+
+def schulze_pairwise(pairwise: np.ndarray, topic_names: Sequence[str]) -> SchulzeResult:
+    """
+    Ejecuta el método de Schulze sobre una matriz de preferencias por pares ya calculada
+
+    Args:
+        pairwise: Matriz d tópicos x tópicos (por ejemplo, la mantenida por GroupPairwiseMatrix)
+        topic_names: Nombres de las filas/columnas; su orden decide los empates
+    """
+    topic_names = list(topic_names)
+    strength = widest_paths(pairwise)
+
+    wins = (strength > strength.T).sum(axis=1)
+    # lexsort ordena por la última clave: más victorias primero y, en empate, orden de entrada
+    ranking = np.lexsort((np.arange(len(topic_names)), -wins))
+
+    logger.debug(f"Schulze: {len(topic_names)} tópicos")
+    return SchulzeResult(topic_names, pairwise, strength, wins, ranking)
@@ -0,0 +1,278 @@
+"""
+Registro de métodos de votación para el cálculo de consenso
+
+Cada método recibe los datos de votación del grupo (ConsensusData, con las
+matrices usuarios x tópicos) y retorna la lista (tópico, valor final) ordenada
+del ganador al último. Los empates en el valor se resuelven siempre por el
+orden de data.topic_names (alfabético), así que el resultado es determinista.
+
+Los métodos se registran con @register_voting_method bajo el valor de
+Group.VotingType que los selecciona; el slug de ese valor ('borda-count',
+'ranked-pairs'...) es el que se usa en las URLs.
+
+Salvo la votación posicional, que pondera por expertise, todos los métodos
+trabajan sobre la matriz de preferencias por pares d[a, b] (usuarios que ponen
+a por encima de b), calculada una vez de forma vectorizada.
+"""
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.utils.text import slugify
+
+from apps.concensus.domain.services.consensus_data_service import ConsensusData
+from apps.concensus.domain.services.positional_service import weighted_positional_ranking
+from apps.concensus.domain.services.schulze_service import pairwise_preferences, schulze_pairwise
+from apps.custom_auth.domain.entities.group import Group
+
+logger = logging.getLogger(__name__)
+
+# Hasta este número de tópicos Kemeny-Young se resuelve de forma exacta
+# (programación dinámica sobre subconjuntos, O(2^T * T)); por encima se usa
+# búsqueda local por inserción partiendo del orden de Borda
+KEMENY_EXACT_MAX_TOPICS = 12
+
+# Rondas máximas de la búsqueda local de Kemeny-Young
+KEMENY_MAX_ROUNDS = 50
+
+_registry: Dict[str, 'VotingMethod'] = {}
+
+
+def register_voting_method(cls):
+    """
+    Decorador para registrar un método de votación bajo su voting_type
+    """
+    method = cls()
+    _registry[method.voting_type] = method
+    return cls
+
+
+def get_voting_method(voting_type: str) -> Optional['VotingMethod']:
+    """
+    Retorna el método registrado para un valor de Group.voting_type
+    """
+    return _registry.get(voting_type)
+
+
+def get_voting_method_by_slug(slug: str) -> Optional['VotingMethod']:
+    """
+    Retorna el método registrado para un slug de URL ('positional-voting', 'kemeny-young'...)
+    """
+    for method in _registry.values():
+        if method.slug == slug:
+            return method
+    return None
+
+
+def voting_methods() -> List['VotingMethod']:
+    """
+    Métodos registrados, en orden de registro
+    """
+    return list(_registry.values())
+
+
+def _ranking(values: np.ndarray, topic_names: Sequence[str]) -> List[Tuple[str, float]]:
+    """
+    Ordena los tópicos por valor descendente; en empate, por orden de entrada
+    """
+    order = np.lexsort((np.arange(len(topic_names)), -values))
+    return [(topic_names[i], float(values[i])) for i in order]
+
+
+def _order_values(order: Sequence[int], size: int) -> np.ndarray:
+    """
+    Valor de cada tópico según su lugar en un orden total: tópicos que quedan por debajo
+    """
+    values = np.zeros(size)
+    values[np.asarray(order, dtype=np.int64)] = np.arange(size - 1, -1, -1)
+    return values
+
+
+class VotingMethod:
+    """
+    Interfaz común de los métodos de votación
+    """
+    voting_type: str = ''
+    uses_expertise = False
+
+    @property
+    def slug(self) -> str:
+        return slugify(self.voting_type)
+
+    def rank(self, data: ConsensusData) -> List[Tuple[str, float]]:
+        raise NotImplementedError
+
+
+class PairwiseVotingMethod(VotingMethod):
+    """
+    Método que solo depende de la matriz de preferencias por pares
+    """
+
+    def rank(self, data: ConsensusData) -> List[Tuple[str, float]]:
+        if not data.topic_names:
+            return []
+        # La matriz mantenida por pairwise_matrix_service evita recorrer las papeletas
+        pairwise = data.pairwise if data.pairwise is not None else pairwise_preferences(data.ballots())
+        return self.rank_pairwise(pairwise, data.topic_names)
+
+    def rank_pairwise(self, pairwise: np.ndarray, topic_names: Sequence[str]) -> List[Tuple[str, float]]:
+        raise NotImplementedError
+
+
+@register_voting_method
+class PositionalVoting(VotingMethod):
+    """
+    Media de las posiciones ponderada por el expertise de cada usuario
+    """
+    voting_type = Group.VotingType.POSITIONAL
+    uses_expertise = True
+
+    def rank(self, data: ConsensusData) -> List[Tuple[str, float]]:
+        return weighted_positional_ranking(data.positions, data.expertise, data.topic_names)
+
+
+@register_voting_method
+class SchulzeVoting(PairwiseVotingMethod):
+    """
+    Método de Schulze; el valor es el número de tópicos a los que gana cada tópico
+    """
+    voting_type = Group.VotingType.NONPOSITIONAL
+
+    def rank_pairwise(self, pairwise, topic_names):
+        sorted_topics = schulze_pairwise(pairwise, topic_names).sorted_topics()
+        logger.info(f"Sorted topics (after Schulze algorithm): {sorted_topics}")
+        return sorted_topics
+
+
+@register_voting_method
+class BordaVoting(PairwiseVotingMethod):
+    """
+    Recuento de Borda: un punto por cada (usuario, tópico) que el tópico deja por debajo
+    """
+    voting_type = Group.VotingType.BORDA
+
+    def rank_pairwise(self, pairwise, topic_names):
+        return _ranking(pairwise.sum(axis=1).astype(float), topic_names)
+
+
+@register_voting_method
+class CopelandVoting(PairwiseVotingMethod):
+    """
+    Copeland: un punto por cada duelo ganado y medio por cada empate
+    """
+    voting_type = Group.VotingType.COPELAND
+
+    def rank_pairwise(self, pairwise, topic_names):
+        wins = (pairwise > pairwise.T).sum(axis=1)
+        # La diagonal siempre empata consigo misma
+        ties = (pairwise == pairwise.T).sum(axis=1) - 1
+        return _ranking(wins + 0.5 * ties, topic_names)
+
+
+@register_voting_method
+class KemenyYoungVoting(PairwiseVotingMethod):
+    """
+    Kemeny-Young: orden total que maximiza los acuerdos por pares con las papeletas
+    """
+    voting_type = Group.VotingType.KEMENY
+
+    def rank_pairwise(self, pairwise, topic_names):
+        size = len(topic_names)
+        if size <= KEMENY_EXACT_MAX_TOPICS:
+            order = self.exact_order(pairwise)
+        else:
+            initial = np.lexsort((np.arange(size), -pairwise.sum(axis=1)))
+            order = self.local_search_order(pairwise, initial)
+        return _ranking(_order_values(order, size), topic_names)
+
+    @staticmethod
+    def exact_order(pairwise: np.ndarray) -> List[int]:
+        """
+        Orden óptimo por programación dinámica sobre subconjuntos
+
+        best[S] es el mejor acuerdo posible colocando primero los tópicos de S;
+        al añadir x detrás de S se suman los acuerdos de x sobre los tópicos
+        aún no colocados: sum(d[x, :]) - sum(d[x, S]).
+        """
+        size = pairwise.shape[0]
+        subsets = 1 << size
+        weights = pairwise.astype(float)
+        row_total = weights.sum(axis=1)
+        topics = np.arange(size)
+        bits = 1 << topics
+
+        # inside[S, x] = sum(d[x, y] for y in S)
+        inside = np.zeros((subsets, size))
+        for subset in range(1, subsets):
+            low = subset & -subset
+            inside[subset] = inside[subset ^ low] + weights[:, low.bit_length() - 1]
+
+        best = np.full(subsets, -np.inf)
+        best[0] = 0.0
+        last = np.full(subsets, -1, dtype=np.int64)
+        for subset in range(subsets - 1):
+            free = topics[(subset & bits) == 0]
+            candidates = best[subset] + row_total[free] - inside[subset, free]
+            targets = subset | bits[free]
+            improved = candidates > best[targets]
+            best[targets[improved]] = candidates[improved]
+            last[targets[improved]] = free[improved]
+
+        order = []
+        subset = subsets - 1
+        while subset:
+            topic = int(last[subset])
+            order.append(topic)
+            subset ^= 1 << topic
+        order.reverse()
+        return order
+
+    @staticmethod
+    def local_search_order(pairwise: np.ndarray, initial: Sequence[int], max_rounds: int = KEMENY_MAX_ROUNDS) -> List[int]:
+        """
+        Búsqueda local por inserción: cada tópico se mueve a la posición que más
+        mejora el acuerdo hasta que ningún movimiento mejora o se agotan las rondas
+        """
+        margin = (pairwise - pairwise.T).astype(float)
+        order = [int(topic) for topic in initial]
+        for _ in range(max_rounds):
+            improved = False
+            for topic in list(order):
+                current = order.index(topic)
+                rest = order[:current] + order[current + 1:]
+                # gain[j]: acuerdo relativo de insertar el tópico en la posición j de rest
+                gain = np.concatenate(([0.0], np.cumsum(margin[rest, topic])))
+                target = int(np.argmax(gain))
+                if gain[target] > gain[current]:
+                    rest.insert(target, topic)
+                    order = rest
+                    improved = True
+            if not improved:
+                break
+        return order
+
+
+@register_voting_method
+class RankedPairsVoting(PairwiseVotingMethod):
+    """
+    Ranked Pairs (Tideman): se fijan los duelos de mayor a menor victoria
+    omitiendo los que crearían un ciclo; el valor es el número de tópicos a
+    los que cada tópico se impone en el grafo resultante
+    """
+    voting_type = Group.VotingType.RANKED_PAIRS
+
+    def rank_pairwise(self, pairwise, topic_names):
+        size = len(topic_names)
+        winners, losers = np.nonzero(pairwise > pairwise.T)
+        # Más votos a favor primero, luego menos votos en contra y por último orden de entrada
+        order = np.lexsort((losers, winners, pairwise[losers, winners], -pairwise[winners, losers]))
+
+        # reach[a, b]: a se impone a b a través de duelos fijados
+        reach = np.eye(size, dtype=bool)
+        for pair in order:
+            winner, loser = winners[pair], losers[pair]
+            if reach[loser, winner] or reach[winner, loser]:
+                continue
+            reach |= np.outer(reach[:, winner], reach[loser, :])
+
+        return _ranking((reach.sum(axis=1) - 1).astype(float), topic_names)
@@ -7,7 +7,7 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ['id', 'user', 'text', 'posture', 'created_at', 'parent', 'replies']
+        fields = ['id', 'client_id', 'user', 'text', 'posture', 'created_at', 'parent', 'replies']
 
     def get_replies(self, obj):
         replies = obj.replies.all()
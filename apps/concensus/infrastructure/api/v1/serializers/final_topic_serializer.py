@@ -8,4 +8,14 @@ class FinalTopicOrderSerializer(serializers.ModelSerializer):
         model = FinalTopicOrder
         fields = '__all__'
 
+
+class FinalTopicOrderBallotSerializer(serializers.ModelSerializer):
+    """
+    Posición de un tópico en la papeleta de un usuario; el grupo y el usuario
+    salen de la petición, y la papeleta se guarda con un upsert por lotes
+    """
+    class Meta:
+        model = FinalTopicOrder
+        fields = ['idTopic', 'posFinal', 'label']
+
 #select * from "concensus_finaltopicorder";
\ No newline at end of file
@@ -2,7 +2,7 @@ from django.http import JsonResponse
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from apps.concensus.infrastructure.api.v1.views.debate_message_views import MessageHistoryView
+from apps.concensus.infrastructure.api.v1.views.debate_message_views import MessageHistoryView, MessageReplayView
 from apps.concensus.infrastructure.api.v1.views.final_topic_views import SaveFinalTopicOrderView
 from apps.concensus.infrastructure.api.v1.views.notification_views import CombinedSearchView, NotificationListView, NotificationPhaseTwoListView, PhaseOneCompletedView, TopicReorderView, TopicTagView, TopicVisitedView
 from apps.concensus.infrastructure.api.v1.views.result_concensus_views import ExecuteConsensusCalculationsView, ConsensusCalculationByVotingTypeView
@@ -97,5 +97,6 @@ urlpatterns=[
     path('debates/<int:debate_id>/statistics/', StatisticsView.as_view(), name='debate_statistics'),
 
     path('messages/<int:debate_id>/', MessageHistoryView.as_view(), name='message-history'),
+    path('messages/<int:debate_id>/replay/', MessageReplayView.as_view(), name='message-replay'),
 
 ]
@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from apps.concensus.domain.entities.debate_message import Message
+from apps.concensus.domain.services.chat_buffer_service import chat_buffer_service
 from apps.concensus.infrastructure.api.v1.serializers.debate_message_serializer import MessageSerializer
 
 class MessageHistoryView(APIView):
@@ -11,3 +12,16 @@ class MessageHistoryView(APIView):
         messages = Message.objects.filter(debate_id=debate_id, parent=None).order_by('created_at')
         serializer = MessageSerializer(messages, many=True)
         return Response(serializer.data)
+
+
+class MessageReplayView(APIView):
+    """
+    Mensajes del chat posteriores al último que vio el cliente, incluidos los
+    que aún están en el buffer, para ponerse al día tras reconectar
+    - GET ?after=<id o ULID del último mensaje visto>
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, debate_id):
+        messages, has_more = chat_buffer_service.replay(debate_id, after=request.query_params.get('after'))
+        return Response({'messages': messages, 'has_more': has_more})
@@ -1,8 +1,8 @@
-from django.core.cache import cache
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from apps.concensus.domain.entities.debate_participant_posture import UserPosture
+from apps.shared.infrastructure.presence import presence
 
 
 # class StatisticsView(APIView):
@@ -41,9 +41,8 @@ class StatisticsView(APIView):
             debate_id=debate_id, posture='neutral'
         ).count()
 
-        # Obtener usuarios únicos conectados desde Redis
-        connected_users = cache.get(f"chat_users_{debate_id}", set())
-        total_active_users = len(connected_users)
+        # Usuarios únicos conectados al chat del debate
+        total_active_users = presence.count_users(f"chat_{debate_id}") or 0
 
         data = {
             'debate_id': debate_id,
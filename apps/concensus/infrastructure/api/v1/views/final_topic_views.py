@@ -1,12 +1,14 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.apps import apps
+from django.db import transaction
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
-from apps.concensus.domain.entities.final_topic_order import FinalTopicOrder
 from apps.concensus.domain.entities.user_phase import UserPhase
-from apps.concensus.infrastructure.api.v1.serializers.final_topic_serializer import FinalTopicOrderSerializer
+from apps.concensus.domain.services.consensus_storage_service import consensus_storage_service
+from apps.concensus.domain.services.pairwise_matrix_service import pairwise_matrix_service
+from apps.concensus.infrastructure.api.v1.serializers.final_topic_serializer import FinalTopicOrderBallotSerializer
 from django.utils import timezone
 
 from apps.concensus.infrastructure.api.v1.serializers.notification_serializer import NotificationPhaseTwoSerializer
@@ -15,7 +17,7 @@ from apps.custom_auth.domain.entities.user import User
 
 class SaveFinalTopicOrderView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = FinalTopicOrderSerializer
+    serializer_class = FinalTopicOrderBallotSerializer
 
     def post(self, request, group_id):
         data = request.data
@@ -25,24 +27,33 @@ class SaveFinalTopicOrderView(generics.CreateAPIView):
         if not final_topic_orders:
             return Response({"error": "No topic order data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Delete existing records for this user and group
-        FinalTopicOrder.objects.filter(idGroup=group_id, idUser=user_id).delete()
+        Group = apps.get_model('custom_auth', 'Group')
+        try:
+            group = Group.objects.get(id=group_id)
+        except Group.DoesNotExist:
+            return Response({"error": "Group does not exist"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Save new records
-        for order in final_topic_orders:
-            order['idGroup'] = group_id
-            order['idUser'] = user_id
-            serializer = self.serializer_class(data=order)
-            if serializer.is_valid():
-                serializer.save()
-            else:
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.serializer_class(data=final_topic_orders, many=True)
+        if not serializer.is_valid():
+            return Response(next(error for error in serializer.errors if error), status=status.HTTP_400_BAD_REQUEST)
 
-        # Update or create UserPhase
-        UserPhase.objects.update_or_create(user_id=user_id, group_id=group_id, defaults={'phase': 2, 'completed_at': timezone.now()})
+        topic_ids = [order['idTopic'].id for order in serializer.validated_data]
+        if len(set(topic_ids)) != len(topic_ids):
+            return Response({"error": "Each topic can only appear once in the final order"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # La matriz se bloquea antes de leer la papeleta anterior: serializa los envíos del grupo
+            matrix = pairwise_matrix_service.lock(group_id)
+            # Upsert de la papeleta; la anterior se usa para aplicar solo la diferencia a la matriz por pares
+            previous, current = consensus_storage_service.save_final_topic_order(
+                group_id, user_id, serializer.validated_data
+            )
+            matrix = pairwise_matrix_service.apply_ballot(group_id, previous, current, matrix)
+
+            # Update or create UserPhase
+            UserPhase.objects.update_or_create(user_id=user_id, group_id=group_id, defaults={'phase': 2, 'completed_at': timezone.now()})
 
         # Send WebSocket notification
-        group = apps.get_model('custom_auth', 'Group').objects.get(id=group_id)
         message = f'{request.user.first_name} {request.user.last_name} ✔️ has completed the phase Two'
         user = User.objects.get(id=user_id)
 
@@ -72,5 +83,22 @@ class SaveFinalTopicOrderView(generics.CreateAPIView):
             }
         )
 
+        # Ranking provisional con las papeletas recibidas hasta ahora
+        provisional = pairwise_matrix_service.provisional_ranking(group, matrix)
+        if provisional is not None:
+            async_to_sync(channel_layer.group_send)(
+                f'phase2_group_{group_id}',
+                {
+                    'type': 'group_message',
+                    'message': {
+                        'type': 'provisional_ranking',
+                        'group_id': group_id,
+                        'voting_type': group.voting_type,
+                        'version': matrix.version,
+                        'results': provisional,
+                    }
+                }
+            )
+
         notification_serializer = NotificationPhaseTwoSerializer(notification, context={'request': request})
         return Response(notification_serializer.data, status=status.HTTP_201_CREATED)
@@ -8,6 +8,7 @@ from django.apps import apps
 from apps.concensus.domain.entities.topic import RecommendedTopic, Topic, TopicAddedUser
 from apps.concensus.domain.entities.final_topic_order import FinalTopicOrder
 from apps.concensus.domain.entities.notification import NotificationPhaseOne
+from apps.concensus.domain.services.consensus_cache import consensus_cache
 from apps.concensus.infrastructure.api.v1.serializers.final_topic_serializer import FinalTopicOrderSerializer
 from apps.concensus.infrastructure.api.v1.serializers.topic_serializer import RecommendedTopicSerializer, \
     TopicAddedUserSerializer, TopicSerializer
@@ -62,6 +63,8 @@ class RandomRecommendedTopicView(generics.ListAPIView):
         if group_id:
             for topic in response.data:
                 RecommendedTopic.objects.filter(id=topic['id']).update(group_id=group_id)
+            # update() no emite post_save
+            consensus_cache.invalidate(group_id)
         return response
 
 """ Devuelve los topics de un grupo por su id de grupo EN ORDEN ALFABÉTICO"""
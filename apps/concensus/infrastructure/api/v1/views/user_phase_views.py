@@ -2,6 +2,7 @@ import logging
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from apps.concensus.domain.entities.user_phase import UserPhase
+from apps.concensus.domain.services.consensus_cache import consensus_cache
 from apps.concensus.infrastructure.api.v1.serializers.user_phase_serializer import UserPhaseSerializer
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiRequest
 from django.utils import timezone
@@ -119,6 +120,8 @@ class UpdateGroupPhaseView(generics.GenericAPIView):
             return Response({'detail': 'No user phases found for this group.'}, status=status.HTTP_404_NOT_FOUND)
 
         user_phases.update(phase=phase, completed_at=timezone.now())
+        # update() no emite post_save
+        consensus_cache.invalidate(group.id)
 
         updated_user_phases = UserPhase.objects.filter(group=group)
         serializer = self.get_serializer(updated_user_phases, many=True)
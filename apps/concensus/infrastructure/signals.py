@@ -0,0 +1,50 @@
+"""
+Signals para el módulo de consenso - Invalidación de la cache de rankings
+"""
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.concensus.domain.entities.final_topic_order import FinalTopicOrder
+from apps.concensus.domain.entities.topic import RecommendedTopic
+from apps.concensus.domain.entities.user_expertice import UserExpertise
+from apps.concensus.domain.entities.user_phase import UserPhase
+from apps.concensus.domain.services.consensus_cache import consensus_cache
+from apps.custom_auth.domain.entities.group import Group
+
+# Modelo -> atributo con el id del grupo afectado
+_GROUP_FIELDS = {
+    FinalTopicOrder: 'idGroup_id',
+    UserExpertise: 'group_id',
+    RecommendedTopic: 'group_id',
+    UserPhase: 'group_id',
+    Group.users.through: 'group_id',
+}
+
+
+def invalidate_consensus_cache(sender, instance, **kwargs):
+    """
+    Cualquier cambio en los datos de entrada del consenso renueva el estado del grupo
+    """
+    consensus_cache.invalidate(getattr(instance, _GROUP_FIELDS[sender]))
+
+
+for model in _GROUP_FIELDS:
+    post_save.connect(invalidate_consensus_cache, sender=model, dispatch_uid=f'consensus_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_consensus_cache, sender=model, dispatch_uid=f'consensus_cache_delete_{model.__name__}')
+
+
+@receiver(m2m_changed, sender=Group.users.through)
+def handle_group_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    group.users.add/remove no emite post_save del modelo intermedio
+    """
+    # En clear se usa pre_clear: después ya no se sabe qué grupos tenía el usuario
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        consensus_cache.invalidate(instance.pk)
+    else:
+        # user.member_groups.add(...): pk_set son ids de grupos (None en pre_clear)
+        group_ids = pk_set if pk_set is not None else instance.member_groups.values_list('id', flat=True)
+        for group_id in group_ids:
+            consensus_cache.invalidate(group_id)
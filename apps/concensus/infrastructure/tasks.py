@@ -0,0 +1,17 @@
+"""
+Trabajos en segundo plano del módulo de consenso
+"""
+import logging
+
+from apps.concensus.domain.services.chat_buffer_service import FLUSH_TASK, chat_buffer_service
+from apps.shared.infrastructure.task_queue import register_task
+
+logger = logging.getLogger(__name__)
+
+
+@register_task(FLUSH_TASK)
+def flush_chat_messages(debate_id: str) -> bool:
+    """
+    Vuelca a la base de datos los mensajes del chat de un debate acumulados en Redis
+    """
+    return chat_buffer_service.flush(debate_id)
@@ -0,0 +1,106 @@
+"""
+Management command para medir el tiempo y la memoria de los métodos de votación
+sobre grupos sintéticos
+"""
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.concensus.domain.entities.topic import RecommendedTopic
+from apps.concensus.domain.services.consensus_data_service import ConsensusData
+from apps.concensus.domain.services.voting_methods import get_voting_method_by_slug, voting_methods
+
+
+def build_synthetic_data(users: int, topics: int, missing: float, rng: np.random.Generator) -> ConsensusData:
+    """
+    Grupo sintético: cada usuario ordena los tópicos con una permutación aleatoria
+    y asigna expertise entre 1 y 5; una fracción `missing` de posiciones queda vacía
+    """
+    recommended = [RecommendedTopic(id=i, topic_name=f'Topic {i:04d}') for i in range(topics)]
+    data = ConsensusData(recommended, [f'user{u:05d}' for u in range(users)])
+    if users and topics:
+        data.positions = np.argsort(rng.random((users, topics)), axis=1).astype(float) + 1
+        data.positions[rng.random((users, topics)) < missing] = np.nan
+        data.expertise = rng.integers(1, 6, size=(users, topics))
+    return data
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo y memoria de cada método de votación con grupos sintéticos de N usuarios y T tópicos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            nargs='+',
+            default=[10, 50, 200],
+            help='Tamaños de grupo a probar (default: 10 50 200)',
+        )
+        parser.add_argument(
+            '--topics',
+            type=int,
+            nargs='+',
+            default=[5, 10, 20, 50, 100],
+            help='Número de tópicos a probar (default: 5 10 20 50 100)',
+        )
+        parser.add_argument(
+            '--methods',
+            nargs='+',
+            help='Slugs de los métodos a medir (default: todos los registrados)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Ejecuciones por caso; se reporta la más rápida (default: 3)',
+        )
+        parser.add_argument(
+            '--missing',
+            type=float,
+            default=0.0,
+            help='Fracción de posiciones sin asignar (default: 0)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Semilla del generador de datos (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        if options['methods']:
+            methods = []
+            for slug in options['methods']:
+                method = get_voting_method_by_slug(slug)
+                if method is None:
+                    available = ', '.join(m.slug for m in voting_methods())
+                    raise CommandError(f'Método desconocido: {slug} (disponibles: {available})')
+                methods.append(method)
+        else:
+            methods = voting_methods()
+
+        rng = np.random.default_rng(options['seed'])
+        repeat = max(1, options['repeat'])
+
+        self.stdout.write(f"{'método':<24}{'usuarios':>10}{'tópicos':>10}{'tiempo (ms)':>14}{'memoria pico (KiB)':>20}")
+        for users in options['users']:
+            for topics in options['topics']:
+                data = build_synthetic_data(users, topics, options['missing'], rng)
+                for method in methods:
+                    elapsed = float('inf')
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        method.rank(data)
+                        elapsed = min(elapsed, time.perf_counter() - start)
+
+                    # La memoria se mide en una ejecución aparte para no alterar el tiempo
+                    tracemalloc.start()
+                    method.rank(data)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    self.stdout.write(
+                        f'{method.slug:<24}{users:>10}{topics:>10}{elapsed * 1000:>14.2f}{peak / 1024:>20.1f}'
+                    )
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CustomAuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.custom_auth'
+    
+    def ready(self):
+        """
+        Importa los signals y los trabajos en segundo plano cuando la app está lista
+        """
+        import apps.custom_auth.infrastructure.signals
+        import apps.custom_auth.infrastructure.tasks
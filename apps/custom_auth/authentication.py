@@ -1,7 +1,7 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth.models import AnonymousUser
-from apps.custom_auth.models import User, Company
+from apps.custom_auth.domain.services.principal_cache import principal_cache
 
 
 class DualUserJWTAuthentication(JWTAuthentication):
@@ -25,31 +25,14 @@ class DualUserJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
         """
         Obtiene el usuario o empresa basándose en el token validado.
+        El principal sale de la cache (ver principal_cache) y el modelo
+        completo solo se carga si la vista lo necesita.
         """
         try:
-            # Verificar si el token contiene company_id (empresa)
-            if 'company_id' in validated_token:
-                company_id = validated_token['company_id']
-                try:
-                    company = Company.objects.get(id=company_id)
-                    if company.is_active:
-                        return company
-                except Company.DoesNotExist:
-                    pass
-            
-            # Verificar si el token contiene user_id (investigador)
-            elif 'user_id' in validated_token:
-                user_id = validated_token['user_id']
-                try:
-                    user = User.objects.get(id=user_id)
-                    if user.is_active:
-                        return user
-                except User.DoesNotExist:
-                    pass
-            
-            # Si no se encuentra ni usuario ni empresa, devolver usuario anónimo
-            return AnonymousUser()
-            
+            user = principal_cache.get_user(validated_token)
+            # Si no se encuentra ni usuario ni empresa activos, devolver usuario anónimo
+            return user if user is not None else AnonymousUser()
+
         except (KeyError, ValueError):
             # Si hay algún error en el formato del token
             return AnonymousUser()
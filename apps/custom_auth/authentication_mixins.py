@@ -2,7 +2,7 @@ from rest_framework.authentication import BaseAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth.models import AnonymousUser
-from apps.custom_auth.models import User, Company
+from apps.custom_auth.domain.services.principal_cache import principal_cache
 
 
 class OptionalJWTAuthentication(JWTAuthentication):
@@ -26,32 +26,15 @@ class OptionalJWTAuthentication(JWTAuthentication):
         Obtiene el usuario o empresa basándose en el token validado.
         """
         try:
-            # Verificar si el token contiene company_id (empresa)
-            if 'company_id' in validated_token:
-                company_id = validated_token['company_id']
-                try:
-                    company = Company.objects.get(id=company_id)
-                    if company.is_active:
-                        return company
-                except Company.DoesNotExist:
-                    pass
-            
-            # Verificar si el token contiene user_id (investigador)
-            elif 'user_id' in validated_token:
-                user_id = validated_token['user_id']
-                try:
-                    user = User.objects.get(id=user_id)
-                    if user.is_active:
-                        return user
-                except User.DoesNotExist:
-                    pass
-            
-            # Si no se encuentra ni usuario ni empresa, lanzar excepción
-            raise InvalidToken('No valid user found')
-            
+            user = principal_cache.get_user(validated_token)
         except (KeyError, ValueError):
             raise InvalidToken('Invalid token format')
 
+        # Si no se encuentra ni usuario ni empresa, lanzar excepción
+        if user is None:
+            raise InvalidToken('No valid user found')
+        return user
+
 
 class NoAuthenticationRequired(BaseAuthentication):
     """
@@ -1,5 +1,10 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
+
+from apps.shared.infrastructure.vector_queryset import DeferVectorsMixin, VectorQuerySet
 import uuid
 import string
 import random
@@ -17,7 +22,7 @@ def get_company_logo_filepath(instance, filename):
     return f'company_logos/{filename}'
 
 
-class CompanyManager(BaseUserManager):
+class CompanyManager(DeferVectorsMixin, BaseUserManager.from_queryset(VectorQuerySet)):
     def create_user(self, username, password=None, **extra_fields):
         """Crea y retorna una empresa con el email y password dados."""
         if not username:
@@ -106,6 +111,14 @@ class Company(AbstractBaseUser, PermissionsMixin):
     
     # Verificación de empresa
     is_verified = models.BooleanField(default=False, verbose_name="Empresa Verificada")
+
+    # Nombre para la búsqueda de ofertas: peso D, por debajo de los campos de la oferta
+    search_vector = models.GeneratedField(
+        expression=SearchVector('company_name', config='simple', weight='D'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Vector de búsqueda del nombre"
+    )
     
     # Solucionando conflictos con User
     groups = models.ManyToManyField(
@@ -155,3 +168,8 @@ class Company(AbstractBaseUser, PermissionsMixin):
         db_table = 'companies'
         verbose_name = 'Empresa'
         verbose_name_plural = 'Empresas'
+        indexes = [
+            GinIndex(name='companies_search_gin', fields=['search_vector']),
+            # Trigramas para company_name__icontains y el autocompletado de empresas
+            GinIndex(OpClass(Upper('company_name'), name='gin_trgm_ops'), name='companies_name_trgm'),
+        ]
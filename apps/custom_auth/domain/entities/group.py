@@ -11,6 +11,10 @@ class Group(models.Model):
     class VotingType(models.TextChoices):
         POSITIONAL = 'Positional Voting'
         NONPOSITIONAL = 'Non-Positional Voting'
+        BORDA = 'Borda Count'
+        COPELAND = 'Copeland'
+        KEMENY = 'Kemeny-Young'
+        RANKED_PAIRS = 'Ranked Pairs'
         
     id = models.CharField(max_length=10, primary_key=True, default=generate_unique_id, editable=False)
     title = models.CharField(max_length=255)
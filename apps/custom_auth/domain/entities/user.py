@@ -1,7 +1,9 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 from django.conf import settings
-from pgvector.django import VectorField
+from pgvector.django import VectorField, HnswIndex
+
+from apps.shared.infrastructure.vector_queryset import DeferVectorsMixin, VectorQuerySet
 import os
 import uuid
 import string
@@ -20,7 +22,7 @@ def get_profile_picture_filepath(instance, filename):
     return os.path.join('profile_pictures/', filename)
 
 
-class UserManager(BaseUserManager):
+class UserManager(DeferVectorsMixin, BaseUserManager.from_queryset(VectorQuerySet)):
     def create_user(self, username, password=None, **extra_fields):
         """Crea y retorna un usuario regular con el username y password dados."""
         if not username:
@@ -131,7 +133,14 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         db_table = 'users'
+        # Los accesos por relación (post.author) tampoco cargan los vectores
+        base_manager_name = 'objects'
         constraints = [
             models.UniqueConstraint(fields=[
                                     'scopus_id'], name='unique_scopus_id', condition=models.Q(scopus_id__isnull=False))
+        ]
+        indexes = [
+            # Índices ANN para el operador <#> (producto interno) de las consultas de similitud
+            HnswIndex(name='users_job_embedding_hnsw', fields=['job_recommendations_embedding'], m=16, ef_construction=64, opclasses=['vector_ip_ops']),
+            HnswIndex(name='users_feed_embedding_hnsw', fields=['feed_recommendations_embedding'], m=16, ef_construction=64, opclasses=['vector_ip_ops']),
         ]
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Cache del principal autenticado (usuario o empresa) por sujeto del token JWT
+
+Autenticar una petición o una conexión WebSocket cargaba la fila completa de
+User o Company, incluidos los dos vectores de 768 dimensiones del usuario. La
+mayoría de las vistas solo usan el id, el username o los flags de estado, así
+que se guarda en Redis una instantánea mínima (Principal) durante
+AUTH_PRINCIPAL_CACHE_TTL segundos y request.user es un PrincipalUser que
+responde esos campos desde la instantánea. El modelo completo, sin los
+vectores, se carga solo si el código necesita algo más (guardar, relaciones,
+otros campos).
+
+Los signals de custom_auth borran la entrada cuando se guarda o elimina el
+usuario o la empresa, de modo que una desactivación tiene efecto en la
+siguiente petición; el TTL acota cualquier carrera con una lectura concurrente.
+"""
+import json
+import logging
+from typing import Optional
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject, empty
+
+from apps.custom_auth.domain.entities.company import Company
+from apps.custom_auth.domain.entities.user import User
+from apps.shared.infrastructure.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY = 'auth:principal:{kind}:{id}'
+
+USER = 'user'
+COMPANY = 'company'
+
+# Campos de la instantánea según el tipo de principal
+SNAPSHOT_FIELDS = {
+    USER: ('id', 'is_active', 'is_staff', 'username', 'first_name', 'last_name'),
+    COMPANY: ('id', 'is_active', 'is_staff', 'username', 'company_name'),
+}
+MODELS = {USER: User, COMPANY: Company}
+
+# Atributos que el ORM consulta con hasattr() sobre los valores de un filtro
+# (filter(user=request.user)); un modelo no los tiene, así que no cargarlo
+EXPRESSION_PROTOCOL = frozenset({
+    'resolve_expression', 'get_source_expressions', '_prepare', 'as_sql', 'get_compiler',
+})
+
+
+class Principal:
+    """
+    Instantánea mínima de un usuario o empresa autenticado
+    """
+    __slots__ = ('kind', 'id', 'is_active', 'is_staff', 'username', 'first_name', 'last_name', 'company_name')
+
+    def __init__(self, kind, id, is_active=True, is_staff=False, username=None,
+                 first_name=None, last_name=None, company_name=None):
+        self.kind = kind
+        self.id = id
+        self.is_active = is_active
+        self.is_staff = is_staff
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+        self.company_name = company_name
+
+    def to_json(self) -> str:
+        return json.dumps({field: getattr(self, field) for field in self.__slots__})
+
+    @classmethod
+    def from_json(cls, raw) -> 'Principal':
+        return cls(**json.loads(raw))
+
+
+class PrincipalUser(SimpleLazyObject):
+    """
+    request.user / scope['user'] respaldado por un Principal
+
+    Los campos de la instantánea, pk, is_authenticated y las comprobaciones de
+    tipo (isinstance, hasattr(user, 'company_name')) no tocan la base de
+    datos, tampoco usarlo como valor de un filtro del ORM; cualquier otro
+    atributo carga el modelo la primera vez.
+    """
+
+    def __init__(self, principal: Principal):
+        self.__dict__['_principal'] = principal
+        super().__init__(lambda: load_model(principal))
+
+    @property
+    def __class__(self):
+        return MODELS[self._principal.kind]
+
+    def __getattr__(self, name):
+        principal = self.__dict__['_principal']
+        wrapped = self.__dict__.get('_wrapped', empty)
+        # Una vez cargado el modelo, sus valores (quizá modificados) prevalecen
+        if wrapped is not empty:
+            return getattr(wrapped, name)
+        if name in SNAPSHOT_FIELDS[principal.kind]:
+            return getattr(principal, name)
+        if name == 'pk':
+            return principal.id
+        if name == 'is_authenticated':
+            return True
+        if name == 'is_anonymous':
+            return False
+        if name == '_meta':
+            return MODELS[principal.kind]._meta
+        if name in EXPRESSION_PROTOCOL:
+            raise AttributeError(name)
+        if any(name in fields for kind, fields in SNAPSHOT_FIELDS.items() if kind != principal.kind):
+            raise AttributeError(name)
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return getattr(other, '__class__', None) is self.__class__ and getattr(other, 'pk', None) == self._principal.id
+
+    def __hash__(self):
+        # Igual que Model.__hash__
+        return hash(self._principal.id)
+
+
+def load_model(principal: Principal):
+    """
+    Carga el usuario o empresa completo; el manager de User difiere las columnas vectoriales
+    """
+    return MODELS[principal.kind].objects.get(id=principal.id)
+
+
+class PrincipalCache:
+    """
+    Instantáneas de principales en Redis con TTL corto
+    """
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl or settings.AUTH_PRINCIPAL_CACHE_TTL
+
+    @staticmethod
+    def _key(kind, principal_id) -> str:
+        return PRINCIPAL_KEY.format(kind=kind, id=principal_id)
+
+    @staticmethod
+    def _load(kind, principal_id) -> Optional[Principal]:
+        row = MODELS[kind].objects.filter(id=principal_id).values(*SNAPSHOT_FIELDS[kind]).first()
+        return Principal(kind=kind, **row) if row else None
+
+    def get(self, kind, principal_id) -> Optional[Principal]:
+        """
+        Principal del sujeto del token, desde Redis o desde la base de datos
+
+        Returns:
+            None si el usuario o la empresa no existe
+        """
+        key = self._key(kind, principal_id)
+        try:
+            raw = get_redis().get(key)
+            if raw:
+                return Principal.from_json(raw)
+        except redis.RedisError as e:
+            logger.warning(f"Cache de principales no disponible para {key}: {str(e)}")
+            return self._load(kind, principal_id)
+
+        principal = self._load(kind, principal_id)
+        if principal is not None:
+            try:
+                get_redis().set(key, principal.to_json(), ex=self.ttl)
+            except redis.RedisError as e:
+                logger.warning(f"No se pudo guardar el principal {key}: {str(e)}")
+        return principal
+
+    async def aget(self, kind, principal_id) -> Optional[Principal]:
+        """
+        Versión asíncrona de get para el middleware de WebSocket
+        """
+        key = self._key(kind, principal_id)
+        try:
+            raw = await get_async_redis().get(key)
+            if raw:
+                return Principal.from_json(raw)
+        except redis.RedisError as e:
+            logger.warning(f"Cache de principales no disponible para {key}: {str(e)}")
+            return await sync_to_async(self._load)(kind, principal_id)
+
+        principal = await sync_to_async(self._load)(kind, principal_id)
+        if principal is not None:
+            try:
+                await get_async_redis().set(key, principal.to_json(), ex=self.ttl)
+            except redis.RedisError as e:
+                logger.warning(f"No se pudo guardar el principal {key}: {str(e)}")
+        return principal
+
+    def get_user(self, validated_token):
+        """
+        PrincipalUser activo del token (company_id o user_id), o None
+        """
+        if 'company_id' in validated_token:
+            principal = self.get(COMPANY, validated_token['company_id'])
+        elif 'user_id' in validated_token:
+            principal = self.get(USER, validated_token['user_id'])
+        else:
+            return None
+        return PrincipalUser(principal) if principal is not None and principal.is_active else None
+
+    def invalidate(self, kind, principal_id):
+        """
+        Borra la instantánea cuando se confirma la transacción en curso
+        """
+        key = self._key(kind, principal_id)
+
+        def delete():
+            try:
+                get_redis().delete(key)
+            except redis.RedisError as e:
+                logger.error(f"No se pudo invalidar el principal {key}: {str(e)}")
+
+        transaction.on_commit(delete)
+
+
+# Instancia global de la cache
+principal_cache = PrincipalCache()
@@ -1,12 +1,16 @@
 """
 Servicio para manejo de vectores de usuario y recomendaciones personalizadas
 """
-import requests
 import logging
 from typing import List, Optional, Dict, Any
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+
+from apps.shared.domain.services.embedding_client import get_embedding_client
+from apps.shared.domain.services.vector_search import VectorParam, vector_search_planner, vector_similarity
+from apps.shared.infrastructure.task_queue import task_queue
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -19,6 +23,7 @@ class UserVectorService:
     
     def __init__(self, embedding_service_url: str = None):
         self.embedding_service_url = embedding_service_url or settings.EMBEDDING_SERVICE_URL
+        self.embedding_client = get_embedding_client(self.embedding_service_url)
     
     def get_embedding_from_microservice(self, text: str) -> Optional[List[float]]:
         """
@@ -30,40 +35,7 @@ class UserVectorService:
         Returns:
             Vector embedding o None si hay error
         """
-        try:
-            payload = {
-                "text": text,
-                "translate_to_english": True,
-                "clean_text": True
-            }
-            
-            response = requests.post(
-                f"{self.embedding_service_url}/text-processing/vectorize/",
-                json=payload,
-                timeout=30,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                vector = result.get('vector')
-                
-                if vector:
-                    logger.info(f"Embedding de usuario generado. Dimensiones: {result.get('dimension', len(vector))}")
-                    return vector
-                else:
-                    logger.error("El microservicio no devolvió un vector válido")
-                    return None
-            else:
-                logger.error(f"Error al obtener embedding: {response.status_code} - {response.text}")
-                return None
-                
-        except requests.RequestException as e:
-            logger.error(f"Error de conexión con microservicio: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Error inesperado: {str(e)}")
-            return None
+        return self.embedding_client.embed(text)
     
     def generate_user_job_profile_text(self, user) -> str:
         """
@@ -192,6 +164,9 @@ class UserVectorService:
                 user.profile_vector_updated_at = timezone.now()
                 user.save(update_fields=['feed_recommendations_embedding', 'profile_vector_updated_at'])
                 
+                # El timeline materializado se puntuó con el vector anterior
+                task_queue.enqueue('feeds.rebuild_timeline', str(user_id), user_id=str(user_id))
+                
                 logger.info(f"Embedding de feed actualizado para usuario {user_id}")
                 return True
             else:
@@ -205,6 +180,23 @@ class UserVectorService:
             logger.error(f"Error actualizando embedding de feed para usuario {user_id}: {str(e)}")
             return False
     
+    def refresh_user_vectors(self, user_id: int) -> bool:
+        """
+        Regenera los embeddings de jobs y de feed del usuario
+        
+        Returns:
+            True si se actualizó al menos uno de los dos vectores
+        """
+        job_success = self.update_user_job_embedding(user_id)
+        feed_success = self.update_user_feed_embedding(user_id)
+        
+        if job_success or feed_success:
+            logger.info(f"Vectores actualizados para usuario {user_id}")
+            return True
+        
+        logger.warning(f"No se pudieron actualizar vectores para usuario {user_id}")
+        return False
+    
     def update_user_vectors_on_interaction(self, user_id: int, interaction_type: str, content: str = None):
         """
         Actualiza los vectores del usuario cuando interactúa con contenido
@@ -216,7 +208,13 @@ class UserVectorService:
             content: Contenido con el que interactuó (opcional)
         """
         try:
-            user = User.objects.get(id=user_id)
+            # Solo el contador y si faltan vectores: los embeddings no viajan en cada interacción
+            user = User.objects.filter(id=user_id).only('id', 'interaction_count').annotate(
+                missing_vectors=ExpressionWrapper(
+                    Q(job_recommendations_embedding__isnull=True) | Q(feed_recommendations_embedding__isnull=True),
+                    output_field=BooleanField()
+                )
+            ).get()
             
             # Incrementar contador de interacciones
             user.interaction_count += 1
@@ -225,53 +223,51 @@ class UserVectorService:
             should_update = (
                 user.interaction_count % 10 == 0 or 
                 interaction_type in ['comment', 'post_created'] or
-                user.job_recommendations_embedding is None or
-                user.feed_recommendations_embedding is None
+                user.missing_vectors
             )
             
-            if should_update:
-                logger.info(f"Actualizando vectores de usuario {user_id} tras {user.interaction_count} interacciones")
-                
-                # Actualizar ambos embeddings
-                job_success = self.update_user_job_embedding(user_id)
-                feed_success = self.update_user_feed_embedding(user_id)
-                
-                if job_success or feed_success:
-                    logger.info(f"Vectores actualizados para usuario {user_id}")
-                else:
-                    logger.warning(f"No se pudieron actualizar vectores para usuario {user_id}")
+            # Guardar contador sin releer la fila (User.save la vuelve a cargar)
+            User.objects.filter(id=user_id).update(interaction_count=F('interaction_count') + 1)
             
-            # Guardar contador
-            user.save(update_fields=['interaction_count'])
+            if should_update:
+                logger.info(f"Encolando actualización de vectores de usuario {user_id} tras {user.interaction_count} interacciones")
+                # Las interacciones seguidas del mismo usuario se agrupan en un único trabajo
+                task_queue.enqueue('custom_auth.refresh_user_vectors', str(user_id), user_id=str(user_id))
             
         except User.DoesNotExist:
             logger.error(f"Usuario {user_id} no encontrado")
         except Exception as e:
             logger.error(f"Error actualizando vectores en interacción: {str(e)}")
     
-    def get_users_for_job_recommendations(self, job_embedding: List[float], limit: int = 10) -> List:
+    def get_users_for_job_recommendations(self, job_embedding: List[float], limit: int = 10,
+                                          ef_search: int = None, probes: int = None) -> List:
         """
         Encuentra usuarios similares a un job específico para notificaciones
         
         Args:
             job_embedding: Vector del job
             limit: Número de usuarios a retornar
+            ef_search: Recall del índice HNSW para esta consulta
+            probes: Recall del índice IVFFlat para esta consulta
             
         Returns:
             Lista de usuarios ordenados por similitud
         """
-        from django.db.models.expressions import RawSQL
-        
-        if not job_embedding:
+        if job_embedding is None or len(job_embedding) == 0:
             return []
         
-        embedding_str = '[' + ','.join(map(str, job_embedding)) + ']'
-        similarity_sql = f"(1 - (job_recommendations_embedding <#> '{embedding_str}'))"
+        query_vector = VectorParam(job_embedding)
+        
+        # Candidatos del índice ANN sobre los vectores de jobs de los usuarios
+        candidate_ids = vector_search_planner.nearest_ids(
+            User.objects.all(), 'job_recommendations_embedding', query_vector,
+            k=limit, ef_search=ef_search, probes=probes
+        )
         
         users = User.objects.filter(
-            job_recommendations_embedding__isnull=False
+            id__in=candidate_ids
         ).annotate(
-            similarity=RawSQL(similarity_sql, [])
+            similarity=vector_similarity('job_recommendations_embedding', query_vector)
         ).filter(
             similarity__gte=0.7  # Umbral de similitud
         ).order_by('-similarity')[:limit]
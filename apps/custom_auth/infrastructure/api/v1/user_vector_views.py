@@ -5,6 +5,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from apps.custom_auth.domain.entities.user import User
 from apps.custom_auth.domain.services.user_vector_service import user_vector_service
 
 
@@ -131,7 +132,8 @@ def get_user_embedding_status(request):
     Obtiene el estado de los embeddings del usuario
     """
     try:
-        user = request.user
+        # request.user no carga los vectores
+        user = User.objects.with_vectors().get(id=request.user.id)
         
         return Response({
             'user_id': user.id,
@@ -0,0 +1,38 @@
+"""
+Signals para el módulo de autenticación - Invalidación de la cache de principales
+"""
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.custom_auth.domain.entities.company import Company
+from apps.custom_auth.domain.entities.user import User
+from apps.custom_auth.domain.services.principal_cache import COMPANY, SNAPSHOT_FIELDS, USER, principal_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _invalidate(kind, instance, update_fields=None):
+    # Guardados parciales que no tocan la instantánea (p. ej. los vectores) no la invalidan
+    if update_fields and not set(update_fields) & set(SNAPSHOT_FIELDS[kind]):
+        return
+    principal_cache.invalidate(kind, instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, update_fields=None, **kwargs):
+    """
+    Una edición o desactivación del usuario debe verse en la siguiente petición
+    """
+    _invalidate(USER, instance, update_fields)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_principal(sender, instance, update_fields=None, **kwargs):
+    """
+    Una edición o desactivación de la empresa debe verse en la siguiente petición
+    """
+    _invalidate(COMPANY, instance, update_fields)
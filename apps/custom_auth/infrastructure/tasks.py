@@ -0,0 +1,23 @@
+"""
+Trabajos en segundo plano del módulo de usuarios
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+
+from apps.custom_auth.domain.services.user_vector_service import user_vector_service
+from apps.shared.infrastructure.task_queue import register_task
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+@register_task('custom_auth.refresh_user_vectors')
+def refresh_user_vectors(user_id: str) -> bool:
+    """
+    Regenera los vectores de recomendación del usuario
+    """
+    if not User.objects.filter(id=user_id).exists():
+        logger.info(f"Usuario {user_id} eliminado antes de actualizar sus vectores")
+        return True
+    return user_vector_service.refresh_user_vectors(user_id)
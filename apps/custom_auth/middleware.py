@@ -3,9 +3,7 @@ from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import UntypedToken
 from jwt import decode as jwt_decode, ExpiredSignatureError, InvalidTokenError
 from django.conf import settings
-from asgiref.sync import sync_to_async
-from apps.custom_auth.domain.entities.user import User
-from apps.custom_auth.domain.entities.company import Company
+from apps.custom_auth.domain.services.principal_cache import COMPANY, USER, PrincipalUser, principal_cache
 
 class JwtAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
@@ -26,13 +24,16 @@ class JwtAuthMiddleware(BaseMiddleware):
                 # Decodificar el token y obtener el usuario
                 payload = jwt_decode(token, settings.SECRET_KEY, algorithms=["HS256"])
                 
-                # Determinar si es un usuario o una empresa
+                # Determinar si es un usuario o una empresa; el principal sale de la cache
                 if 'user_id' in payload:
-                    user = await sync_to_async(User.objects.get)(id=payload['user_id'])
-                    scope['user'] = user
+                    principal = await principal_cache.aget(USER, payload['user_id'])
                 elif 'company_id' in payload:
-                    company = await sync_to_async(Company.objects.get)(id=payload['company_id'])
-                    scope['user'] = company
+                    principal = await principal_cache.aget(COMPANY, payload['company_id'])
+                else:
+                    principal = None
+
+                if principal is not None and principal.is_active:
+                    scope['user'] = PrincipalUser(principal)
                 else:
                     scope['user'] = AnonymousUser()
             else:
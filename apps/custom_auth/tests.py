@@ -1,3 +1,35 @@
-#from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from apps.custom_auth.domain.services import principal_cache
+from apps.custom_auth.domain.services.principal_cache import COMPANY, USER, Principal, PrincipalUser
+from apps.feeds.domain.entities.like import Like
+from apps.feeds.domain.entities.poll import PollVote
+from apps.jobs.domain.entities.postulants import Postulants
+
+
+class PrincipalUserFilterTests(SimpleTestCase):
+    """
+    Usar request.user como valor de un filtro resuelve el id desde la
+    instantánea, sin cargar el modelo completo
+    """
+
+    def setUp(self):
+        patcher = mock.patch.object(principal_cache, 'load_model', side_effect=AssertionError('load_model'))
+        self.load_model = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_filter_by_user(self):
+        user = PrincipalUser(Principal(kind=USER, id=7, username='ana@example.com'))
+        self.assertIn('"user_id" = 7', str(PollVote.objects.filter(user=user).query))
+        self.assertIn('"user_id" = 7', str(PollVote.objects.exclude(user=user).query))
+        self.assertIn('"user_id" IN (7)', str(Like.objects.filter(user__in=[user]).query))
+        self.assertIn('"user_id" = 7', str(Postulants.objects.filter(user=user).select_related('job').query))
+        self.load_model.assert_not_called()
+
+    def test_filter_by_company(self):
+        company = PrincipalUser(Principal(kind=COMPANY, id=3, company_name='Empresa'))
+        queryset = Postulants.objects.filter(job__company=company)
+        self.assertIn('"company_id" = 3', str(queryset.query))
+        self.load_model.assert_not_called()
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class FeedsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.feeds'
+    
+    def ready(self):
+        """
+        Registra los trabajos en segundo plano cuando la app está lista
+        """
+        import apps.feeds.infrastructure.tasks
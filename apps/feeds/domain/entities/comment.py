@@ -5,6 +5,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 import uuid
 
+from apps.shared.infrastructure.vector_queryset import VectorManager
+
 User = get_user_model()
 
 
@@ -55,6 +57,9 @@ class Comment(models.Model):
     
     # Metadatos
     metadata = models.JSONField(default=dict, blank=True, verbose_name="Metadatos adicionales")
+
+    # select_related('author', 'post') no trae los vectores del autor ni del post
+    objects = VectorManager()
     
     class Meta:
         verbose_name = "Comentario"
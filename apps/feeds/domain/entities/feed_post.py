@@ -3,13 +3,21 @@ Modelo para los posts del feed social
 """
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Cast, Length
 from django.utils import timezone
-from pgvector.django import VectorField
+from pgvector.django import VectorField, HnswIndex
 import uuid
 import math
 
+from apps.shared.infrastructure.vector_queryset import VectorManager
+
 User = get_user_model()
 
+# Configuración de texto del contenido; los tags se indexan con 'simple' (sin stemming)
+SEARCH_CONFIG = 'spanish'
+
 
 def get_post_file_path(instance, filename):
     """Genera ruta para archivos de posts"""
@@ -28,6 +36,7 @@ class FeedPost(models.Model):
     
     # Vector embedding para recomendaciones (768 dimensiones)
     embedding = VectorField(dimensions=768, null=True, blank=True, verbose_name="Vector de embedding para recomendaciones")
+    embedding_pending = models.BooleanField(default=False, verbose_name="Embedding pendiente de generar")
     
     # Métricas de interacción
     likes_count = models.IntegerField(default=0, verbose_name="Número de likes")
@@ -53,15 +62,42 @@ class FeedPost(models.Model):
     tags = models.JSONField(default=list, blank=True, verbose_name="Tags del post")
     metadata = models.JSONField(default=dict, blank=True, verbose_name="Metadatos adicionales")
     
+    # Columnas calculadas por Postgres para la búsqueda híbrida
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('content', config=SEARCH_CONFIG, weight='A') +
+            SearchVector(Cast('tags', models.TextField()), config='simple', weight='B')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Vector de búsqueda de texto completo"
+    )
+    content_length = models.GeneratedField(
+        expression=Length('content'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        verbose_name="Longitud del contenido"
+    )
+
+    # No carga el vector del post ni los del autor salvo con with_vectors(); el tsvector nunca
+    objects = VectorManager()
+    
     class Meta:
         verbose_name = "Post del Feed"
         verbose_name_plural = "Posts del Feed"
         ordering = ['-created_at']
+        base_manager_name = 'objects'
         indexes = [
-            models.Index(fields=['-created_at']),
+            # El id desempata la paginación keyset por fecha
+            models.Index(fields=['-created_at', '-id']),
             models.Index(fields=['-engagement_score']),
-            models.Index(fields=['author', '-created_at']),
-            models.Index(fields=['-engagement_score', '-created_at'], name='trending_idx'),
+            models.Index(fields=['author', '-created_at', '-id']),
+            # Feed trending: recorrido keyset de los posts públicos por engagement_score
+            models.Index(fields=['-engagement_score', '-id'], name='trending_idx', condition=models.Q(is_public=True)),
+            # Índice ANN para el operador <#> (producto interno) de las consultas de similitud
+            HnswIndex(name='feed_post_embedding_hnsw', fields=['embedding'], m=16, ef_construction=64, opclasses=['vector_ip_ops']),
+            # Índice de texto completo para el operador @@ de la búsqueda léxica
+            GinIndex(name='feed_post_search_gin', fields=['search_vector']),
         ]
     
     def __str__(self):
@@ -2,11 +2,15 @@
 Modelo para likes en posts y comentarios del feed
 """
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 import uuid
 
+from apps.shared.infrastructure.vector_queryset import VectorManager
+
 User = get_user_model()
 
 
@@ -32,6 +36,9 @@ class Like(models.Model):
     
     # Timestamp
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de like")
+
+    # select_related('user') no trae los vectores del usuario
+    objects = VectorManager()
     
     class Meta:
         verbose_name = "Like"
@@ -71,28 +78,69 @@ class Like(models.Model):
             like = None
         
         # Actualizar el contador en el objeto target
-        cls._update_likes_count(target_object)
+        cls._update_likes_count(target_object, 1 if created else -1)
         
         return like, created
     
     @classmethod
-    def _update_likes_count(cls, target_object):
+    def remove_like(cls, user, target_object):
         """
-        Actualiza el contador de likes en el objeto target
+        Elimina el like de un usuario en un objeto si existe
+        
+        Returns:
+            bool: True si había un like y se eliminó
         """
         content_type = ContentType.objects.get_for_model(target_object)
         
-        likes_count = cls.objects.filter(
+        deleted, _ = cls.objects.filter(
+            user=user,
             content_type=content_type,
             object_id=target_object.id
-        ).count()
+        ).delete()
+        
+        if deleted:
+            cls._update_likes_count(target_object, -1)
         
-        target_object.likes_count = likes_count
-        target_object.save(update_fields=['likes_count'])
+        return bool(deleted)
+    
+    @classmethod
+    def _update_likes_count(cls, target_object, delta):
+        """
+        Aplica el cambio de un like al contador del objeto target sin recontar la tabla
         
-        # Si es un post, también actualizar engagement_score
+        En los posts el contador se acumula en Redis y se vuelca por lotes junto
+        con el engagement_score; en los comentarios se actualiza con F().
+        """
         if hasattr(target_object, 'update_engagement_score'):
-            target_object.update_engagement_score()
+            from apps.feeds.domain.services.counter_service import post_counter_service
+            
+            pending = post_counter_service.increment(target_object.id, 'likes', delta)
+            # Valor mostrado en la respuesta: el de la base de datos más los deltas pendientes
+            target_object.likes_count = max(0, target_object.likes_count + pending)
+            return
+        
+        type(target_object).objects.filter(pk=target_object.pk).update(
+            likes_count=Greatest(F('likes_count') + delta, 0)
+        )
+        target_object.likes_count = max(0, target_object.likes_count + delta)
+    
+    @classmethod
+    def user_likes_query(cls, user, objects):
+        """
+        Likes de un usuario sobre objetos de un mismo modelo, en una sola consulta
+        
+        Args:
+            user: Usuario
+            objects: Lista no vacía de objetos del mismo modelo
+            
+        Returns:
+            QuerySet sin evaluar, para que el llamador elija columnas o lo evalúe de forma async
+        """
+        return cls.objects.filter(
+            user=user,
+            content_type=ContentType.objects.get_for_model(objects[0]),
+            object_id__in=[obj.id for obj in objects]
+        )
     
     @classmethod
     def get_user_likes_for_objects(cls, user, objects):
@@ -115,18 +163,12 @@ class Like(models.Model):
             content_type = ContentType.objects.get_for_model(obj)
             if content_type not in objects_by_type:
                 objects_by_type[content_type] = []
-            objects_by_type[content_type].append(obj.id)
+            objects_by_type[content_type].append(obj)
         
         # Obtener todos los likes del usuario para estos objetos
         likes = []
-        for content_type, object_ids in objects_by_type.items():
-            likes.extend(
-                cls.objects.filter(
-                    user=user,
-                    content_type=content_type,
-                    object_id__in=object_ids
-                )
-            )
+        for same_type in objects_by_type.values():
+            likes.extend(cls.user_likes_query(user, same_type))
         
         # Crear mapeo
         return {str(like.object_id): like for like in likes}
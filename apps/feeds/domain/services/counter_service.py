@@ -0,0 +1,193 @@
+"""
+Contadores de interacción de posts con escritura diferida (write-behind)
+
+Las vistas, compartidos y likes de posts se acumulan en Redis (un hash por post
+con HINCRBY) en lugar de actualizar la fila en cada petición. Un trabajo de la
+cola vuelca periódicamente los deltas acumulados con un único UPDATE por lote y
+recalcula el engagement_score de los posts afectados en la misma transacción.
+
+Los contadores de la base de datos van por detrás como mucho
+FEED_COUNTER_FLUSH_INTERVAL segundos. Si Redis no está disponible el incremento
+se escribe directamente en la base de datos.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import redis
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from apps.feeds.domain.entities.feed_post import FeedPost
+from apps.feeds.domain.services.engagement_service import recompute_engagement_scores
+from apps.shared.infrastructure.redis_client import get_redis
+from apps.shared.infrastructure.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+COUNTER_KEY_PREFIX = 'feed:counters:post:'
+DIRTY_KEY = 'feed:counters:dirty'
+FLUSH_TASK = 'feeds.flush_post_counters'
+
+# Campo del hash en Redis -> columna de FeedPost
+COUNTER_FIELDS = {
+    'views': 'views_count',
+    'shares': 'shares_count',
+    'likes': 'likes_count',
+}
+
+# Toma un lote de posts con deltas pendientes y vacía sus hashes de forma atómica:
+# los incrementos posteriores van a un hash nuevo y vuelven a marcar el post
+_CLAIM_SCRIPT = """
+local ids = redis.call('SPOP', KEYS[1], tonumber(ARGV[2]))
+local result = {}
+for _, id in ipairs(ids) do
+    local key = ARGV[1] .. id
+    result[#result + 1] = id
+    result[#result + 1] = redis.call('HGETALL', key)
+    redis.call('DEL', key)
+end
+return result
+"""
+
+_APPLY_SQL = """
+    UPDATE {table} AS p
+    SET views_count = p.views_count + d.views,
+        shares_count = p.shares_count + d.shares,
+        likes_count = GREATEST(p.likes_count + d.likes, 0)
+    FROM (VALUES {rows}) AS d(id, views, shares, likes)
+    WHERE p.id = d.id
+"""
+
+
+class PostCounterService:
+    """
+    Acumula y vuelca los contadores de interacción de los posts
+    """
+
+    def __init__(self):
+        self.flush_interval = settings.FEED_COUNTER_FLUSH_INTERVAL
+        self.batch_size = settings.FEED_COUNTER_FLUSH_BATCH_SIZE
+
+    def _key(self, post_id) -> str:
+        return f'{COUNTER_KEY_PREFIX}{post_id}'
+
+    def increment(self, post_id, field: str, amount: int = 1) -> int:
+        """
+        Incrementa un contador de un post
+
+        Args:
+            post_id: ID del post
+            field: 'views', 'shares' o 'likes'
+            amount: Delta (negativo para quitar un like)
+
+        Returns:
+            Delta pendiente de volcar para ese contador, que sumado al valor de la
+            base de datos da el valor actual
+        """
+        post_id = str(post_id)
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hincrby(self._key(post_id), field, amount)
+            pipe.sadd(DIRTY_KEY, post_id)
+            # Un único volcado programado para todos los posts marcados en el intervalo.
+            # Se reprograma en cada incremento (la clave es idempotente) para que un
+            # volcado descartado o un encolado fallido no dejen deltas sin volcar
+            task_queue.schedule(pipe, FLUSH_TASK, 'all', delay=self.flush_interval)
+            pending = pipe.execute()[0]
+        except redis.RedisError as e:
+            logger.warning(f"Contadores en Redis no disponibles, escribiendo {field} del post {post_id} directamente: {str(e)}")
+            column = COUNTER_FIELDS[field]
+            FeedPost.objects.filter(id=post_id).update(**{column: F(column) + amount})
+            return amount
+        return pending
+
+    def pending(self, post_id) -> Dict[str, int]:
+        """
+        Deltas todavía no volcados a la base de datos para un post
+        """
+        try:
+            raw = get_redis().hgetall(self._key(post_id))
+        except redis.RedisError:
+            return {}
+        return {field.decode(): int(value) for field, value in raw.items()}
+
+    def flush(self, batch_size: Optional[int] = None) -> int:
+        """
+        Vuelca a la base de datos un lote de posts con deltas pendientes
+
+        Returns:
+            Número de posts volcados
+        """
+        batch_size = batch_size or self.batch_size
+        claimed = get_redis().eval(_CLAIM_SCRIPT, 1, DIRTY_KEY, COUNTER_KEY_PREFIX, batch_size)
+
+        deltas: Dict[str, Dict[str, int]] = {}
+        for index in range(0, len(claimed), 2):
+            post_id = claimed[index].decode()
+            values = claimed[index + 1]
+            counters = {values[i].decode(): int(values[i + 1]) for i in range(0, len(values), 2)}
+            if any(counters.values()):
+                deltas[post_id] = counters
+
+        if not deltas:
+            return len(claimed) // 2
+
+        try:
+            with transaction.atomic():
+                self._apply(deltas)
+                recompute_engagement_scores(list(deltas))
+        except DatabaseError:
+            # Los deltas vuelven a Redis para el siguiente volcado
+            self._restore(deltas)
+            raise
+
+        logger.info(f"Contadores volcados para {len(deltas)} posts")
+        return len(claimed) // 2
+
+    def flush_all(self) -> bool:
+        """
+        Vuelca todos los deltas pendientes en lotes de batch_size
+
+        Returns:
+            False si algún lote falló y el volcado debe reintentarse
+        """
+        try:
+            while self.flush() >= self.batch_size:
+                pass
+        except (DatabaseError, redis.RedisError) as e:
+            logger.error(f"Error volcando contadores de posts: {str(e)}")
+            return False
+        return True
+
+    def _apply(self, deltas: Dict[str, Dict[str, int]]):
+        rows: List[str] = []
+        params: List = []
+        # Orden estable de las filas: evita interbloqueos con otros UPDATE por lotes
+        for post_id in sorted(deltas):
+            counters = deltas[post_id]
+            rows.append('(%s::uuid, %s::integer, %s::integer, %s::integer)')
+            params.extend([post_id, counters.get('views', 0), counters.get('shares', 0), counters.get('likes', 0)])
+
+        sql = _APPLY_SQL.format(
+            table=connection.ops.quote_name(FeedPost._meta.db_table),
+            rows=', '.join(rows)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def _restore(self, deltas: Dict[str, Dict[str, int]]):
+        try:
+            pipe = get_redis().pipeline()
+            for post_id, counters in deltas.items():
+                for field, value in counters.items():
+                    if value:
+                        pipe.hincrby(self._key(post_id), field, value)
+                pipe.sadd(DIRTY_KEY, post_id)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Se perdieron deltas de contadores de {len(deltas)} posts: {str(e)}")
+
+
+# Instancia global del servicio
+post_counter_service = PostCounterService()
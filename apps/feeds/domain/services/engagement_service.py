@@ -0,0 +1,212 @@
+"""
+Recalculo del engagement_score de los posts en SQL
+
+Misma fórmula que FeedPost.update_engagement_score / explain_trending_score:
+
+    raw_score = likes * 1 + comentarios * 2 + compartidos * 3 + vistas * 0.1
+    peso = min(raw_score / 10, 5)
+    decaimiento = 1 / (1 + log_{1.5 + peso / 10}(max(horas, 1) / 24 + 1))
+    engagement_score = raw_score * decaimiento
+
+calculada para muchas filas en un único UPDATE en lugar de cargar y guardar
+cada post desde Python. El recalculo completo recorre la tabla en chunks por
+rango de id (keyset), de modo que varios workers pueden repartirse rangos
+disjuntos del espacio de UUIDs. El recalculo periódico de la cola ejecuta un
+trabajo por chunk, cada uno muy por debajo del plazo de visibilidad.
+"""
+import logging
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from apps.feeds.domain.entities.feed_post import FeedPost
+
+logger = logging.getLogger(__name__)
+
+RECOMPUTE_TASK = 'feeds.recompute_engagement_scores'
+
+# Score nuevo y actual de las filas que cumplen {where}; {limit} acota el chunk
+_SCORES_SQL = """
+    SELECT
+        id,
+        engagement_score AS old_score,
+        raw_score / (1 + LN(hours_old / 24 + 1) / LN(1.5 + LEAST(raw_score / 10, 5) / 10)) AS new_score
+    FROM (
+        SELECT
+            id,
+            engagement_score,
+            likes_count * 1.0 + comments_count * 2.0 + shares_count * 3.0 + views_count * 0.1 AS raw_score,
+            GREATEST(EXTRACT(EPOCH FROM (%s::timestamptz - created_at)) / 3600, 1) AS hours_old
+        FROM {table}
+        WHERE {where}
+        ORDER BY id
+        {limit}
+    ) AS base
+"""
+
+_UPDATE_SQL = """
+    UPDATE {table} AS p
+    SET engagement_score = s.new_score
+    FROM ({scores}) AS s
+    WHERE p.id = s.id
+    RETURNING p.id, s.old_score, s.new_score
+"""
+
+
+class RecomputeReport:
+    """
+    Resultado de un recalculo: filas procesadas y deriva entre el score
+    almacenado y el recalculado
+    """
+
+    def __init__(self, threshold: float = None):
+        self.rows = 0
+        self.drifted = 0
+        self.total_drift = 0.0
+        self.max_drift = 0.0
+        self.max_drift_post: Optional[str] = None
+        self.threshold = settings.FEED_ENGAGEMENT_DRIFT_THRESHOLD if threshold is None else threshold
+
+    def add(self, post_id, old_score: float, new_score: float):
+        drift = abs((new_score or 0) - (old_score or 0))
+        self.rows += 1
+        self.total_drift += drift
+        if drift > self.threshold:
+            self.drifted += 1
+        if drift > self.max_drift:
+            self.max_drift = drift
+            self.max_drift_post = str(post_id)
+
+    def merge(self, other: 'RecomputeReport'):
+        self.rows += other.rows
+        self.drifted += other.drifted
+        self.total_drift += other.total_drift
+        if other.max_drift > self.max_drift:
+            self.max_drift = other.max_drift
+            self.max_drift_post = other.max_drift_post
+
+    @property
+    def mean_drift(self) -> float:
+        return self.total_drift / self.rows if self.rows else 0.0
+
+
+def _table() -> str:
+    return connection.ops.quote_name(FeedPost._meta.db_table)
+
+
+def recompute_engagement_scores(post_ids: Sequence) -> int:
+    """
+    Recalcula el engagement_score de los posts indicados en una sola sentencia
+
+    Returns:
+        Número de posts actualizados
+    """
+    if not post_ids:
+        return 0
+    scores = _SCORES_SQL.format(table=_table(), where='id = ANY(%s::uuid[])', limit='')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _UPDATE_SQL.format(table=_table(), scores=scores),
+            [timezone.now(), [str(post_id) for post_id in post_ids]]
+        )
+        updated = cursor.rowcount
+    logger.debug(f"engagement_score recalculado para {updated} posts")
+    return updated
+
+
+def id_ranges(partitions: int) -> List[Tuple[Optional[uuid.UUID], Optional[uuid.UUID]]]:
+    """
+    Divide el espacio de UUIDs en rangos [inicio, fin) de igual tamaño
+    """
+    partitions = max(1, partitions)
+    bounds = [uuid.UUID(int=(i * (1 << 128)) // partitions) for i in range(1, partitions)]
+    starts = [None] + bounds
+    ends = bounds + [None]
+    return list(zip(starts, ends))
+
+
+def recompute_chunk(
+    after: Optional[uuid.UUID] = None,
+    end: Optional[uuid.UUID] = None,
+    chunk_size: Optional[int] = None,
+    ref_time=None,
+    dry_run: bool = False,
+    report: Optional[RecomputeReport] = None,
+    inclusive: bool = False,
+) -> Optional[uuid.UUID]:
+    """
+    Recalcula un único chunk: los chunk_size posts siguientes a 'after' (y
+    anteriores a 'end'), con un UPDATE en una transacción corta
+
+    Args:
+        after: Último id del chunk anterior; None desde el principio
+        inclusive: Incluye 'after' (inicio de un rango en lugar de continuación)
+        report: Reporte donde acumular la deriva de las filas procesadas
+
+    Returns:
+        Último id procesado, o None si el rango terminó
+    """
+    chunk_size = chunk_size or settings.FEED_ENGAGEMENT_RECOMPUTE_CHUNK_SIZE
+    ref_time = ref_time or timezone.now()
+
+    conditions, params = [], []
+    if after is not None:
+        conditions.append('id >= %s' if inclusive else 'id > %s')
+        params.append(after)
+    if end is not None:
+        conditions.append('id < %s')
+        params.append(end)
+
+    scores = _SCORES_SQL.format(
+        table=_table(),
+        where=' AND '.join(conditions) or 'TRUE',
+        limit=f'LIMIT {int(chunk_size)}'
+    )
+    params = [ref_time] + params
+
+    # El UPDATE devuelve el score anterior de cada fila, así que la deriva se
+    # reporta con la misma sentencia que escribe
+    sql = scores if dry_run else _UPDATE_SQL.format(table=_table(), scores=scores)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    if report is not None:
+        for post_id, old_score, new_score in rows:
+            report.add(post_id, old_score, new_score)
+
+    if len(rows) < chunk_size:
+        return None
+    return max(post_id for post_id, _, _ in rows)
+
+
+def recompute_range(
+    start: Optional[uuid.UUID] = None,
+    end: Optional[uuid.UUID] = None,
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    drift_threshold: Optional[float] = None,
+) -> RecomputeReport:
+    """
+    Recalcula los posts con id en [start, end) en chunks de chunk_size filas,
+    un UPDATE (y una transacción corta) por chunk
+
+    Args:
+        dry_run: No escribe nada; solo reporta la deriva de los scores almacenados
+        drift_threshold: Diferencia a partir de la cual un score se cuenta como desfasado
+    """
+    report = RecomputeReport(drift_threshold)
+    ref_time = timezone.now()
+
+    last_id = recompute_chunk(start, end, chunk_size, ref_time, dry_run, report, inclusive=True)
+    while last_id is not None:
+        last_id = recompute_chunk(last_id, end, chunk_size, ref_time, dry_run, report)
+
+    logger.info(
+        f"engagement_score {'simulado' if dry_run else 'recalculado'} en rango [{start}, {end}): "
+        f"{report.rows} posts, {report.drifted} con deriva > {report.threshold}"
+    )
+    return report
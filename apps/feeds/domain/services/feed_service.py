@@ -1,12 +1,13 @@
 """
 Servicio principal para manejo del feed social con embeddings y recomendaciones
 """
-import requests
 import logging
 from typing import List, Optional, Dict, Any
-from django.db import models
-from django.db.models import QuerySet, F, Q, Count
+from asgiref.sync import sync_to_async
+from django.db import models, transaction
+from django.db.models import QuerySet, F, Q, Count, Exists, ExpressionWrapper, OuterRef, Value
 from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -15,13 +16,28 @@ from django.contrib.auth import get_user_model
 from apps.feeds.domain.entities.feed_post import FeedPost
 from apps.feeds.domain.entities.comment import Comment
 from apps.feeds.domain.entities.like import Like
+from apps.feeds.domain.entities.post_file import PostFile
+from apps.feeds.domain.services.counter_service import post_counter_service
+from apps.feeds.domain.services.search_service import hybrid_post_search
 
 # Importar servicio de vectores de usuario
 from apps.custom_auth.domain.services.user_vector_service import user_vector_service
+from apps.shared.domain.services.embedding_client import get_embedding_client
+from apps.shared.domain.services.keyset_cursor import (
+    KeysetCursor, keyset_filter, keyset_page, query_fingerprint, reference_time, vector_snapshot
+)
+from apps.shared.domain.services.vector_search import VectorParam, vector_search_planner, vector_similarity
+from apps.shared.infrastructure.task_queue import task_queue
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Similitud asignada a posts cuyo embedding todavía se está generando
+PENDING_EMBEDDING_SIMILARITY = 0.5
+
+# Antigüedad en horas respecto al instante de referencia de la paginación
+HOURS_OLD_SQL = "EXTRACT(EPOCH FROM (%s::timestamptz - created_at)) / 3600"
+
 
 class FeedService:
     """
@@ -30,44 +46,13 @@ class FeedService:
     
     def __init__(self, embedding_service_url: str = None):
         self.embedding_service_url = embedding_service_url or settings.EMBEDDING_SERVICE_URL
+        self.embedding_client = get_embedding_client(self.embedding_service_url)
     
     def get_embedding_from_microservice(self, text: str) -> Optional[List[float]]:
         """
         Obtiene embedding de texto desde el microservicio
         """
-        try:
-            payload = {
-                "text": text,
-                "translate_to_english": True,
-                "clean_text": True
-            }
-            
-            response = requests.post(
-                f"{self.embedding_service_url}/text-processing/vectorize/",
-                json=payload,
-                timeout=30,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                vector = result.get('vector')
-                if vector:
-                    logger.info(f"Embedding generado para post. Dimensiones: {result.get('dimension', len(vector))}")
-                    return vector
-                else:
-                    logger.error("El microservicio no devolvió un vector válido")
-                    return None
-            else:
-                logger.error(f"Error al obtener embedding: {response.status_code} - {response.text}")
-                return None
-                
-        except requests.RequestException as e:
-            logger.error(f"Error de conexión con microservicio: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Error inesperado: {str(e)}")
-            return None
+        return self.embedding_client.embed(text)
     
     def create_post(self, author=None, author_id: str = None, content: str = None, tags: List[str] = None, files: List[Dict] = None, is_public: bool = True) -> Optional[FeedPost]:
         """
@@ -101,8 +86,9 @@ class FeedService:
                 is_public=is_public
             )
             
-            # Generar embedding para el post
-            self.update_post_embedding(post.id)
+            # El embedding se genera en segundo plano, el post queda como pendiente
+            self.schedule_post_embedding(post.id)
+            post.embedding_pending = True
             
             # Actualizar vectores del usuario basado en su nuevo post
             user_vector_service.update_user_vectors_on_interaction(
@@ -136,7 +122,8 @@ class FeedService:
             
             if embedding:
                 post.embedding = embedding
-                post.save(update_fields=['embedding'])
+                post.embedding_pending = False
+                post.save(update_fields=['embedding', 'embedding_pending'])
                 logger.info(f"Embedding actualizado para post {post_id}")
                 return True
             else:
@@ -150,6 +137,22 @@ class FeedService:
             logger.error(f"Error actualizando embedding: {str(e)}")
             return False
     
+    def schedule_post_embedding(self, post_id: str):
+        """
+        Marca el post como pendiente y encola la generación de su embedding.
+        Encolar varias veces el mismo post antes de que se procese genera un único trabajo.
+
+        Ambas cosas ocurren al confirmarse la transacción: si se revierte, o si
+        no se puede encolar, el post no queda marcado como pendiente sin un
+        trabajo que lo resuelva.
+        """
+        def enqueue():
+            FeedPost.objects.filter(id=post_id).update(embedding_pending=True)
+            if not task_queue.enqueue_now('feeds.update_post_embedding', str(post_id), post_id=str(post_id)):
+                FeedPost.objects.filter(id=post_id).update(embedding_pending=False)
+
+        transaction.on_commit(enqueue)
+    
     def _generate_post_embedding_text(self, post: FeedPost) -> str:
         """
         Genera texto completo del post para crear embedding
@@ -167,9 +170,21 @@ class FeedService:
         
         return ". ".join(text_parts)
     
-    def get_personalized_feed(self, user_id: str = None, user=None, limit: int = 20, cursor: str = None):
+    def get_personalized_feed(self, user_id: str = None, user=None, limit: int = 20, cursor: str = None,
+                              ef_search: int = None, probes: int = None, filters: Dict[str, Any] = None):
         """
         Obtiene feed personalizado basado en el embedding del usuario
+        
+        Los candidatos se obtienen del índice HNSW (ef_search / probes ajustan el
+        recall) y el score compuesto se calcula solo sobre ellos. La paginación es
+        keyset sobre (recommendation_score, id): el cursor conserva el instante de
+        referencia y una instantánea del vector del usuario de la primera página,
+        así que los scores no se desplazan entre páginas aunque el vector se
+        recalcule durante el scroll.
+        
+        Cuando los candidatos personalizados se agotan, la página se completa con
+        posts trending y el scroll continúa por el ranking trending (cursor
+        'personalized_trending') excluyendo los posts personalizados ya servidos.
         """
         try:
             # Permitir usar tanto user_id como objeto user
@@ -177,171 +192,187 @@ class FeedService:
                 user_obj = user
                 user_id = user.id
             else:
-                user_obj = User.objects.get(id=user_id)
+                user_obj = User.objects.with_vectors().get(id=user_id)
             
             logger.info(f"Obteniendo feed personalizado para usuario {user_id}")
             
-            if not user_obj.feed_recommendations_embedding:
+            fingerprint = query_fingerprint(str(user_id), self._filters_key(filters))
+            page_cursor = KeysetCursor.decode(cursor, 'personalized', fingerprint)
+            mixed_cursor = None if page_cursor else KeysetCursor.decode(cursor, 'personalized_trending', fingerprint)
+            scroll_cursor = page_cursor or mixed_cursor
+            
+            if scroll_cursor is not None and scroll_cursor.vector is not None:
+                snapshot = scroll_cursor.vector
+            elif user_obj.feed_recommendations_embedding is None:
                 # Si el usuario no tiene embedding, retornar feed trending
                 logger.info(f"Usuario {user_id} sin embedding, retornando feed trending")
-                return self.get_trending_feed(limit, cursor)
-            
-            # Contar posts disponibles
-            total_posts = FeedPost.objects.filter(is_public=True).count()
-            posts_with_embedding = FeedPost.objects.filter(is_public=True, embedding__isnull=False).count()
-            logger.info(f"Total posts públicos: {total_posts}, Posts con embedding: {posts_with_embedding}")
-            
-            # Usar embedding del usuario para recomendaciones
-            user_embedding = user_obj.feed_recommendations_embedding
-            embedding_str = '[' + ','.join(map(str, user_embedding)) + ']'
-            
-            # Calcular similitud y score compuesto
-            similarity_sql = f"(1 - (embedding <#> '{embedding_str}'))"
-            hours_old_sql = "EXTRACT(EPOCH FROM (NOW() - created_at)) / 3600"
-            
-            # Score: 50% similitud + 30% engagement + 20% penalización tiempo
-            composite_score_sql = f"""
-                (
-                    0.5 * {similarity_sql} +
-                    0.3 * (engagement_score / 100) -
-                    0.2 * ({hours_old_sql} / 24)
+                return self.get_trending_feed(limit, cursor, filters)
+            else:
+                snapshot = vector_snapshot(user_obj.feed_recommendations_embedding)
+            ref_time = reference_time(scroll_cursor)
+            
+            if mixed_cursor is not None:
+                # Continuación trending de un feed personalizado agotado
+                served_personalized = self._personalized_queryset(
+                    snapshot, ref_time, filters, mixed_cursor.depth, ef_search, probes
+                ).values('id')
+                queryset = keyset_filter(self._trending_queryset(filters), 'engagement_score', mixed_cursor)
+                posts = list(queryset.exclude(id__in=served_personalized)[:limit + 1])
+                return keyset_page(
+                    posts, limit, 'personalized_trending', 'engagement_score', ref_time, mixed_cursor,
+                    fingerprint, snapshot, mixed_cursor.depth
                 )
-            """
-            
-            # Primero intentar con posts que tienen embedding y buena similitud
-            queryset_with_embedding = FeedPost.objects.filter(
-                is_public=True,
-                embedding__isnull=False
-            ).annotate(
-                similarity=RawSQL(similarity_sql, []),
-                hours_old=RawSQL(hours_old_sql, []),
-                recommendation_score=RawSQL(composite_score_sql, []),
-                comments_count_real=models.Count('comments', filter=models.Q(comments__is_deleted=False))
-            ).filter(
-                similarity__gte=0.1  # Umbral más bajo y permisivo
-            ).select_related('author').prefetch_related('post_files', 'comments').order_by('-recommendation_score')
-            
-            # Aplicar cursor si se proporciona
-            if cursor:
-                queryset_with_embedding = queryset_with_embedding.filter(created_at__lt=cursor)
+            
+            # Candidatos más cercanos según el índice ANN. La profundidad crece con
+            # las páginas ya servidas para que el keyset siga teniendo candidatos
+            served = page_cursor.served if page_cursor else 0
+            depth = vector_search_planner.candidate_limit(served + limit + 1)
+            personalized = self._personalized_queryset(snapshot, ref_time, filters, depth, ef_search, probes)
+            
+            queryset_with_embedding = keyset_filter(
+                personalized, 'recommendation_score', page_cursor
+            ).select_related('author', 'poll').prefetch_related('post_files', 'poll__options').order_by('-recommendation_score', '-id')
             
             posts_with_embedding = list(queryset_with_embedding[:limit + 1])
             logger.info(f"Posts encontrados con embedding y similitud >= 0.1: {len(posts_with_embedding)}")
             
-            # Si no encontramos suficientes posts con embedding, mezclar con trending
-            if len(posts_with_embedding) < limit:
-                logger.info(f"Completando con posts trending (necesitamos {limit - len(posts_with_embedding)} más)")
-                # Obtener posts trending para completar
-                trending_posts, _, _ = self.get_trending_feed(limit * 2, cursor)
-                
-                # Combinar y evitar duplicados
-                existing_ids = {post.id for post in posts_with_embedding}
-                additional_posts = [post for post in trending_posts if post.id not in existing_ids]
-                
-                # Mezclar los posts
-                all_posts = posts_with_embedding[:limit] + additional_posts
-                final_posts = all_posts[:limit]
-                
-                logger.info(f"Feed final personalizado: {len(final_posts)} posts")
-                
-                has_next = len(all_posts) > limit or len(posts_with_embedding) > limit
-                next_cursor = final_posts[-1].created_at.isoformat() if final_posts else None
-                
-                return final_posts, has_next, next_cursor
-            else:
-                # Tenemos suficientes posts con embedding
-                has_next = len(posts_with_embedding) > limit
-                if has_next:
-                    posts_with_embedding = posts_with_embedding[:limit]
-                    next_cursor = posts_with_embedding[-1].created_at.isoformat() if posts_with_embedding else None
-                else:
-                    next_cursor = None
-                
+            if len(posts_with_embedding) > limit:
+                posts_with_embedding, has_next, next_cursor = keyset_page(
+                    posts_with_embedding, limit, 'personalized', 'recommendation_score',
+                    ref_time, page_cursor, fingerprint, snapshot, depth
+                )
                 logger.info(f"Feed personalizado con embedding: {len(posts_with_embedding)} posts")
                 return posts_with_embedding, has_next, next_cursor
             
+            # Candidatos agotados: todos los personalizados ya se sirvieron (en esta
+            # página o en las anteriores), así que se excluyen del relleno trending
+            needed = limit - len(posts_with_embedding)
+            logger.info(f"Completando con posts trending (necesitamos {needed} más)")
+            trending_posts = list(
+                self._trending_queryset(filters).exclude(id__in=personalized.values('id'))[:needed + 1]
+            )
+            has_next = len(trending_posts) > needed
+            trending_posts = trending_posts[:needed]
+            
+            next_cursor = None
+            if has_next:
+                # La página siguiente continúa el ranking trending tras el último post
+                # trending servido (o desde el principio si no se sirvió ninguno)
+                last = trending_posts[-1] if trending_posts else None
+                next_cursor = KeysetCursor(
+                    'personalized_trending',
+                    last.engagement_score if last else None,
+                    str(last.id) if last else '',
+                    ref_time, served + limit, fingerprint, snapshot, depth
+                ).encode()
+            
+            final_posts = posts_with_embedding + trending_posts
+            logger.info(f"Feed final personalizado: {len(final_posts)} posts")
+            return final_posts, has_next, next_cursor
+            
         except User.DoesNotExist:
             logger.error(f"Usuario {user_id} no encontrado")
             return [], False, None
         except Exception as e:
             logger.error(f"Error obteniendo feed personalizado: {str(e)}")
-            return self.get_trending_feed(limit, cursor)
+            return self.get_trending_feed(limit, None, filters)
+    
+    def _personalized_queryset(self, snapshot, ref_time, filters: Optional[Dict[str, Any]], depth: int,
+                               ef_search: int = None, probes: int = None) -> QuerySet:
+        """
+        Posts candidatos del feed personalizado anotados con recommendation_score,
+        sin orden ni paginación
+        """
+        # Usar embedding del usuario para recomendaciones, enlazado una sola vez como parámetro
+        query_vector = VectorParam(snapshot)
+        
+        # Calcular similitud y score compuesto. Los posts con embedding pendiente
+        # reciben una similitud neutra para no desaparecer del feed mientras se procesan
+        similarity = Coalesce(vector_similarity('embedding', query_vector), Value(PENDING_EMBEDDING_SIMILARITY))
+        hours_old = RawSQL(HOURS_OLD_SQL, [ref_time], output_field=models.FloatField())
+        
+        # Score: 50% similitud + 30% engagement + 20% penalización tiempo
+        composite_score = ExpressionWrapper(
+            0.5 * similarity + 0.3 * (F('engagement_score') / 100) - 0.2 * (hours_old / 24),
+            output_field=models.FloatField()
+        )
+        
+        base_queryset = self._apply_filters(FeedPost.objects.filter(is_public=True), filters)
+        candidate_ids = vector_search_planner.nearest_ids(
+            base_queryset, 'embedding', query_vector, k=depth, ef_search=ef_search, probes=probes
+        )
+        
+        # Re-ranking de los candidatos junto con los posts cuyo embedding está pendiente
+        return base_queryset.filter(
+            Q(id__in=candidate_ids) | Q(embedding__isnull=True, embedding_pending=True)
+        ).annotate(
+            similarity=similarity,
+            hours_old=hours_old,
+            recommendation_score=composite_score
+        ).filter(
+            similarity__gte=0.1  # Umbral más bajo y permisivo
+        )
+    
+    def _trending_queryset(self, filters: Optional[Dict[str, Any]]) -> QuerySet:
+        """
+        Posts públicos en orden trending (engagement_score, id), listos para paginar
+
+        Sin agregados: el LIMIT recorre trending_idx directamente y los conteos de
+        comentarios de la página los carga FeedPageState en una consulta.
+        """
+        return self._apply_filters(FeedPost.objects.filter(is_public=True), filters).select_related(
+            'author', 'poll'
+        ).prefetch_related('post_files', 'poll__options').order_by('-engagement_score', '-id')
     
-    def get_trending_feed(self, limit: int = 20, cursor: str = None):
+    def get_trending_feed(self, limit: int = 20, cursor: str = None, filters: Dict[str, Any] = None):
         """
         Obtiene posts en tendencia basados en engagement
+        
+        engagement_score ya incluye el decaimiento temporal y se recalcula
+        periódicamente en SQL (recompute_engagement_scores), así que la consulta
+        recorre directamente el índice trending_idx con paginación keyset sobre
+        (engagement_score, id).
         """
         try:
             logger.info(f"Obteniendo feed trending con límite: {limit}")
             
-            hours_old_sql = "EXTRACT(EPOCH FROM (NOW() - created_at)) / 3600"
-            
-            # Nuevo algoritmo de trending mejorado:
-            # 1. Usa el engagement_score ya calculado que incluye el decaimiento logarítmico
-            # 2. Agrega un boost para posts con alta velocidad de engagement reciente
-            trending_score_sql = f"""
-                (
-                    engagement_score * 0.8 + 
-                    (engagement_score / GREATEST(1, SQRT({hours_old_sql}))) * 0.2
-                )
-            """
-            
-            queryset = FeedPost.objects.filter(
-                is_public=True
-            ).annotate(
-                hours_old=RawSQL(hours_old_sql, []),
-                trending_score=RawSQL(trending_score_sql, []),
-                comments_count_real=Count('comments', filter=models.Q(comments__is_deleted=False))
-            ).select_related('author').prefetch_related('post_files', 'comments').order_by('-trending_score')
-            
-            # Contar posts disponibles
-            total_count = queryset.count()
-            logger.info(f"Posts públicos disponibles para trending: {total_count}")
+            fingerprint = query_fingerprint(self._filters_key(filters))
+            page_cursor = KeysetCursor.decode(cursor, 'trending', fingerprint)
             
-            # Aplicar cursor si se proporciona
-            if cursor:
-                queryset = queryset.filter(created_at__lt=cursor)
+            queryset = keyset_filter(self._trending_queryset(filters), 'engagement_score', page_cursor)
             
             posts = list(queryset[:limit + 1])  # +1 to check if there's more
             
             # Si no hay posts con engagement score, obtener los más recientes
-            if not posts:
+            if not posts and page_cursor is None:
                 logger.info("No hay posts trending, obteniendo los más recientes")
-                return self.get_latest_feed(limit, cursor)
+                return self.get_latest_feed(limit, None, filters)
             
-            has_next = len(posts) > limit
-            
-            if has_next:
-                posts = posts[:limit]
-                next_cursor = posts[-1].created_at.isoformat() if posts else None
-            else:
-                next_cursor = None
+            posts, has_next, next_cursor = keyset_page(
+                posts, limit, 'trending', 'engagement_score', reference_time(page_cursor), page_cursor, fingerprint
+            )
             
             logger.info(f"Feed trending obtenido: {len(posts)} posts")
             return posts, has_next, next_cursor
             
         except Exception as e:
             logger.error(f"Error obteniendo feed trending: {str(e)}")
-            return self.get_latest_feed(limit, cursor)
-            return [], False, None
+            return self.get_latest_feed(limit, None, filters)
     
-    def handle_user_interaction(self, user_id: str, post_id: str, interaction_type: str):
+    def handle_user_interaction(self, user_id: str, post_id: str, interaction_type: str, post: FeedPost = None):
         """
         Maneja interacciones del usuario con posts (view, like, comment, share)
+        
+        Las vistas y compartidos se acumulan en los contadores write-behind; la
+        fila del post no se bloquea en cada interacción.
         """
         try:
-            post = FeedPost.objects.get(id=post_id)
+            if post is None:
+                post = FeedPost.objects.only('id', 'content').get(id=post_id)
             
             # Actualizar métricas del post
-            if interaction_type == 'view':
-                post.views_count = F('views_count') + 1
-            elif interaction_type == 'share':
-                post.shares_count = F('shares_count') + 1
-            
             if interaction_type in ['view', 'share']:
-                post.save(update_fields=[f'{interaction_type}s_count'])
-                post.refresh_from_db()
-                post.update_engagement_score()
+                post_counter_service.increment(post.id, f'{interaction_type}s')
             
             # Actualizar vectores del usuario basado en la interacción
             user_vector_service.update_user_vectors_on_interaction(
@@ -407,11 +438,9 @@ class FeedService:
         """
         try:
             # Toggle like
+            # El contador y el engagement_score se actualizan en el volcado de contadores
             like, created = Like.toggle_like(user, post)
             
-            # Actualizar engagement del post
-            post.update_engagement_score()
-            
             # Actualizar vectores del usuario si se creó el like
             if created:
                 user_vector_service.update_user_vectors_on_interaction(
@@ -427,99 +456,114 @@ class FeedService:
             logger.error(f"Error toggleando like en post: {str(e)}")
             return False
     
-    def get_latest_feed(self, limit: int = 20, cursor: str = None):
+    def get_latest_feed(self, limit: int = 20, cursor: str = None, filters: Dict[str, Any] = None):
         """
         Obtiene feed con posts más recientes
         """
         try:
             logger.info(f"Obteniendo feed más reciente con límite: {limit}")
             
-            queryset = FeedPost.objects.filter(is_public=True).order_by('-created_at')
-            
-            # Contar posts disponibles
-            total_count = queryset.count()
-            logger.info(f"Posts públicos más recientes disponibles: {total_count}")
-            
-            if cursor:
-                # Cursor-based pagination
-                queryset = queryset.filter(created_at__lt=cursor)
-            
-            posts = list(queryset[:limit + 1])  # +1 to check if there's more
-            has_next = len(posts) > limit
-            
-            if has_next:
-                posts = posts[:limit]
-                next_cursor = posts[-1].created_at.isoformat() if posts else None
-            else:
-                next_cursor = None
-            
-            logger.info(f"Feed más reciente obtenido: {len(posts)} posts")
-            return posts, has_next, next_cursor
+            queryset = self._apply_filters(FeedPost.objects.filter(is_public=True), filters)
+            return self._paginate_by_date(queryset, 'latest', limit, cursor, query_fingerprint(self._filters_key(filters)))
             
         except Exception as e:
             logger.error(f"Error obteniendo feed reciente: {str(e)}")
             return [], False, None
     
+    def get_author_feed(self, author, limit: int = 20, cursor: str = None, include_private: bool = False):
+        """
+        Obtiene los posts de un autor, del más reciente al más antiguo
+        
+        Args:
+            author: Usuario autor de los posts
+            include_private: Incluir posts no públicos (solo para el propio autor)
+        """
+        try:
+            queryset = FeedPost.objects.filter(author=author)
+            if not include_private:
+                queryset = queryset.filter(is_public=True)
+            fingerprint = query_fingerprint(str(author.pk), include_private)
+            return self._paginate_by_date(queryset, 'author', limit, cursor, fingerprint)
+            
+        except Exception as e:
+            logger.error(f"Error obteniendo posts del autor {author.pk}: {str(e)}")
+            return [], False, None
+    
+    def _paginate_by_date(self, queryset: QuerySet, kind: str, limit: int, cursor: Optional[str], fingerprint: str):
+        """
+        Paginación keyset sobre (created_at, id), resuelta con los índices de fecha
+        """
+        page_cursor = KeysetCursor.decode(cursor, kind, fingerprint)
+        queryset = keyset_filter(queryset, 'created_at', page_cursor).select_related(
+            'author', 'poll'
+        ).prefetch_related('post_files', 'poll__options').order_by('-created_at', '-id')
+        
+        posts = list(queryset[:limit + 1])  # +1 to check if there's more
+        posts, has_next, next_cursor = keyset_page(
+            posts, limit, kind, 'created_at', reference_time(page_cursor), page_cursor, fingerprint
+        )
+        
+        logger.info(f"Feed {kind} obtenido: {len(posts)} posts")
+        return posts, has_next, next_cursor
+    
     def get_filtered_feed(self, user, feed_type: str, filters: Dict[str, Any], 
                          limit: int = 20, cursor: str = None):
         """
         Obtiene feed filtrado según criterios
+        
+        Los filtros se aplican dentro de la consulta de cada tipo de feed, por lo
+        que el orden y el cursor son los mismos que los del feed sin filtrar.
         """
         try:
-            # Start with base feed
             if feed_type == 'personalized':
-                posts, _, _ = self.get_personalized_feed(user, limit * 2, cursor)
-                queryset = FeedPost.objects.filter(id__in=[p.id for p in posts])
-            elif feed_type == 'trending':
-                posts, _, _ = self.get_trending_feed(limit * 2, cursor)
-                queryset = FeedPost.objects.filter(id__in=[p.id for p in posts])
-            else:
-                queryset = FeedPost.objects.filter(is_public=True)
-            
-            # Apply filters
-            if filters.get('tags'):
-                queryset = queryset.filter(tags__overlap=filters['tags'])
-            
-            if filters.get('author_ids'):
-                queryset = queryset.filter(author_id__in=filters['author_ids'])
-            
-            if filters.get('date_from'):
-                queryset = queryset.filter(created_at__gte=filters['date_from'])
-            
-            if filters.get('date_to'):
-                queryset = queryset.filter(created_at__lte=filters['date_to'])
-            
-            if filters.get('has_files') is True:
-                queryset = queryset.filter(files__isnull=False).distinct()
-            elif filters.get('has_files') is False:
-                queryset = queryset.filter(files__isnull=True)
-            
-            if filters.get('file_types'):
-                queryset = queryset.filter(
-                    files__file_type__in=filters['file_types']
-                ).distinct()
-            
-            # Order and paginate
-            queryset = queryset.order_by('-created_at')
-            
-            if cursor:
-                queryset = queryset.filter(created_at__lt=cursor)
-                
-            posts = list(queryset[:limit + 1])
-            has_next = len(posts) > limit
-            
-            if has_next:
-                posts = posts[:limit]
-                next_cursor = posts[-1].created_at.isoformat() if posts else None
-            else:
-                next_cursor = None
-                
-            return posts, has_next, next_cursor
+                return self.get_personalized_feed(user=user, limit=limit, cursor=cursor, filters=filters)
+            if feed_type == 'trending':
+                return self.get_trending_feed(limit, cursor, filters)
+            return self.get_latest_feed(limit, cursor, filters)
             
         except Exception as e:
             logger.error(f"Error obteniendo feed filtrado: {str(e)}")
             return [], False, None
     
+    @staticmethod
+    def _apply_filters(queryset: QuerySet, filters: Optional[Dict[str, Any]]) -> QuerySet:
+        """
+        Aplica los filtros del feed filtrado a una consulta de posts
+        """
+        if not filters:
+            return queryset
+        
+        if filters.get('tags'):
+            queryset = queryset.filter(tags__overlap=filters['tags'])
+        
+        if filters.get('author_ids'):
+            queryset = queryset.filter(author_id__in=filters['author_ids'])
+        
+        if filters.get('date_from'):
+            queryset = queryset.filter(created_at__gte=filters['date_from'])
+        
+        if filters.get('date_to'):
+            queryset = queryset.filter(created_at__lte=filters['date_to'])
+        
+        # Exists en lugar de JOIN + distinct: no duplica filas ni interfiere con las anotaciones
+        post_files = PostFile.objects.filter(post=OuterRef('pk'))
+        if filters.get('has_files') is True:
+            queryset = queryset.filter(Exists(post_files))
+        elif filters.get('has_files') is False:
+            queryset = queryset.filter(~Exists(post_files))
+        
+        if filters.get('file_types'):
+            queryset = queryset.filter(Exists(post_files.filter(file_type__in=filters['file_types'])))
+        
+        return queryset
+    
+    @staticmethod
+    def _filters_key(filters: Optional[Dict[str, Any]]) -> str:
+        """
+        Representación estable de los filtros para la huella del cursor
+        """
+        return repr(sorted((filters or {}).items()))
+    
     def toggle_comment_like(self, user, comment):
         """
         Alterna like en comentario específico
@@ -543,103 +587,66 @@ class FeedService:
             logger.error(f"Error toggleando like en comentario: {str(e)}")
             return False
     
-    def search_posts_by_similarity(self, query: str, limit: int = 20, similarity_threshold: float = 0.65) -> List[FeedPost]:
+    def search_posts_by_similarity(self, query: str, limit: int = 20, similarity_threshold: float = None,
+                                   ef_search: int = None, probes: int = None, queryset: QuerySet = None,
+                                   use_embedding: bool = True) -> List[FeedPost]:
         """
-        Busca posts usando similitud vectorial semántica con máxima precisión
+        Busca posts combinando texto completo y similitud vectorial semántica
         
         Args:
             query: Texto de búsqueda
             limit: Número máximo de resultados
-            similarity_threshold: Umbral mínimo de similitud (0.0 a 1.0) - valor alto para mayor precisión
+            similarity_threshold: Similitud mínima de los candidatos vectoriales (0.0 a 1.0)
+            ef_search: Recall del índice HNSW para esta consulta
+            probes: Recall del índice IVFFlat para esta consulta
+            queryset: Posts candidatos con filtros adicionales (tags, autor...)
+            use_embedding: False para buscar solo por texto completo
             
         Returns:
-            Lista de posts ordenados por relevancia semántica
+            Lista de posts ordenados por relevancia (fusión por rango recíproco)
+        """
+        cleaned_query = self._preprocess_search_query(query)
+        if not cleaned_query or len(cleaned_query.strip()) < 2:
+            logger.warning(f"Query muy corto o vacío después de limpieza: '{query}' -> '{cleaned_query}'")
+            return []
+        
+        query_embedding = self.get_embedding_from_microservice(cleaned_query) if use_embedding else None
+        return self._hybrid_search(cleaned_query, query_embedding, limit, similarity_threshold, ef_search, probes,
+                                   queryset, use_embedding)
+    
+    async def asearch_posts_by_similarity(self, query: str, limit: int = 20, similarity_threshold: float = None,
+                                          ef_search: int = None, probes: int = None, queryset: QuerySet = None,
+                                          use_embedding: bool = True) -> List[FeedPost]:
+        """
+        Versión asyncio de search_posts_by_similarity: la espera del embedding
+        no ocupa un hilo del servidor, solo las consultas a la base de datos
+        """
+        cleaned_query = self._preprocess_search_query(query)
+        if not cleaned_query or len(cleaned_query.strip()) < 2:
+            logger.warning(f"Query muy corto o vacío después de limpieza: '{query}' -> '{cleaned_query}'")
+            return []
+        
+        query_embedding = await self.embedding_client.aembed(cleaned_query) if use_embedding else None
+        return await sync_to_async(self._hybrid_search)(
+            cleaned_query, query_embedding, limit, similarity_threshold, ef_search, probes, queryset, use_embedding
+        )
+    
+    def _hybrid_search(self, cleaned_query: str, query_embedding: Optional[List[float]], limit: int,
+                       similarity_threshold: Optional[float], ef_search: int = None, probes: int = None,
+                       queryset: QuerySet = None, use_embedding: bool = True) -> List[FeedPost]:
         """
+        Parte de base de datos de la búsqueda, con el embedding del query ya calculado
+        """
+        if use_embedding and not query_embedding:
+            logger.warning(f"No se pudo generar embedding para query, búsqueda solo por texto: {cleaned_query}")
         try:
-            # Limpiar y preprocesar el query de manera menos agresiva
-            cleaned_query = self._preprocess_search_query_conservative(query)
-            if not cleaned_query or len(cleaned_query.strip()) < 2:
-                logger.warning(f"Query muy corto o vacío después de limpieza: '{query}' -> '{cleaned_query}'")
-                return []
-            
-            # Obtener embedding del query de búsqueda
-            query_embedding = self.get_embedding_from_microservice(cleaned_query)
-            
-            if not query_embedding:
-                logger.warning(f"No se pudo generar embedding para query: {cleaned_query}")
-                # Fallback muy limitado y estricto
-                return list(FeedPost.objects.filter(
-                    is_public=True,
-                    content__icontains=cleaned_query
-                ).exclude(content__regex=r'^.{0,20}$')  # Excluir posts muy cortos
-                .order_by('-created_at')[:min(limit // 3, 5)])  # Muy pocos resultados de fallback
-            
-            # Convertir embedding a string para la consulta SQL
-            embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
-            
-            # Calcular similitud coseno usando operador <#> de pgvector
-            # (1 - (embedding <#> query_embedding)) da la similitud coseno
-            similarity_sql = f"(1 - (embedding <#> '{embedding_str}'))"
-            
-            # Score que prioriza casi completamente la similitud semántica
-            score_sql = f"""
-                (
-                    {similarity_sql} * 0.95 +  -- Máximo peso a similitud semántica
-                    (COALESCE(engagement_score, 0) / 1000.0) * 0.03 +  -- Engagement mínimo
-                    (1.0 / (1.0 + EXTRACT(EPOCH FROM (NOW() - created_at)) / 2592000.0)) * 0.02  -- Recencia mínima (30 días)
-                )
-            """
-            
-            # Query principal con filtros muy estrictos
-            queryset = FeedPost.objects.filter(
-                is_public=True,
-                embedding__isnull=False,  # Solo posts que tienen embedding
-                content__isnull=False,    # Solo posts con contenido
-            ).exclude(
-                content__exact='',        # Excluir posts vacíos
-            ).exclude(
-                content__regex=r'^.{0,30}$'  # Excluir posts muy cortos (menos de 30 caracteres)
-            ).annotate(
-                similarity=RawSQL(similarity_sql, []),
-                relevance_score=RawSQL(score_sql, [])
-            ).filter(
-                similarity__gte=similarity_threshold  # Umbral alto por defecto
-            ).select_related('author').prefetch_related('post_files').order_by('-similarity', '-relevance_score')  # Priorizar similitud pura
-            
-            posts = list(queryset[:limit])
-            
-            logger.info(f"Búsqueda vectorial para '{cleaned_query}': {len(posts)} posts encontrados con similitud >= {similarity_threshold}")
-            
-            # Solo si realmente no encontramos nada y el query es específico, bajar el umbral
-            if len(posts) == 0 and similarity_threshold > 0.5 and len(cleaned_query.split()) >= 2:
-                logger.info(f"Sin resultados con umbral alto, intentando con umbral medio para query específico: '{cleaned_query}'")
-                additional_posts = self.search_posts_by_similarity(
-                    query=query, 
-                    limit=min(limit, 10),  # Limitar aún más los resultados con umbral bajo
-                    similarity_threshold=0.5
-                )
-                posts.extend(additional_posts)
-            
-            # Solo fallback a texto si el query es muy simple y no hay resultados vectoriales
-            if len(posts) == 0 and len(cleaned_query.split()) == 1 and len(cleaned_query) > 4:
-                logger.info(f"Sin resultados vectoriales para query simple específico, búsqueda de texto limitada: '{cleaned_query}'")
-                text_search_posts = list(FeedPost.objects.filter(
-                    is_public=True,
-                    content__icontains=cleaned_query
-                ).order_by('-created_at')[:limit // 2])  # Limitar fallback
-                
-                posts.extend(text_search_posts)
-            
-            return posts[:limit]
-            
+            return hybrid_post_search.search(
+                cleaned_query, query_embedding, limit=limit, queryset=queryset,
+                min_similarity=similarity_threshold, ef_search=ef_search, probes=probes
+            )
         except Exception as e:
-            logger.error(f"Error en búsqueda vectorial: {str(e)}")
-            # Fallback mínimo con query limpio
-            cleaned_query = self._preprocess_search_query(query)
-            return list(FeedPost.objects.filter(
-                is_public=True,
-                content__icontains=cleaned_query
-            ).order_by('-created_at')[:limit // 2])  # Limitar resultados de fallback
+            logger.error(f"Error en búsqueda híbrida para '{cleaned_query}': {str(e)}")
+            return []
     
     def _preprocess_search_query(self, query: str) -> str:
         """
@@ -0,0 +1,97 @@
+"""
+Búsqueda híbrida de posts: texto completo + similitud vectorial
+
+Cada búsqueda combina dos listas de candidatos sobre los posts públicos:
+
+- Léxica: ``search_vector @@ websearch_to_tsquery(...)`` sobre el índice GIN,
+  ordenada por ts_rank_cd. El contenido se indexa con la configuración
+  'spanish' (stemming) y los tags con 'simple', así que la consulta se evalúa
+  con ambas.
+- Semántica: los vecinos más cercanos del embedding de la consulta en el
+  índice HNSW, con una similitud mínima.
+
+Las dos listas se fusionan en una única sentencia con reciprocal rank fusion
+(rank_fusion_ids) y los posts se cargan después con sus relaciones. Si no hay
+embedding (microservicio caído o búsqueda vectorial desactivada) la búsqueda
+es solo léxica.
+
+Los posts muy cortos se excluyen con la columna calculada content_length, que
+Postgres mantiene al escribir, en lugar de evaluar una expresión regular sobre
+el contenido de cada fila.
+"""
+import logging
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, QuerySet
+
+from apps.feeds.domain.entities.feed_post import SEARCH_CONFIG, FeedPost
+from apps.shared.domain.services.hybrid_search import rank_fusion_ids
+from apps.shared.domain.services.vector_search import VectorParam, vector_search_planner
+
+logger = logging.getLogger(__name__)
+
+
+class HybridPostSearch:
+    """
+    Búsqueda de posts con fusión por rango recíproco de texto completo y vectores
+    """
+
+    def __init__(self):
+        self.min_similarity = settings.FEED_SEARCH_MIN_SIMILARITY
+        self.min_content_length = settings.FEED_SEARCH_MIN_CONTENT_LENGTH
+
+    def search(self, query: str, embedding: Optional[Sequence[float]] = None, limit: int = 20,
+               queryset: QuerySet = None, min_similarity: float = None,
+               ef_search: int = None, probes: int = None) -> List[FeedPost]:
+        """
+        Posts más relevantes para la consulta, en orden de fusión
+
+        Args:
+            query: Texto de búsqueda ya normalizado
+            embedding: Embedding de la consulta; None para buscar solo por texto
+            limit: Número máximo de resultados
+            queryset: Posts candidatos (p. ej. filtrados por tags o autor);
+                por defecto los públicos
+            min_similarity: Similitud mínima de los candidatos vectoriales
+            ef_search: Recall del índice HNSW para esta consulta
+            probes: Recall del índice IVFFlat para esta consulta
+        """
+        if queryset is None:
+            queryset = FeedPost.objects.filter(is_public=True)
+        queryset = queryset.filter(content_length__gte=self.min_content_length)
+        min_similarity = self.min_similarity if min_similarity is None else min_similarity
+        k = vector_search_planner.candidate_limit(limit)
+
+        # websearch_to_tsquery acepta la sintaxis de un buscador ("frase", -excluir, or)
+        search_query = (
+            SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch') |
+            SearchQuery(query, config='simple', search_type='websearch')
+        )
+        lexical = queryset.filter(search_vector=search_query).annotate(
+            lexical_rank=SearchRank(F('search_vector'), search_query, cover_density=True)
+        ).order_by('-lexical_rank').values_list('pk', 'lexical_rank')[:k]
+
+        semantic = None
+        if embedding:
+            semantic = vector_search_planner.candidates(
+                queryset, 'embedding', VectorParam(embedding), k
+            ).values_list('pk', 'ann_distance')
+
+        ids = rank_fusion_ids(
+            lexical, semantic, limit=limit, min_similarity=min_similarity,
+            ef_search=ef_search, probes=probes
+        )
+        if not ids:
+            return []
+
+        posts = FeedPost.objects.filter(id__in=ids).select_related('author', 'poll').prefetch_related(
+            'post_files', 'poll__options'
+        ).in_bulk()
+        logger.info(f"Búsqueda híbrida para '{query}': {len(ids)} posts ({'texto y vectores' if embedding else 'solo texto'})")
+        return [posts[post_id] for post_id in ids if post_id in posts]
+
+
+# Instancia global del servicio
+hybrid_post_search = HybridPostSearch()
@@ -0,0 +1,309 @@
+"""
+Timelines de feed personalizados materializados en Redis
+
+Cada usuario activo tiene un sorted set con los ids de sus posts candidatos y
+su score de recomendación. El feed se sirve con ZREVRANGEBYSCORE + una consulta
+de hidratación de la página, en lugar de puntuar todos los posts públicos en
+cada petición.
+
+El score usa la misma fórmula que get_personalized_feed:
+
+    0.5 * similitud + 0.3 * engagement / 100 - 0.2 * horas_de_antigüedad / 24
+
+El término de antigüedad depende de NOW(), pero restar ``0.2 * (now - created_at)``
+ordena igual que sumar ``0.2 * created_at`` (en días), así que el score
+almacenado no caduca con el tiempo.
+
+El término de engagement, en cambio, se fija al insertar el post (fan-out o
+reconstrucción), por lo que el orden es aproximado: los cambios posteriores de
+engagement_score no se aplican a cada timeline. La desviación está acotada
+porque la primera página reconstruye el timeline cuando tiene más de
+FEED_TIMELINE_MAX_AGE segundos. Los posts que entraron con la similitud
+neutra de embedding pendiente se vuelven a puntuar (o salen del timeline si
+no alcanzan el umbral) cuando su embedding está listo.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.feeds.domain.entities.feed_post import FeedPost
+from apps.feeds.domain.services.feed_service import PENDING_EMBEDDING_SIMILARITY
+from apps.shared.domain.services.keyset_cursor import KeysetCursor, query_fingerprint, reference_time
+from apps.shared.domain.services.vector_search import VectorParam, vector_search_planner, vector_similarity
+from apps.shared.infrastructure.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+TIMELINE_KEY = 'feed:timeline:{user_id}'
+BUILT_AT_KEY = 'feed:timeline:{user_id}:built_at'
+ACTIVE_USERS_KEY = 'feed:timeline:active'
+
+# Similitud mínima para entrar en el timeline (mismo umbral que el feed personalizado)
+MIN_SIMILARITY = 0.1
+
+# Inserta en el timeline solo si existe (el usuario sigue activo) y lo recorta
+_FAN_OUT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[3]) + 1))
+return 1
+"""
+
+
+def timeline_score(similarity: float, engagement_score: float, created_at) -> float:
+    """
+    Score de recomendación independiente del momento de la consulta
+    """
+    created_days = created_at.timestamp() / 86400
+    return 0.5 * similarity + 0.3 * ((engagement_score or 0) / 100) + 0.2 * created_days
+
+
+class TimelineService:
+    """
+    Mantiene y sirve los timelines personalizados de los usuarios activos
+    """
+
+    def __init__(self):
+        self.max_length = settings.FEED_TIMELINE_MAX_LENGTH
+        self.ttl = settings.FEED_TIMELINE_TTL
+        self.active_window = settings.FEED_TIMELINE_ACTIVE_WINDOW
+        self.fan_out_batch_size = settings.FEED_TIMELINE_FAN_OUT_BATCH_SIZE
+        self.max_age = settings.FEED_TIMELINE_MAX_AGE
+
+    def _key(self, user_id) -> str:
+        return TIMELINE_KEY.format(user_id=user_id)
+
+    def _built_at_key(self, user_id) -> str:
+        return BUILT_AT_KEY.format(user_id=user_id)
+
+    def _mark_active(self, client, user_id):
+        client.zadd(ACTIVE_USERS_KEY, {str(user_id): timezone.now().timestamp()})
+
+    def is_active(self, user_id) -> bool:
+        try:
+            last_seen = get_redis().zscore(ACTIVE_USERS_KEY, str(user_id))
+        except redis.RedisError:
+            return False
+        return last_seen is not None and last_seen >= timezone.now().timestamp() - self.active_window
+
+    # Construcción
+
+    def rebuild(self, user) -> bool:
+        """
+        Recalcula el timeline completo de un usuario a partir de su vector de feed
+
+        Returns:
+            True si se materializó el timeline
+        """
+        if user.feed_recommendations_embedding is None:
+            return False
+
+        query_vector = VectorParam(user.feed_recommendations_embedding)
+        public_posts = FeedPost.objects.filter(is_public=True)
+
+        candidate_ids = vector_search_planner.nearest_ids(
+            public_posts, 'embedding', query_vector, k=self.max_length
+        )
+
+        rows = public_posts.filter(
+            Q(id__in=candidate_ids) | Q(embedding__isnull=True, embedding_pending=True)
+        ).annotate(
+            similarity=Coalesce(vector_similarity('embedding', query_vector), Value(PENDING_EMBEDDING_SIMILARITY))
+        ).filter(
+            similarity__gte=MIN_SIMILARITY
+        ).values_list('id', 'similarity', 'engagement_score', 'created_at')
+
+        entries = {
+            str(post_id): timeline_score(similarity, engagement_score, created_at)
+            for post_id, similarity, engagement_score, created_at in rows
+        }
+
+        key = self._key(user.id)
+        try:
+            pipe = get_redis().pipeline()
+            pipe.delete(key)
+            if entries:
+                pipe.zadd(key, entries)
+                pipe.zremrangebyrank(key, 0, -(self.max_length + 1))
+            else:
+                # Timeline vacío pero materializado: evita reconstruirlo en cada lectura
+                pipe.zadd(key, {'': float('-inf')})
+            pipe.expire(key, self.ttl)
+            pipe.set(self._built_at_key(user.id), timezone.now().timestamp(), ex=self.ttl)
+            self._mark_active(pipe, user.id)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Error materializando timeline de usuario {user.id}: {str(e)}")
+            return False
+
+        logger.info(f"Timeline de usuario {user.id} materializado con {len(entries)} posts")
+        return True
+
+    def rebuild_if_active(self, user_id) -> bool:
+        """
+        Reconstruye el timeline solo si el usuario lo ha leído recientemente
+        """
+        if not self.is_active(user_id):
+            return True
+        try:
+            user = User.objects.with_vectors().get(id=user_id)
+        except User.DoesNotExist:
+            return True
+        return self.rebuild(user)
+
+    def fan_out_post(self, post_id) -> bool:
+        """
+        Inserta un post en los timelines de los usuarios activos, con el score
+        calculado contra el vector de cada usuario
+
+        Si el post ya estaba en un timeline (insertado con la similitud de
+        embedding pendiente) su score se reemplaza, y se quita de los timelines
+        de los usuarios cuya similitud real no alcanza el umbral.
+        """
+        try:
+            post = FeedPost.objects.only('id', 'embedding', 'engagement_score', 'created_at', 'is_public').get(id=post_id)
+        except FeedPost.DoesNotExist:
+            return True
+
+        if not post.is_public or post.embedding is None:
+            return True
+
+        client = get_redis()
+        now = timezone.now().timestamp()
+        # Los usuarios inactivos salen del índice; su timeline expira solo
+        client.zremrangebyscore(ACTIVE_USERS_KEY, '-inf', now - self.active_window)
+        active_ids = [user_id.decode() for user_id in client.zrange(ACTIVE_USERS_KEY, 0, -1)]
+        if not active_ids:
+            return True
+
+        query_vector = VectorParam(post.embedding)
+        fan_out = client.register_script(_FAN_OUT_SCRIPT)
+        inserted = 0
+
+        for start in range(0, len(active_ids), self.fan_out_batch_size):
+            chunk = active_ids[start:start + self.fan_out_batch_size]
+            # Sin vector de usuario la similitud es NULL
+            similarities = User.objects.filter(id__in=chunk).annotate(
+                similarity=vector_similarity('feed_recommendations_embedding', query_vector)
+            ).values_list('id', 'similarity')
+
+            pipe = client.pipeline(transaction=False)
+            for user_id, similarity in similarities:
+                if similarity is None or similarity < MIN_SIMILARITY:
+                    pipe.zrem(self._key(user_id), str(post.id))
+                    continue
+                score = timeline_score(similarity, post.engagement_score, post.created_at)
+                fan_out(keys=[self._key(user_id)], args=[score, str(post.id), self.max_length], client=pipe)
+                inserted += 1
+            pipe.execute()
+
+        logger.info(f"Post {post.id} distribuido a {inserted} timelines")
+        return True
+
+    # Lectura
+
+    def get_page(self, user, limit: int = 20, cursor: str = None) -> Optional[Tuple[List[FeedPost], bool, Optional[str]]]:
+        """
+        Sirve una página del timeline materializado
+
+        Args:
+            user: Usuario autenticado
+            limit: Tamaño de la página
+            cursor: Cursor opaco de la página anterior (score, id)
+
+        Returns:
+            (posts, has_next, next_cursor) o None si el timeline no está disponible
+            y se debe usar la consulta directa
+        """
+        if user.feed_recommendations_embedding is None:
+            return None
+
+        fingerprint = query_fingerprint(str(user.id))
+        page_cursor = KeysetCursor.decode(cursor, 'timeline', fingerprint)
+
+        key = self._key(user.id)
+        try:
+            client = get_redis()
+            exists, built_at = client.pipeline(transaction=False).exists(key).get(self._built_at_key(user.id)).execute()
+            # Solo en la primera página: reconstruir a mitad del scroll cambiaría los scores del cursor
+            stale = page_cursor is None and (
+                built_at is None or float(built_at) < timezone.now().timestamp() - self.max_age
+            )
+            if (not exists or stale) and not self.rebuild(user):
+                return None
+
+            if page_cursor is None:
+                entries = client.zrevrangebyscore(key, '+inf', '(-inf', start=0, num=limit + 1, withscores=True)
+            else:
+                # Keyset (score, id): los empates con el score del cursor se
+                # resuelven por id, en el mismo orden inverso que usa Redis
+                ties = client.zcount(key, page_cursor.key, page_cursor.key)
+                entries = client.zrevrangebyscore(
+                    key, page_cursor.key, '(-inf', start=0, num=limit + 1 + ties, withscores=True
+                )
+                entries = [
+                    (member, score) for member, score in entries
+                    if score < page_cursor.key or member.decode() < page_cursor.id
+                ][:limit + 1]
+
+            pipe = client.pipeline(transaction=False)
+            pipe.expire(key, self.ttl)
+            pipe.expire(self._built_at_key(user.id), self.ttl)
+            self._mark_active(pipe, user.id)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Timeline de usuario {user.id} no disponible en Redis: {str(e)}")
+            return None
+
+        has_next = len(entries) > limit
+        entries = entries[:limit]
+        scores: Dict[str, float] = {member.decode(): score for member, score in entries}
+
+        posts = self._hydrate(list(scores))
+
+        # Posts eliminados o que dejaron de ser públicos salen del timeline
+        found = {str(post.id) for post in posts}
+        stale = [post_id for post_id in scores if post_id not in found]
+        if stale:
+            try:
+                get_redis().zrem(key, *stale)
+            except redis.RedisError:
+                pass
+
+        next_cursor = None
+        if has_next and scores:
+            last_id = list(scores)[-1]
+            served = (page_cursor.served if page_cursor else 0) + len(scores)
+            next_cursor = KeysetCursor(
+                'timeline', scores[last_id], last_id, reference_time(page_cursor), served, fingerprint
+            ).encode()
+        return posts, has_next, next_cursor
+
+    def _hydrate(self, post_ids: List[str]) -> List[FeedPost]:
+        """
+        Carga los posts de la página en una sola consulta respetando el orden del timeline
+        """
+        if not post_ids:
+            return []
+
+        # Sin agregados: FeedPageState cuenta los comentarios de la página en una consulta
+        posts = FeedPost.objects.filter(
+            id__in=post_ids,
+            is_public=True
+        ).select_related('author', 'poll').prefetch_related('post_files', 'poll__options')
+
+        by_id = {str(post.id): post for post in posts}
+        return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+
+# Instancia global del servicio
+timeline_service = TimelineService()
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from apps.feeds.domain.entities.comment import Comment
 from apps.custom_auth.domain.entities.user import User
+from .page_state import CommentListSerializer, get_page_state
 
 
 class CommentAuthorSerializer(serializers.ModelSerializer):
@@ -42,10 +43,11 @@ class CommentSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at'
         ]
+        list_serializer_class = CommentListSerializer
     
     def get_replies_count(self, obj):
         """Get count of non-deleted replies"""
-        return obj.replies.filter(is_deleted=False).count()
+        return get_page_state(self.context).comment_replies_count(obj)
     
     def get_is_liked(self, obj):
         """Check if current user has liked the comment"""
@@ -53,15 +55,7 @@ class CommentSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        from apps.feeds.domain.entities.like import Like
-        from django.contrib.contenttypes.models import ContentType
-        
-        content_type = ContentType.objects.get_for_model(Comment)
-        return Like.objects.filter(
-            user=request.user,
-            content_type=content_type,
-            object_id=obj.id
-        ).exists()
+        return get_page_state(self.context).is_comment_liked(obj)
 
 
 class CommentCreateSerializer(serializers.ModelSerializer):
@@ -133,6 +127,7 @@ class CommentThreadSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at'
         ]
+        list_serializer_class = CommentListSerializer
     
     def get_replies(self, obj):
         """Get all replies recursively"""
@@ -148,12 +143,4 @@ class CommentThreadSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        from apps.feeds.domain.entities.like import Like
-        from django.contrib.contenttypes.models import ContentType
-        
-        content_type = ContentType.objects.get_for_model(Comment)
-        return Like.objects.filter(
-            user=request.user,
-            content_type=content_type,
-            object_id=obj.id
-        ).exists()
+        return get_page_state(self.context).is_comment_liked(obj)
@@ -3,6 +3,7 @@ from apps.feeds.domain.entities.feed_post import FeedPost
 from apps.feeds.domain.entities.post_file import PostFile
 from apps.feeds.domain.entities.poll import Poll
 from apps.custom_auth.domain.entities.user import User
+from .page_state import FeedPostListSerializer, get_page_state
 from .poll_serializers import PollSerializer
 
 
@@ -54,6 +55,7 @@ class FeedPostSerializer(serializers.ModelSerializer):
             'views_count',
             'shares_count',
             'engagement_score',
+            'embedding_pending',
             'is_public',
             'is_liked',
             'created_at',
@@ -67,31 +69,24 @@ class FeedPostSerializer(serializers.ModelSerializer):
             'views_count',
             'shares_count',
             'engagement_score',
+            'embedding_pending',
             'is_liked',
             'created_at',
             'updated_at'
         ]
+        # Resuelve likes, votos y conteos de toda la página con una consulta por tipo
+        list_serializer_class = FeedPostListSerializer
     
     def get_is_liked(self, obj):
         """Check if current user has liked this post"""
         request = self.context.get('request')
         if request and request.user and request.user.is_authenticated:
-            from apps.feeds.domain.entities.like import Like
-            from django.contrib.contenttypes.models import ContentType
-            
-            content_type = ContentType.objects.get_for_model(obj)
-            return Like.objects.filter(
-                user=request.user,
-                content_type=content_type,
-                object_id=obj.id
-            ).exists()
+            return get_page_state(self.context).is_post_liked(obj)
         return False
         
     def get_comments_count(self, obj):
         """Get accurate comments count"""
-        if hasattr(obj, 'comments_count_real'):
-            return obj.comments_count_real
-        return obj.comments.filter(is_deleted=False).count()
+        return get_page_state(self.context).post_comments_count(obj)
 
 
 class FeedPostCreateSerializer(serializers.ModelSerializer):
@@ -285,6 +280,9 @@ class FeedPostDetailSerializer(FeedPostSerializer):
     recent_comments = serializers.SerializerMethodField()
     user_has_liked = serializers.SerializerMethodField()
     
+    # El list serializer carga también los comentarios recientes de la página
+    prefetch_recent_comments = True
+    
     class Meta(FeedPostSerializer.Meta):
         fields = FeedPostSerializer.Meta.fields + [
             'recent_comments',
@@ -294,10 +292,7 @@ class FeedPostDetailSerializer(FeedPostSerializer):
     def get_recent_comments(self, obj):
         """Get recent comments preview"""
         from .comment_serializers import CommentSerializer
-        recent_comments = obj.comments.filter(
-            parent_comment=None,
-            is_deleted=False
-        ).order_by('-created_at')[:3]
+        recent_comments = get_page_state(self.context).post_recent_comments(obj)
         return CommentSerializer(recent_comments, many=True, context=self.context).data
     
     def get_user_has_liked(self, obj):
@@ -306,12 +301,4 @@ class FeedPostDetailSerializer(FeedPostSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        from apps.feeds.domain.entities.like import Like
-        from django.contrib.contenttypes.models import ContentType
-        
-        content_type = ContentType.objects.get_for_model(FeedPost)
-        return Like.objects.filter(
-            user=request.user,
-            content_type=content_type,
-            object_id=obj.id
-        ).exists()
+        return get_page_state(self.context).is_post_liked(obj)
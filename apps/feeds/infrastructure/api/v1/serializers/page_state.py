@@ -0,0 +1,258 @@
+"""
+Estado del usuario para una página de posts, compartido por los serializers
+
+Los campos que dependen del usuario (is_liked, user_voted...) y los conteos
+(comments_count, replies_count) se resuelven para toda la página con una
+consulta por tipo, en lugar de una consulta por post, comentario u opción. El
+estado vive en el contexto del serializer raíz, así que lo comparten todos los
+serializers anidados (post -> encuesta -> opciones, post -> comentarios).
+
+Los list serializers cargan la página completa antes de serializar; al
+serializar un único objeto el estado se carga solo para ese objeto. Las vistas
+async lo cargan antes con aload_posts, que lanza las consultas a la vez.
+"""
+import asyncio
+from typing import Dict, Iterable, List, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+
+from apps.feeds.domain.entities.comment import Comment
+from apps.feeds.domain.entities.like import Like
+from apps.feeds.domain.entities.poll import PollVote
+
+PAGE_STATE_KEY = 'feed_page_state'
+
+# Comentarios de primer nivel que se muestran en el detalle de cada post
+RECENT_COMMENTS_LIMIT = 3
+
+
+def _fetch(query) -> List:
+    return list(query) if query is not None else []
+
+
+async def _afetch(query) -> List:
+    return [row async for row in query] if query is not None else []
+
+
+class FeedPageState:
+    """
+    Likes, votos y conteos de los objetos de la página para el usuario de la petición
+    """
+
+    def __init__(self, user=None):
+        self.user = user if user is not None and user.is_authenticated else None
+        self.post_ids: Set[str] = set()
+        self.liked_post_ids: Set[str] = set()
+        self.comments_count: Dict[str, int] = {}
+        self.recent_comments: Dict[str, List[Comment]] = {}
+        self.poll_ids: Set[str] = set()
+        self.user_votes: Dict[str, List] = {}
+        self.comment_ids: Set[str] = set()
+        self.liked_comment_ids: Set[str] = set()
+        self.replies_count: Dict[str, int] = {}
+
+    # Carga por lotes
+
+    def load_posts(self, posts: Iterable, recent_comments: bool = False):
+        posts = self._pending(posts, self.post_ids)
+        if not posts:
+            return
+        queries = self._post_queries(posts, recent_comments)
+        comments = self._store_posts(posts, recent_comments, *[_fetch(query) for query in queries])
+        self.load_comments(comments)
+
+    async def aload_posts(self, posts: Iterable, recent_comments: bool = False):
+        """
+        Versión asíncrona de load_posts para las vistas async: las consultas
+        independientes de la página se lanzan a la vez con asyncio.gather
+        """
+        posts = self._pending(posts, self.post_ids)
+        if not posts:
+            return
+        queries = await sync_to_async(self._post_queries)(posts, recent_comments)
+        results = await asyncio.gather(*[_afetch(query) for query in queries])
+        comments = self._store_posts(posts, recent_comments, *results)
+        await self.aload_comments(comments)
+
+    def load_polls(self, poll_ids: Iterable):
+        self._store_votes(_fetch(self._votes_query(self._pending_polls(poll_ids))))
+
+    def load_comments(self, comments: Iterable):
+        comments = self._pending(comments, self.comment_ids)
+        if not comments:
+            return
+        self._store_comments(*[_fetch(query) for query in self._comment_queries(comments)])
+
+    async def aload_comments(self, comments: Iterable):
+        comments = self._pending(comments, self.comment_ids)
+        if not comments:
+            return
+        queries = await sync_to_async(self._comment_queries)(comments)
+        self._store_comments(*await asyncio.gather(*[_afetch(query) for query in queries]))
+
+    # Consultas de la página
+
+    @staticmethod
+    def _pending(objects: Iterable, loaded: Set[str]) -> List:
+        """
+        Objetos aún no cargados, que quedan marcados como cargados
+        """
+        objects = [obj for obj in objects if str(obj.id) not in loaded]
+        loaded.update(str(obj.id) for obj in objects)
+        return objects
+
+    def _pending_polls(self, poll_ids: Iterable) -> List:
+        poll_ids = [poll_id for poll_id in poll_ids if str(poll_id) not in self.poll_ids]
+        self.poll_ids.update(str(poll_id) for poll_id in poll_ids)
+        return poll_ids
+
+    def _liked_query(self, objects: List):
+        """
+        object_id de los likes del usuario sobre objetos de un mismo modelo
+        """
+        if not self.user:
+            return None
+        return Like.user_likes_query(self.user, objects).values_list('object_id', flat=True)
+
+    def _votes_query(self, poll_ids: List):
+        if not poll_ids or not self.user:
+            return None
+        return PollVote.objects.filter(
+            user=self.user, poll_id__in=poll_ids
+        ).values_list('poll_id', 'option_id')
+
+    def _post_queries(self, posts: List, recent_comments: bool) -> Tuple:
+        post_ids = [post.id for post in posts]
+        # Conteo solo de los posts de la página, no en la consulta paginada del feed
+        counts = Comment.objects.filter(
+            post_id__in=post_ids, is_deleted=False
+        ).values('post_id').annotate(total=Count('id')).values_list('post_id', 'total')
+
+        recent = Comment.objects.filter(
+            post_id__in=post_ids, parent_comment=None, is_deleted=False
+        ).annotate(
+            position=Window(RowNumber(), partition_by=F('post_id'), order_by=F('created_at').desc())
+        ).filter(
+            position__lte=RECENT_COMMENTS_LIMIT
+        ).select_related('author').order_by('post_id', '-created_at') if recent_comments else None
+
+        poll_ids = self._pending_polls(post.poll_id for post in posts if post.poll_id)
+        return self._liked_query(posts), counts, self._votes_query(poll_ids), recent
+
+    def _comment_queries(self, comments: List) -> Tuple:
+        counts = Comment.objects.filter(
+            parent_comment_id__in=[comment.id for comment in comments], is_deleted=False
+        ).values('parent_comment_id').annotate(total=Count('id')).values_list('parent_comment_id', 'total')
+        return self._liked_query(comments), counts
+
+    def _store_posts(self, posts: List, recent_comments: bool, liked, counts, votes, recent) -> List[Comment]:
+        """
+        Guarda los resultados de _post_queries y devuelve los comentarios recientes cargados
+        """
+        self.liked_post_ids.update(str(object_id) for object_id in liked)
+        for post in posts:
+            self.comments_count[str(post.id)] = 0
+        self.comments_count.update({str(post_id): total for post_id, total in counts})
+        self._store_votes(votes)
+
+        if recent_comments:
+            for post in posts:
+                self.recent_comments.setdefault(str(post.id), [])
+            for comment in recent:
+                self.recent_comments[str(comment.post_id)].append(comment)
+        return recent
+
+    def _store_votes(self, votes):
+        for poll_id, option_id in votes:
+            self.user_votes.setdefault(str(poll_id), []).append(option_id)
+
+    def _store_comments(self, liked, counts):
+        self.liked_comment_ids.update(str(object_id) for object_id in liked)
+        self.replies_count.update({str(comment_id): total for comment_id, total in counts})
+
+    # Consultas por objeto (cargan el objeto si no venía en la página)
+
+    def is_post_liked(self, post) -> bool:
+        self.load_posts([post])
+        return str(post.id) in self.liked_post_ids
+
+    def post_comments_count(self, post) -> int:
+        self.load_posts([post])
+        return self.comments_count.get(str(post.id), 0)
+
+    def post_recent_comments(self, post) -> List[Comment]:
+        if str(post.id) not in self.recent_comments:
+            self.post_ids.discard(str(post.id))
+            self.load_posts([post], recent_comments=True)
+        return self.recent_comments.get(str(post.id), [])
+
+    def poll_votes(self, poll_id) -> List:
+        self.load_polls([poll_id])
+        return self.user_votes.get(str(poll_id), [])
+
+    def is_comment_liked(self, comment) -> bool:
+        self.load_comments([comment])
+        return str(comment.id) in self.liked_comment_ids
+
+    def comment_replies_count(self, comment) -> int:
+        self.load_comments([comment])
+        return self.replies_count.get(str(comment.id), 0)
+
+
+def get_page_state(context: dict) -> FeedPageState:
+    """
+    Retorna el estado de página del contexto del serializer, creándolo si no existe
+    """
+    state = context.get(PAGE_STATE_KEY)
+    if state is None:
+        request = context.get('request')
+        state = FeedPageState(getattr(request, 'user', None))
+        context[PAGE_STATE_KEY] = state
+    return state
+
+
+async def aserialize_posts(serializer_class, posts: Iterable, context: dict) -> List:
+    """
+    Serializa una página de posts desde una vista async
+
+    El estado de la página se carga con aload_posts; la serialización, que
+    puede tocar relaciones no precargadas, se ejecuta en un hilo.
+    """
+    posts = list(posts)
+    await get_page_state(context).aload_posts(
+        posts, recent_comments=getattr(serializer_class, 'prefetch_recent_comments', False)
+    )
+    return await sync_to_async(lambda: serializer_class(posts, many=True, context=context).data)()
+
+
+class PagePrefetchListSerializer(serializers.ListSerializer):
+    """
+    List serializer que carga el estado de toda la página antes de serializar
+    cada elemento
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.prefetch(get_page_state(self.context), items)
+        return super().to_representation(items)
+
+    def prefetch(self, state: FeedPageState, items: List):
+        """
+        Carga en el estado lo que necesitan los elementos de la página; sin
+        sobrescribir, cada elemento resuelve su estado al serializarse
+        """
+
+
+class FeedPostListSerializer(PagePrefetchListSerializer):
+
+    def prefetch(self, state: FeedPageState, items: List):
+        state.load_posts(items, recent_comments=getattr(self.child, 'prefetch_recent_comments', False))
+
+
+class CommentListSerializer(PagePrefetchListSerializer):
+
+    def prefetch(self, state: FeedPageState, items: List):
+        state.load_comments(items)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from apps.feeds.domain.entities.poll import Poll, PollOption, PollVote
 from apps.custom_auth.domain.entities.user import User
+from .page_state import get_page_state
 
 
 class PollOptionSerializer(serializers.ModelSerializer):
@@ -24,10 +25,7 @@ class PollOptionSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        return PollVote.objects.filter(
-            user=request.user,
-            option=obj
-        ).exists()
+        return obj.id in get_page_state(self.context).poll_votes(obj.poll_id)
 
 
 class PollSerializer(serializers.ModelSerializer):
@@ -69,10 +67,7 @@ class PollSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        return PollVote.objects.filter(
-            user=request.user,
-            poll=obj
-        ).exists()
+        return bool(get_page_state(self.context).poll_votes(obj.id))
     
     def get_user_votes(self, obj):
         """Retorna las opciones que el usuario actual ha votado"""
@@ -80,12 +75,7 @@ class PollSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return []
         
-        votes = PollVote.objects.filter(
-            user=request.user,
-            poll=obj
-        ).values_list('option_id', flat=True)
-        
-        return list(votes)
+        return list(get_page_state(self.context).poll_votes(obj.id))
 
 
 class PollCreateSerializer(serializers.ModelSerializer):
@@ -4,7 +4,6 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from django.db.models import Case, When
 import logging
 
 from apps.feeds.domain.entities.feed_post import FeedPost
@@ -16,6 +15,8 @@ from apps.feeds.infrastructure.api.v1.serializers.feed_post_serializers import (
     FeedPostDetailSerializer,
     PostFileSerializer,
 )
+from apps.feeds.infrastructure.api.v1.serializers.page_state import aserialize_posts
+from apps.shared.infrastructure.async_views import AsyncAPIView
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +35,7 @@ class FeedPostListCreateView(generics.ListCreateAPIView):
         """Get user's posts"""
         return FeedPost.objects.filter(
             author=self.request.user
-        ).order_by('-created_at')
+        ).select_related('author', 'poll').prefetch_related('post_files', 'poll__options').order_by('-created_at')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -49,9 +50,10 @@ class FeedPostListCreateView(generics.ListCreateAPIView):
         # El serializer se encarga de crear el post con archivos y embeddings
         post = serializer.save()
         
-        # Generar embedding para el post después de crearlo
+        # Encolar la generación del embedding, la respuesta no espera al microservicio
         feed_service = FeedService()
-        feed_service.update_post_embedding(post.id)
+        feed_service.schedule_post_embedding(post.id)
+        post.embedding_pending = True
         
         logger.info(f"Post creado: {post.id} por {self.request.user.username}")
         
@@ -81,7 +83,7 @@ class FeedPostDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return FeedPost.objects.select_related('author').prefetch_related('post_files', 'comments')
+        return FeedPost.objects.select_related('author', 'poll').prefetch_related('post_files', 'poll__options')
     
     def get_object(self):
         """Get post and record view interaction"""
@@ -91,9 +93,10 @@ class FeedPostDetailView(generics.RetrieveUpdateDestroyAPIView):
         if self.request.method == 'GET':
             feed_service = FeedService()
             feed_service.handle_user_interaction(
-                user=self.request.user,
-                post=obj,
-                interaction_type='view'
+                user_id=self.request.user.id,
+                post_id=obj.id,
+                interaction_type='view',
+                post=obj
             )
         
         return obj
@@ -103,11 +106,12 @@ class FeedPostDetailView(generics.RetrieveUpdateDestroyAPIView):
         if serializer.instance.author != self.request.user:
             raise permissions.PermissionDenied("You can only edit your own posts")
         
+        post = serializer.save()
+        
         # Update embedding if content changed
         if 'content' in serializer.validated_data:
             feed_service = FeedService()
-            post = serializer.save()
-            feed_service.update_post_embedding(post.id)
+            feed_service.schedule_post_embedding(post.id)
     
     def perform_destroy(self, instance):
         """Delete post (author only)"""
@@ -158,7 +162,7 @@ class FeedPostFileUploadView(generics.CreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class FeedPostSearchView(generics.ListAPIView):
+class FeedPostSearchView(AsyncAPIView):
     """
     Search feed posts using vector similarity and text search
     
@@ -167,10 +171,12 @@ class FeedPostSearchView(generics.ListAPIView):
     serializer_class = FeedPostSerializer
     permission_classes = [permissions.IsAuthenticated]
     
-    def get_queryset(self):
-        """Search posts using vector similarity or fallback to text search"""
-        from apps.feeds.domain.services.feed_service import FeedService
-        
+    async def get(self, request, *args, **kwargs):
+        posts = await self.search_posts()
+        return Response(await aserialize_posts(self.serializer_class, posts, {'request': request, 'view': self}))
+    
+    async def search_posts(self):
+        """Search posts by text and vector similarity, or list them by tags and author"""
         # Search parameters
         query = self.request.query_params.get('q', '')
         tags = self.request.query_params.getlist('tags', [])
@@ -179,51 +185,28 @@ class FeedPostSearchView(generics.ListAPIView):
         limit = int(self.request.query_params.get('limit', '20'))
         
         if not query and not tags and not author:
-            return FeedPost.objects.none()
-        
-        feed_service = FeedService()
+            return []
         
-        # Si hay query de texto y vector search está habilitado, usar búsqueda vectorial
-        if query and use_vector_search:
-            try:
-                posts = feed_service.search_posts_by_similarity(query, limit=limit)
-                
-                # Filtrar adicionalmente por tags y autor si se especifican
-                if tags or author:
-                    post_ids = [post.id for post in posts]
-                    queryset = FeedPost.objects.filter(id__in=post_ids)
-                    
-                    if tags:
-                        queryset = queryset.filter(tags__overlap=tags)
-                    if author:
-                        queryset = queryset.filter(author__username__icontains=author)
-                    
-                    return queryset.order_by('-created_at')
-                
-                # Retornar como queryset manteniendo el orden
-                if posts:
-                    post_ids = [post.id for post in posts]
-                    preserved = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(post_ids)])
-                    return FeedPost.objects.filter(id__in=post_ids).order_by(preserved)
-                else:
-                    return FeedPost.objects.none()
-                    
-            except Exception as e:
-                logger.error(f"Error en búsqueda vectorial, fallback a texto: {str(e)}")
-        
-        # Fallback a búsqueda tradicional
         queryset = FeedPost.objects.filter(is_public=True)
         
-        if query:
-            queryset = queryset.filter(content__icontains=query)
-        
         if tags:
             queryset = queryset.filter(tags__overlap=tags)
         
         if author:
             queryset = queryset.filter(author__username__icontains=author)
         
-        return queryset.order_by('-created_at')
+        # Con query de texto: búsqueda híbrida (texto completo + vectorial) sobre los posts filtrados
+        if query:
+            feed_service = FeedService()
+            # El embedding del query se espera sin ocupar un hilo
+            return await feed_service.asearch_posts_by_similarity(
+                query, limit=limit,
+                queryset=queryset,
+                use_embedding=use_vector_search
+            )
+        
+        queryset = queryset.select_related('author', 'poll').prefetch_related('post_files', 'poll__options').order_by('-created_at')
+        return [post async for post in queryset[:limit]]
 
 
 class FeedPostStatsView(generics.RetrieveAPIView):
@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes as perm_classes
 from rest_framework.response import Response
@@ -9,6 +10,7 @@ from django.contrib.auth import get_user_model
 
 from apps.feeds.domain.entities.feed_post import FeedPost
 from apps.feeds.domain.services.feed_service import FeedService
+from apps.feeds.domain.services.timeline_service import timeline_service
 from apps.feeds.infrastructure.api.v1.serializers.feed_serializers import (
     FeedSerializer,
     FeedRequestSerializer,
@@ -19,9 +21,11 @@ from apps.feeds.infrastructure.api.v1.serializers.feed_post_serializers import (
     FeedPostSerializer,
     FeedPostDetailSerializer,
 )
+from apps.feeds.infrastructure.api.v1.serializers.page_state import aserialize_posts
+from apps.shared.infrastructure.async_views import AsyncAPIView, async_api_view
 
 
-class FeedView(generics.GenericAPIView):
+class FeedView(AsyncAPIView, generics.GenericAPIView):
     """
     Get personalized or trending feed
     
@@ -30,7 +34,7 @@ class FeedView(generics.GenericAPIView):
     """
     permission_classes = [permissions.IsAuthenticated]
     
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         """Get feed"""
         # Parse query parameters
         serializer = FeedRequestSerializer(data=request.query_params)
@@ -45,36 +49,14 @@ class FeedView(generics.GenericAPIView):
         if author:
             try:
                 User = get_user_model()
-                author_user = User.objects.get(id=author)
+                author_user = await User.objects.aget(id=author)
                 
                 # Obtener posts del usuario específico
-                queryset = FeedPost.objects.filter(
-                    author=author_user,
-                    is_public=True
-                ).select_related('author').prefetch_related(
-                    'post_files', 'comments'
-                ).order_by('-created_at')
-                
-                # Apply cursor pagination if provided
-                if cursor:
-                    try:
-                        from datetime import datetime
-                        cursor_date = datetime.fromisoformat(cursor.replace('Z', '+00:00'))
-                        queryset = queryset.filter(created_at__lt=cursor_date)
-                    except (ValueError, TypeError):
-                        pass  # Invalid cursor, ignore
-                
-                # Get posts with limit + 1 to check if there's a next page
-                posts = list(queryset[:limit + 1])
-                has_next = len(posts) > limit
-                
-                if has_next:
-                    posts = posts[:limit]
-                
-                # Get next cursor
-                next_cursor = None
-                if has_next and posts:
-                    next_cursor = posts[-1].created_at.isoformat()
+                posts, has_next, next_cursor = await sync_to_async(FeedService().get_author_feed)(
+                    author_user,
+                    limit=limit,
+                    cursor=cursor
+                )
                 
             except User.DoesNotExist:
                 # Usuario no existe, retornar lista vacía
@@ -87,31 +69,29 @@ class FeedView(generics.GenericAPIView):
             feed_service = FeedService()
             
             if feed_type == 'personalized':
-                posts, has_next, next_cursor = feed_service.get_personalized_feed(
-                    user=request.user,
-                    limit=limit,
-                    cursor=cursor
-                )
+                # Timeline materializado en Redis; si no está disponible se consulta directamente
+                page = await sync_to_async(timeline_service.get_page)(request.user, limit=limit, cursor=cursor)
+                if page is None:
+                    page = await sync_to_async(feed_service.get_personalized_feed)(
+                        user=request.user,
+                        limit=limit,
+                        cursor=cursor
+                    )
+                posts, has_next, next_cursor = page
             elif feed_type == 'trending':
-                posts, has_next, next_cursor = feed_service.get_trending_feed(
+                posts, has_next, next_cursor = await sync_to_async(feed_service.get_trending_feed)(
                     limit=limit,
                     cursor=cursor
                 )
             else:  # latest
-                posts, has_next, next_cursor = feed_service.get_latest_feed(
+                posts, has_next, next_cursor = await sync_to_async(feed_service.get_latest_feed)(
                     limit=limit,
                     cursor=cursor
                 )
         
         # Serialize response
-        post_serializer = FeedPostSerializer(
-            posts, 
-            many=True, 
-            context={'request': request}
-        )
-        
         response_data = {
-            'posts': post_serializer.data,
+            'posts': await aserialize_posts(FeedPostSerializer, posts, {'request': request}),
             'has_next': has_next,
             'next_cursor': next_cursor,
             'total_count': len(posts)
@@ -119,7 +99,7 @@ class FeedView(generics.GenericAPIView):
         
         return Response(response_data)
     
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         """Get filtered feed"""
         # Parse request data
         request_serializer = FeedRequestSerializer(data=request.data)
@@ -135,7 +115,7 @@ class FeedView(generics.GenericAPIView):
         
         # Get filtered feed
         feed_service = FeedService()
-        posts, has_next, next_cursor = feed_service.get_filtered_feed(
+        posts, has_next, next_cursor = await sync_to_async(feed_service.get_filtered_feed)(
             user=request.user,
             feed_type=feed_type,
             filters=filters,
@@ -144,14 +124,8 @@ class FeedView(generics.GenericAPIView):
         )
         
         # Serialize response
-        post_serializer = FeedPostDetailSerializer(
-            posts, 
-            many=True, 
-            context={'request': request}
-        )
-        
         response_data = {
-            'posts': post_serializer.data,
+            'posts': await aserialize_posts(FeedPostDetailSerializer, posts, {'request': request}),
             'has_next': has_next,
             'next_cursor': next_cursor,
             'total_count': len(posts)
@@ -184,10 +158,10 @@ class UserInteractionView(generics.GenericAPIView):
         # Record interaction using service
         feed_service = FeedService()
         feed_service.handle_user_interaction(
-            user=request.user,
-            post=post,
+            user_id=request.user.id,
+            post_id=post.id,
             interaction_type=interaction_type,
-            metadata=metadata
+            post=post
         )
         
         return Response({
@@ -197,9 +171,9 @@ class UserInteractionView(generics.GenericAPIView):
         })
 
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @perm_classes([permissions.IsAuthenticated])
-def trending_posts(request):
+async def trending_posts(request):
     """
     Get trending posts
     
@@ -232,20 +206,21 @@ def trending_posts(request):
     """
     
     # Get trending posts con score calculado
-    posts = FeedPost.objects.filter(
+    queryset = FeedPost.objects.filter(
         created_at__gte=time_threshold,
         is_public=True
     ).annotate(
         hours_old=models.RawSQL(hours_old_sql, []),
-        trending_rank=models.RawSQL(trending_score_sql, []),
-        comments_count_real=models.Count('comments', filter=models.Q(comments__is_deleted=False))
+        trending_rank=models.RawSQL(trending_score_sql, [])
+    ).select_related('author', 'poll').prefetch_related(
+        'post_files', 'poll__options'
     ).order_by('-trending_rank', '-engagement_score', '-created_at')[:limit]
+    posts = [post async for post in queryset]
     
     # Serialize
-    serializer = FeedPostDetailSerializer(posts, many=True, context={'request': request})
+    post_data = await aserialize_posts(FeedPostDetailSerializer, posts, {'request': request})
     
     # Agregar metadatos de trending a la respuesta
-    post_data = serializer.data
     for i, post in enumerate(posts):
         post_data[i]['trending_metadata'] = {
             'hours_old': round(post.hours_old, 1),
@@ -308,9 +283,9 @@ def user_feed_stats(request):
     return Response(stats)
 
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @perm_classes([permissions.IsAuthenticated])
-def feed_recommendations(request):
+async def feed_recommendations(request):
     """
     Get personalized feed recommendations
     
@@ -318,22 +293,19 @@ def feed_recommendations(request):
     """
     limit = min(int(request.GET.get('limit', 10)), 50)
     
-    # Get recommendations using service
-    feed_service = FeedService()
-    posts, has_next, next_cursor = feed_service.get_personalized_feed(
-        user=request.user,
-        limit=limit
-    )
+    # Get recommendations from the materialized timeline, falling back to the service
+    page = await sync_to_async(timeline_service.get_page)(request.user, limit=limit)
+    if page is None:
+        feed_service = FeedService()
+        page = await sync_to_async(feed_service.get_personalized_feed)(
+            user=request.user,
+            limit=limit
+        )
+    posts, has_next, next_cursor = page
     
     # Serialize
-    serializer = FeedPostDetailSerializer(
-        posts, 
-        many=True, 
-        context={'request': request}
-    )
-    
     return Response({
-        'recommendations': serializer.data,
+        'recommendations': await aserialize_posts(FeedPostDetailSerializer, posts, {'request': request}),
         'has_next': has_next,
         'next_cursor': next_cursor,
         'total_count': len(posts)
@@ -354,40 +326,25 @@ class UserPostsView(generics.ListAPIView):
         user = self.request.user
         queryset = FeedPost.objects.filter(
             author=user
-        ).select_related('author').prefetch_related(
-            'post_files', 'comments'
+        ).select_related('author', 'poll').prefetch_related(
+            'post_files', 'poll__options'
         ).order_by('-created_at')
         
         return queryset
     
     def list(self, request, *args, **kwargs):
         """List user posts with pagination"""
-        queryset = self.get_queryset()
-        
         # Parse pagination parameters
         limit = min(int(request.GET.get('limit', 20)), 50)
         cursor = request.GET.get('cursor')
         
-        # Apply cursor pagination if provided
-        if cursor:
-            try:
-                from datetime import datetime
-                cursor_date = datetime.fromisoformat(cursor.replace('Z', '+00:00'))
-                queryset = queryset.filter(created_at__lt=cursor_date)
-            except (ValueError, TypeError):
-                pass  # Invalid cursor, ignore
-        
-        # Get posts with limit + 1 to check if there's a next page
-        posts = list(queryset[:limit + 1])
-        has_next = len(posts) > limit
-        
-        if has_next:
-            posts = posts[:limit]
-        
-        # Get next cursor
-        next_cursor = None
-        if has_next and posts:
-            next_cursor = posts[-1].created_at.isoformat()
+        # Keyset pagination over (created_at, id), including the user's private posts
+        posts, has_next, next_cursor = FeedService().get_author_feed(
+            request.user,
+            limit=limit,
+            cursor=cursor,
+            include_private=True
+        )
         
         # Serialize posts
         serializer = self.get_serializer(posts, many=True)
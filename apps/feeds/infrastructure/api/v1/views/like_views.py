@@ -109,26 +109,7 @@ def like_post(request, post_id):
     
     elif request.method == 'DELETE':
         # Remove like specifically
-        ct = ContentType.objects.get_for_model(FeedPost)
-        
-        # Check if like exists and remove it
-        like_exists = Like.objects.filter(
-            user=request.user,
-            content_type=ct,
-            object_id=post.id
-        ).exists()
-        
-        if like_exists:
-            Like.objects.filter(
-                user=request.user,
-                content_type=ct,
-                object_id=post.id
-            ).delete()
-            
-            # Update likes count
-            post.likes_count = max(0, post.likes_count - 1)
-            post.save(update_fields=['likes_count'])
-            
+        if Like.remove_like(request.user, post):
             return Response({
                 'liked': False,
                 'likes_count': post.likes_count,
@@ -172,26 +153,7 @@ def like_comment(request, comment_id):
     
     elif request.method == 'DELETE':
         # Remove like specifically
-        ct = ContentType.objects.get_for_model(Comment)
-        
-        # Check if like exists and remove it
-        like_exists = Like.objects.filter(
-            user=request.user,
-            content_type=ct,
-            object_id=comment.id
-        ).exists()
-        
-        if like_exists:
-            Like.objects.filter(
-                user=request.user,
-                content_type=ct,
-                object_id=comment.id
-            ).delete()
-            
-            # Update likes count
-            comment.likes_count = max(0, comment.likes_count - 1)
-            comment.save(update_fields=['likes_count'])
-            
+        if Like.remove_like(request.user, comment):
             return Response({
                 'liked': False,
                 'likes_count': comment.likes_count,
@@ -158,7 +158,8 @@ def get_poll_details(request, poll_id):
     Obtiene los detalles de una encuesta incluyendo si el usuario ya votó
     """
     try:
-        poll = get_object_or_404(Poll, id=poll_id)
+        # Las opciones se leen una vez para el listado y para total_votes
+        poll = get_object_or_404(Poll.objects.prefetch_related('options'), id=poll_id)
         serializer = PollSerializer(poll, context={'request': request})
         
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,86 @@
+"""
+Trabajos en segundo plano del módulo de feeds
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.feeds.domain.entities.feed_post import FeedPost
+from apps.feeds.domain.services.counter_service import FLUSH_TASK, post_counter_service
+from apps.feeds.domain.services.engagement_service import RECOMPUTE_TASK, recompute_chunk
+from apps.feeds.domain.services.feed_service import feed_service
+from apps.feeds.domain.services.timeline_service import timeline_service
+from apps.shared.infrastructure.task_queue import register_task, task_queue
+
+logger = logging.getLogger(__name__)
+
+
+@register_task('feeds.update_post_embedding')
+def update_post_embedding(post_id: str) -> bool:
+    """
+    Genera el embedding de un post. Si el post fue eliminado el trabajo se da por terminado.
+    """
+    if not FeedPost.objects.filter(id=post_id).exists():
+        logger.info(f"Post {post_id} eliminado antes de generar su embedding")
+        return True
+    success = feed_service.update_post_embedding(post_id)
+    if success:
+        # Con el embedding listo el post ya se puede puntuar para cada timeline
+        task_queue.enqueue('feeds.fan_out_post', str(post_id), post_id=str(post_id))
+    return success
+
+
+@register_task('feeds.fan_out_post')
+def fan_out_post(post_id: str) -> bool:
+    """
+    Distribuye un post a los timelines materializados de los usuarios activos
+    """
+    return timeline_service.fan_out_post(post_id)
+
+
+@register_task('feeds.rebuild_timeline')
+def rebuild_timeline(user_id: str) -> bool:
+    """
+    Recalcula el timeline de un usuario activo tras cambiar su vector de feed
+    """
+    return timeline_service.rebuild_if_active(user_id)
+
+
+@register_task(FLUSH_TASK)
+def flush_post_counters() -> bool:
+    """
+    Vuelca a la base de datos los contadores de vistas, compartidos y likes
+    acumulados en Redis y recalcula el engagement_score de esos posts
+    """
+    return post_counter_service.flush_all()
+
+
+@register_task(RECOMPUTE_TASK)
+def recompute_engagement_scores(after: str = None, ref_time: str = None) -> bool:
+    """
+    Recalcula periódicamente el engagement_score de todos los posts para que el
+    decaimiento temporal se refleje también en los posts sin interacciones
+
+    Cada trabajo recalcula un solo chunk y encola el siguiente, así ningún
+    trabajo se acerca al plazo de visibilidad de la cola aunque la tabla sea grande.
+
+    Args:
+        after: Último id del chunk anterior; None al empezar un ciclo
+        ref_time: Instante de referencia del ciclo, común a todos sus chunks
+    """
+    if after is None:
+        # Se reprograma antes de ejecutar para que un fallo no corte la periodicidad
+        task_queue.enqueue_now(RECOMPUTE_TASK, 'all', delay=settings.FEED_ENGAGEMENT_RECOMPUTE_INTERVAL)
+        ref_time = timezone.now().isoformat()
+
+    last_id = recompute_chunk(
+        uuid.UUID(after) if after else None,
+        ref_time=parse_datetime(ref_time)
+    )
+    if last_id is None:
+        return True
+    # Si no se pudo encolar, el reintento recalcula el chunk de nuevo y vuelve a intentarlo
+    return task_queue.enqueue_now(RECOMPUTE_TASK, f'after:{last_id}', after=str(last_id), ref_time=ref_time)
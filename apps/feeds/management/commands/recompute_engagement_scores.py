@@ -0,0 +1,91 @@
+"""
+Management command para recalcular el engagement_score de todos los posts
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.feeds.domain.services.engagement_service import RECOMPUTE_TASK, RecomputeReport, id_ranges, recompute_range
+from apps.shared.infrastructure.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Recalcula en SQL el engagement_score (decaimiento temporal) de todos los posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Rangos de id procesados en paralelo, cada uno con su conexión (default: 1)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.FEED_ENGAGEMENT_RECOMPUTE_CHUNK_SIZE,
+            help=f'Posts por UPDATE (default: {settings.FEED_ENGAGEMENT_RECOMPUTE_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='No escribe nada; reporta la deriva entre el score almacenado y el recalculado',
+        )
+        parser.add_argument(
+            '--drift-threshold',
+            type=float,
+            default=settings.FEED_ENGAGEMENT_DRIFT_THRESHOLD,
+            help=f'Diferencia a partir de la cual un score se reporta como desfasado (default: {settings.FEED_ENGAGEMENT_DRIFT_THRESHOLD})',
+        )
+        parser.add_argument(
+            '--schedule',
+            action='store_true',
+            help='Programa el recalculo periódico en la cola de trabajos en lugar de ejecutarlo ahora',
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            interval = settings.FEED_ENGAGEMENT_RECOMPUTE_INTERVAL
+            if task_queue.enqueue_now(RECOMPUTE_TASK, 'all'):
+                self.stdout.write(self.style.SUCCESS(f'Recalculo programado cada {interval} segundos'))
+            else:
+                self.stdout.write(self.style.ERROR('No se pudo programar el recalculo'))
+            return
+
+        dry_run = options['dry_run']
+        ranges = id_ranges(options['workers'])
+
+        def run(bounds):
+            close_old_connections()
+            try:
+                start, end = bounds
+                return recompute_range(
+                    start, end,
+                    chunk_size=options['chunk_size'],
+                    dry_run=dry_run,
+                    drift_threshold=options['drift_threshold']
+                )
+            finally:
+                close_old_connections()
+
+        self.stdout.write(f"{'Simulando' if dry_run else 'Recalculando'} engagement_score en {len(ranges)} rangos...")
+
+        report = RecomputeReport(options['drift_threshold'])
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix='engagement-recompute') as executor:
+            for partial in executor.map(run, ranges):
+                report.merge(partial)
+
+        self.stdout.write(f'Posts procesados: {report.rows}')
+        self.stdout.write(f'Deriva media: {report.mean_drift:.4f}')
+        self.stdout.write(f'Deriva máxima: {report.max_drift:.4f} (post {report.max_drift_post})')
+        self.stdout.write(
+            self.style.WARNING(f'Posts con deriva > {report.threshold}: {report.drifted}')
+            if report.drifted else
+            self.style.SUCCESS(f'Ningún post con deriva > {report.threshold}')
+        )
+        if not dry_run:
+            self.stdout.write(self.style.SUCCESS('engagement_score actualizado'))
@@ -0,0 +1,159 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.feeds.domain.entities.comment import Comment
+from apps.feeds.domain.entities.feed_post import FeedPost
+from apps.feeds.domain.entities.like import Like
+from apps.feeds.domain.entities.poll import Poll, PollOption, PollVote
+
+User = get_user_model()
+
+# Columnas vector(768) de posts y usuarios
+VECTOR_COLUMNS = re.compile(r'"(embedding|feed_recommendations_embedding|job_recommendations_embedding)"')
+
+
+class FeedQueryCountTests(TestCase):
+    """
+    El número de consultas de los endpoints del feed no depende del tamaño de
+    la página: el estado del usuario y los conteos se cargan una vez por página
+    (FeedPageState), no una vez por post, comentario u opción.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='lector@example.com', password='x', first_name='Ana', last_name='Lectora'
+        )
+        self.author = User.objects.create_user(
+            username='autor@example.com', password='x', first_name='Luis', last_name='Autor'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _poll(self, options: int) -> Poll:
+        poll = Poll.objects.create(question='¿Cuál prefieres?')
+        created = [PollOption.objects.create(poll=poll, text=f'Opción {i}', order=i) for i in range(options)]
+        PollVote.objects.create(user=self.user, poll=poll, option=created[0])
+        return poll
+
+    def _comment(self, post: FeedPost, parent: Comment = None) -> Comment:
+        comment = Comment.objects.create(post=post, author=self.author, parent_comment=parent, content='Comentario')
+        Like.objects.create(user=self.user, content_object=comment)
+        return comment
+
+    def _post(self, comments: int = 2, options: int = 2) -> FeedPost:
+        post = FeedPost.objects.create(author=self.author, content='Contenido del post', poll=self._poll(options))
+        Like.objects.create(user=self.user, content_object=post)
+        for _ in range(comments):
+            self._comment(post, parent=self._comment(post))
+        return post
+
+    def _count_queries(self, url: str, **params) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def assertConstantQueries(self, url_for, grow, **params):
+        """
+        Ejecuta el endpoint antes y después de ampliar los datos y comprueba que
+        el número de consultas no cambia
+        """
+        before = self._count_queries(url_for(), **params)
+        grow()
+        after = self._count_queries(url_for(), **params)
+        self.assertEqual(before, after, f'{url_for()}: {before} consultas con menos datos, {after} con más')
+
+    def test_feed_page(self):
+        for _ in range(2):
+            self._post()
+        self.assertConstantQueries(
+            lambda: '/api/v1/feed/', lambda: [self._post() for _ in range(4)], feed_type='latest', limit=20
+        )
+
+    def test_user_posts_page(self):
+        self.client.force_authenticate(self.author)
+        for _ in range(2):
+            self._post()
+        self.assertConstantQueries(lambda: '/api/v1/user/posts/', lambda: [self._post() for _ in range(4)])
+
+    def test_post_detail(self):
+        post = self._post(comments=1, options=2)
+
+        def grow():
+            for _ in range(4):
+                self._comment(post, parent=self._comment(post))
+            for i in range(4):
+                PollOption.objects.create(poll=post.poll, text=f'Extra {i}', order=10 + i)
+
+        self.assertConstantQueries(lambda: f'/api/v1/posts/{post.id}/', grow)
+
+    def test_post_comments(self):
+        post = self._post(comments=2)
+
+        def grow():
+            for _ in range(6):
+                self._comment(post, parent=self._comment(post))
+
+        self.assertConstantQueries(lambda: f'/api/v1/posts/{post.id}/comments/', grow)
+
+    def test_poll_detail(self):
+        poll = self._poll(options=2)
+
+        def grow():
+            for i in range(6):
+                option = PollOption.objects.create(poll=poll, text=f'Extra {i}', order=10 + i)
+                PollVote.objects.create(user=self.author, poll=poll, option=option)
+
+        self.assertConstantQueries(lambda: f'/api/v1/polls/{poll.id}/', grow)
+
+    def test_poll_detail_query_count(self):
+        poll = self._poll(options=4)
+        # Encuesta, opciones y votos del usuario
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/v1/polls/{poll.id}/')
+        self.assertEqual(response.status_code, 200)
+
+
+class ListVectorColumnsTests(TestCase):
+    """
+    Los listados no transfieren columnas vector: los managers las difieren y
+    solo las consultas que las necesitan (búsqueda por similitud) las leen.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='lector@example.com', password='x', first_name='Ana', last_name='Lectora',
+            feed_recommendations_embedding=[0.1] * 768, job_recommendations_embedding=[0.1] * 768
+        )
+        self.post = FeedPost.objects.create(author=self.user, content='Contenido del post', embedding=[0.1] * 768)
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Comentario')
+        Like.objects.create(user=self.user, content_object=self.post)
+        Like.objects.create(user=self.user, content_object=comment)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertNoVectorColumns(self, url: str, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        leaked = [query['sql'] for query in queries if VECTOR_COLUMNS.search(query['sql'])]
+        self.assertEqual(leaked, [], f'{url} lee columnas vector')
+
+    def test_feed_lists(self):
+        self.assertNoVectorColumns('/api/v1/feed/', feed_type='latest')
+        self.assertNoVectorColumns('/api/v1/feed/', feed_type='trending')
+        self.assertNoVectorColumns('/api/v1/feed/trending/')
+        self.assertNoVectorColumns('/api/v1/user/posts/')
+        self.assertNoVectorColumns('/api/v1/posts/')
+
+    def test_comment_lists(self):
+        self.assertNoVectorColumns(f'/api/v1/posts/{self.post.id}/comments/')
+
+    def test_like_lists(self):
+        self.assertNoVectorColumns(f'/api/v1/posts/{self.post.id}/likes/')
+        self.assertNoVectorColumns('/api/v1/likes/user/')
@@ -7,6 +7,7 @@ class JobsConfig(AppConfig):
     
     def ready(self):
         """
-        Importa los signals cuando la app está lista
+        Importa los signals y los trabajos en segundo plano cuando la app está lista
         """
         import apps.jobs.infrastructure.signals
+        import apps.jobs.infrastructure.tasks
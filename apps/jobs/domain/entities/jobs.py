@@ -1,7 +1,14 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
-from pgvector.django import VectorField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Upper
+from pgvector.django import VectorField, HnswIndex
 from apps.custom_auth.domain.entities.company import Company
+from apps.shared.infrastructure.vector_queryset import VectorManager
+
+# Configuración de texto de las ofertas
+SEARCH_CONFIG = 'spanish'
 
 
 class Jobs(models.Model):
@@ -37,12 +44,29 @@ class Jobs(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
       # Campo para el vector de embeddings (768 dimensiones según el microservicio)
     embedding = VectorField(dimensions=768, null=True, blank=True, verbose_name="Vector de embedding para recomendaciones")
+    embedding_pending = models.BooleanField(default=False, verbose_name="Embedding pendiente de generar")
     
     # Campos para métricas de recomendación
     interactions_score = models.FloatField(default=0.0, verbose_name="Score de interacciones")
     view_count = models.IntegerField(default=0, verbose_name="Número de visualizaciones")
     application_count = models.IntegerField(default=0, verbose_name="Número de aplicaciones")
 
+    # Texto completo calculado por Postgres: título > requisitos > descripción
+    # (el nombre de la empresa, peso D, está en Company.search_vector)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', config=SEARCH_CONFIG, weight='A') +
+            SearchVector('requirements', config=SEARCH_CONFIG, weight='B') +
+            SearchVector('description', config=SEARCH_CONFIG, weight='C')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Vector de búsqueda de texto completo"
+    )
+
+    # No carga el vector salvo con with_vectors(); el tsvector nunca
+    objects = VectorManager()
+
     def __str__(self):
         return f"{self.title} - {self.company.company_name}"
     
@@ -59,3 +83,12 @@ class Jobs(models.Model):
         verbose_name = 'Trabajo'
         verbose_name_plural = 'Trabajos'
         ordering = ['-created_at']
+        base_manager_name = 'objects'
+        indexes = [
+            # Índice ANN para el operador <#> (producto interno) de las consultas de similitud
+            HnswIndex(name='jobs_embedding_hnsw', fields=['embedding'], m=16, ef_construction=64, opclasses=['vector_ip_ops']),
+            # Índice de texto completo para el operador @@ de la búsqueda léxica
+            GinIndex(name='jobs_search_gin', fields=['search_vector']),
+            # Trigramas para location__icontains (UPPER(location) LIKE ...) y el autocompletado
+            GinIndex(OpClass(Upper('location'), name='gin_trgm_ops'), name='jobs_location_trgm'),
+        ]
@@ -1,6 +1,7 @@
 from django.db import models
 from apps.jobs.domain.entities.jobs import Jobs
 from apps.custom_auth.domain.entities.user import User
+from apps.shared.infrastructure.vector_queryset import VectorManager
 
 
 class Postulants(models.Model):
@@ -22,6 +23,9 @@ class Postulants(models.Model):
     applied_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de aplicación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
 
+    # select_related('user', 'job') no trae los vectores del usuario ni del trabajo
+    objects = VectorManager()
+
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.job.title}"
     
@@ -0,0 +1,179 @@
+"""
+Búsqueda híbrida de ofertas de trabajo con facetas
+
+La búsqueda léxica usa el tsvector ponderado de la oferta (título > requisitos
+> descripción) concatenado con el del nombre de la empresa (peso D), ambos con
+índice GIN, y se fusiona con los vecinos más cercanos del embedding de la
+consulta mediante reciprocal rank fusion (rank_fusion_ids).
+
+Las facetas (job_type, experience_level, is_remote) se cuentan sobre todas
+las ofertas que coinciden con la consulta y los filtros, en una única consulta
+con GROUPING SETS.
+
+Los filtros de ubicación y empresa (``icontains``) y el autocompletado usan
+índices de trigramas sobre UPPER(location) y UPPER(company_name), que es la
+expresión que Django genera para icontains en Postgres.
+"""
+import logging
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.contrib.postgres.search import CombinedSearchVector, SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from apps.custom_auth.domain.entities.company import Company
+from apps.jobs.domain.entities.jobs import SEARCH_CONFIG, Jobs
+from apps.shared.domain.services.hybrid_search import compile_queryset, rank_fusion_ids
+from apps.shared.domain.services.vector_search import VectorParam, vector_search_planner
+
+logger = logging.getLogger(__name__)
+
+FACET_FIELDS = ('job_type', 'experience_level', 'is_remote')
+
+# Campo de autocompletado -> (modelo, columna con índice de trigramas)
+SUGGEST_FIELDS = {
+    'location': (Jobs, 'location'),
+    'company': (Company, 'company_name'),
+}
+
+
+class HybridJobSearch:
+    """
+    Búsqueda de ofertas con fusión por rango recíproco de texto completo y vectores
+    """
+
+    def __init__(self):
+        self.min_similarity = settings.JOB_SEARCH_MIN_SIMILARITY
+
+    @staticmethod
+    def _search_query(query: str) -> SearchQuery:
+        # 'simple' encuentra nombres propios y siglas que el stemming en español altera
+        return (
+            SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch') |
+            SearchQuery(query, config='simple', search_type='websearch')
+        )
+
+    @staticmethod
+    def _lexical_match(search_query: SearchQuery) -> Q:
+        # Un OR a través del JOIN no puede usar ningún índice GIN: se unen los ids
+        # de las ofertas que coinciden (GIN de jobs) y los de las ofertas de las
+        # empresas que coinciden (GIN de companies + índice de company_id)
+        by_job = Jobs.objects.filter(search_vector=search_query).order_by().values('pk')
+        by_company = Jobs.objects.filter(
+            company_id__in=Company.objects.filter(search_vector=search_query).values('pk')
+        ).order_by().values('pk')
+        return Q(pk__in=by_job.union(by_company))
+
+    def _semantic(self, queryset: QuerySet, embedding: Optional[Sequence[float]], k: int) -> Optional[QuerySet]:
+        if not embedding:
+            return None
+        return vector_search_planner.candidates(
+            queryset, 'embedding', VectorParam(embedding), k
+        ).values_list('pk', 'ann_distance')
+
+    def search(self, query: str, embedding: Optional[Sequence[float]] = None, queryset: QuerySet = None,
+               limit: int = 20, ef_search: int = None, probes: int = None) -> List[Jobs]:
+        """
+        Ofertas más relevantes para la consulta, en orden de fusión
+
+        Args:
+            query: Texto de búsqueda
+            embedding: Embedding de la consulta; None para buscar solo por texto
+            queryset: Ofertas candidatas con los filtros aplicados
+            limit: Número máximo de resultados
+            ef_search: Recall del índice HNSW para esta consulta
+            probes: Recall del índice IVFFlat para esta consulta
+        """
+        queryset = Jobs.objects.all() if queryset is None else queryset
+        k = vector_search_planner.candidate_limit(limit)
+        search_query = self._search_query(query)
+
+        # Pesos por defecto de ts_rank: A=1.0, B=0.4, C=0.2, D=0.1
+        document = CombinedSearchVector(F('search_vector'), '||', F('company__search_vector'), None)
+        lexical = queryset.filter(self._lexical_match(search_query)).annotate(
+            lexical_rank=SearchRank(document, search_query, cover_density=True)
+        ).order_by('-lexical_rank').values_list('pk', 'lexical_rank')[:k]
+
+        ids = rank_fusion_ids(
+            lexical, self._semantic(queryset, embedding, k), limit=limit,
+            min_similarity=self.min_similarity, ef_search=ef_search, probes=probes
+        )
+        if not ids:
+            return []
+
+        jobs = Jobs.objects.filter(id__in=ids).select_related('company').in_bulk()
+        logger.info(f"Búsqueda híbrida de trabajos para '{query}': {len(ids)} resultados ({'texto y vectores' if embedding else 'solo texto'})")
+        return [jobs[job_id] for job_id in ids if job_id in jobs]
+
+    def facet_counts(self, query: str, embedding: Optional[Sequence[float]] = None, queryset: QuerySet = None,
+                     limit: int = 20, ef_search: int = None, probes: int = None) -> Dict[str, Dict[Any, int]]:
+        """
+        Número de ofertas por job_type, experience_level e is_remote entre las que
+        coinciden con la consulta (texto completo o candidatos semánticos)
+
+        Returns:
+            {'job_type': {'full_time': 12, ...}, 'experience_level': {...}, 'is_remote': {True: 3, False: 9}}
+        """
+        queryset = Jobs.objects.all() if queryset is None else queryset
+        k = vector_search_planner.candidate_limit(limit)
+        match = self._lexical_match(self._search_query(query))
+
+        ctes, params = '', []
+        semantic = self._semantic(queryset, embedding, k)
+        if semantic is not None:
+            semantic_sql, semantic_params = compile_queryset(semantic)
+            ctes = f'WITH semantic (id, distance) AS ({semantic_sql}) '
+            params.extend(semantic_params)
+            match |= Q(pk__in=RawSQL('SELECT id FROM semantic WHERE 1.0 - distance >= %s', [self.min_similarity]))
+
+        matched_sql, matched_params = compile_queryset(queryset.filter(match).order_by().values(*FACET_FIELDS))
+        params.extend(matched_params)
+        columns = ', '.join(FACET_FIELDS)
+        sets = ', '.join(f'({field})' for field in FACET_FIELDS)
+        sql = (
+            f"{ctes}SELECT {columns}, COUNT(*) FROM ({matched_sql}) AS matched "
+            f"GROUP BY GROUPING SETS ({sets})"
+        )
+
+        alias = queryset.db
+        session = (
+            vector_search_planner.session(alias, k, ef_search, probes) if semantic is not None else nullcontext()
+        )
+        with session, connections[alias].cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        facets = {field: {} for field in FACET_FIELDS}
+        # Los tres campos son NOT NULL: en cada fila solo el del conjunto agrupado tiene valor
+        for row in rows:
+            for field, value in zip(FACET_FIELDS, row):
+                if value is not None:
+                    facets[field][value] = row[-1]
+        return facets
+
+    def suggest(self, field: str, term: str, limit: int = 10) -> List[str]:
+        """
+        Autocompletado de ubicaciones o nombres de empresa
+
+        Args:
+            field: 'location' o 'company'
+            term: Texto escrito por el usuario
+            limit: Número máximo de sugerencias
+        """
+        if field not in SUGGEST_FIELDS or not term:
+            return []
+        model, column = SUGGEST_FIELDS[field]
+        return list(
+            model.objects.filter(**{f'{column}__icontains': term})
+            .annotate(similarity=TrigramSimilarity(column, term))
+            .order_by('-similarity', column)
+            .values_list(column, flat=True)
+            .distinct()[:limit]
+        )
+
+
+# Instancia global del servicio
+hybrid_job_search = HybridJobSearch()
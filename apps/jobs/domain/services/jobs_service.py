@@ -1,10 +1,12 @@
 """
 Servicio principal para manejo de trabajos con embeddings y recomendaciones
 """
-import requests
+import asyncio
 import logging
-from typing import List, Optional, Dict, Any
-from django.db.models import QuerySet, F, Q
+from typing import List, Optional, Dict, Any, Tuple
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+from django.db.models import QuerySet, F, ExpressionWrapper, FloatField
 from django.db.models.expressions import RawSQL
 from django.conf import settings
 from django.utils import timezone
@@ -13,7 +15,10 @@ from datetime import timedelta
 
 # Importar modelos de jobs
 from apps.jobs.domain.entities.jobs import Jobs
+from apps.jobs.domain.services.job_search_service import hybrid_job_search
 from apps.jobs.domain.services.vector_recommendation_service import VectorRecommendationService
+from apps.shared.domain.services.embedding_client import get_embedding_client
+from apps.shared.domain.services.vector_search import VectorParam, vector_search_planner, vector_similarity
 
 # Importar servicio de vectores de usuario si existe
 try:
@@ -32,45 +37,14 @@ class JobsService:
     
     def __init__(self, embedding_service_url: str = None):
         self.embedding_service_url = embedding_service_url or settings.EMBEDDING_SERVICE_URL
+        self.embedding_client = get_embedding_client(self.embedding_service_url)
         self.vector_service = VectorRecommendationService(embedding_service_url)
     
     def get_embedding_from_microservice(self, text: str) -> Optional[List[float]]:
         """
         Obtiene embedding de texto desde el microservicio
         """
-        try:
-            payload = {
-                "text": text,
-                "translate_to_english": True,
-                "clean_text": True
-            }
-            
-            response = requests.post(
-                f"{self.embedding_service_url}/text-processing/vectorize/",
-                json=payload,
-                timeout=30,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                vector = result.get('vector')
-                if vector:
-                    logger.info(f"Embedding generado para texto. Dimensiones: {result.get('dimension', len(vector))}")
-                    return vector
-                else:
-                    logger.error("El microservicio no devolvió un vector válido")
-                    return None
-            else:
-                logger.error(f"Error al obtener embedding: {response.status_code} - {response.text}")
-                return None
-                
-        except requests.RequestException as e:
-            logger.error(f"Error de conexión con microservicio: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Error inesperado: {str(e)}")
-            return None
+        return self.embedding_client.embed(text)
     
     def update_job_embedding(self, job_id: int) -> bool:
         """
@@ -155,12 +129,12 @@ class JobsService:
                 user_obj = user
                 user_id = str(user.id)
             else:
-                user_obj = User.objects.get(id=user_id)
+                user_obj = User.objects.with_vectors().get(id=user_id)
             
             logger.info(f"Obteniendo recomendaciones de trabajos para usuario {user_id}")
             
             # Verificar si el usuario tiene embedding para recomendaciones
-            if hasattr(user_obj, 'job_recommendations_embedding') and user_obj.job_recommendations_embedding:
+            if getattr(user_obj, 'job_recommendations_embedding', None) is not None:
                 # Usar embedding del usuario para recomendaciones
                 user_embedding = user_obj.job_recommendations_embedding
                 return self._get_vector_based_recommendations(user_embedding, limit)
@@ -176,33 +150,45 @@ class JobsService:
             logger.error(f"Error obteniendo recomendaciones: {str(e)}")
             return self._get_basic_recommendations(user_obj if 'user_obj' in locals() else None, limit)
     
-    def _get_vector_based_recommendations(self, user_embedding: List[float], limit: int) -> QuerySet:
+    def _get_vector_based_recommendations(self, user_embedding: List[float], limit: int,
+                                          ef_search: int = None, probes: int = None) -> QuerySet:
         """
         Obtiene recomendaciones basadas en similitud de vectores
         """
         try:
-            embedding_str = '[' + ','.join(map(str, user_embedding)) + ']'
+            # Vector del usuario enlazado una sola vez como parámetro
+            query_vector = VectorParam(user_embedding)
+            
+            # Candidatos del índice ANN, el score compuesto se calcula solo sobre ellos
+            candidate_ids = vector_search_planner.nearest_ids(
+                Jobs.objects.all(), 'embedding', query_vector,
+                k=vector_search_planner.candidate_limit(limit),
+                ef_search=ef_search, probes=probes
+            )
             
             # Calcular similitud coseno (1 - distancia coseno)
-            similarity_sql = f"(1 - (embedding <#> '{embedding_str}'))"
+            similarity = vector_similarity('embedding', query_vector)
             
-            # Score compuesto: similitud + popularidad + recencia
+            # Score compuesto: similitud (60%) + popularidad + recencia
             hours_old_sql = "EXTRACT(EPOCH FROM (NOW() - created_at)) / 3600"
             
-            composite_score_sql = f"""
+            secondary_score_sql = f"""
                 (
-                    ({similarity_sql}) * 0.6 +
                     (LEAST(view_count, 100) / 100.0) * 0.2 +
                     (LEAST(application_count, 50) / 50.0) * 0.1 +
                     (1.0 / (1.0 + ({hours_old_sql}) / 168.0)) * 0.1
                 )
             """
+            composite_score = ExpressionWrapper(
+                similarity * 0.6 + RawSQL(secondary_score_sql, [], output_field=FloatField()),
+                output_field=FloatField()
+            )
             
             queryset = Jobs.objects.filter(
-                embedding__isnull=False
+                id__in=candidate_ids
             ).annotate(
-                similarity=RawSQL(similarity_sql, []),
-                composite_score=RawSQL(composite_score_sql, [])
+                similarity=similarity,
+                composite_score=composite_score
             ).order_by('-composite_score')[:limit]
             
             logger.info(f"Recomendaciones vectoriales generadas: {queryset.count()} trabajos")
@@ -290,68 +276,89 @@ class JobsService:
             logger.error(f"Error obteniendo trabajos trending: {str(e)}")
             return Jobs.objects.all().order_by('-view_count', '-created_at')[:limit]
     
-    def semantic_search_jobs(self, query: str, filters: Dict[str, Any] = None, limit: int = 20, user=None) -> QuerySet:
+    def semantic_search_jobs(self, query: str, filters: Dict[str, Any] = None, limit: int = 20, user=None,
+                             ef_search: int = None, probes: int = None) -> List[Jobs]:
         """
-        Búsqueda semántica de trabajos usando embeddings
+        Búsqueda híbrida de trabajos: texto completo y similitud de embeddings
         """
-        try:
-            # Obtener embedding de la consulta
-            query_embedding = self.get_embedding_from_microservice(query)
-            
-            if not query_embedding:
-                # Fallback a búsqueda textual
-                logger.warning("No se pudo obtener embedding, usando búsqueda textual")
-                return self._text_search_jobs(query, filters, limit)
-            
-            # Búsqueda por similitud de vectores
-            embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
-            similarity_sql = f"(1 - (embedding <#> '{embedding_str}'))"
-            
-            queryset = Jobs.objects.filter(
-                embedding__isnull=False
-            )
-            
-            # Aplicar filtros
-            if filters:
-                queryset = self._apply_filters(queryset, filters)
-            
-            # Ordenar por similitud
-            queryset = queryset.annotate(
-                similarity=RawSQL(similarity_sql, [])
-            ).order_by('-similarity')[:limit]
-            
-            logger.info(f"Búsqueda semántica completada: {queryset.count()} resultados")
-            
-            # Registrar interacción de búsqueda si hay usuario
-            if user and user_vector_service:
-                user_vector_service.update_user_vectors_on_interaction(
-                    user_id=str(user.id),
-                    interaction_type='job_search',
-                    content=query
-                )
-            
-            return queryset
-            
-        except Exception as e:
-            logger.error(f"Error en búsqueda semántica: {str(e)}")
-            return self._text_search_jobs(query, filters, limit)
+        # Obtener embedding de la consulta
+        query_embedding = self.get_embedding_from_microservice(query)
+        results, _ = self._hybrid_search(query, query_embedding, filters, limit, ef_search, probes)
+        
+        # Registrar interacción de búsqueda si hay usuario
+        if user and user_vector_service:
+            self._register_search(user, query)
+        
+        return results
     
-    def _text_search_jobs(self, query: str, filters: Dict[str, Any] = None, limit: int = 20) -> QuerySet:
+    async def asemantic_search_jobs(self, query: str, filters: Dict[str, Any] = None, limit: int = 20, user=None,
+                                    ef_search: int = None, probes: int = None,
+                                    with_facets: bool = False) -> Tuple[List[Jobs], Optional[Dict[str, Dict]]]:
         """
-        Búsqueda textual fallback cuando no hay embeddings disponibles
+        Versión asyncio de semantic_search_jobs
+        
+        El embedding de la consulta se espera sin ocupar un hilo y, mientras
+        tanto, se registra la interacción de búsqueda del usuario
+        
+        Returns:
+            (trabajos ordenados por relevancia, facetas o None si no se piden)
         """
-        queryset = Jobs.objects.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(requirements__icontains=query) |
-            Q(company__company_name__icontains=query)
+        if user and user_vector_service:
+            query_embedding, _ = await asyncio.gather(
+                self.embedding_client.aembed(query),
+                sync_to_async(self._register_search)(user, query)
+            )
+        else:
+            query_embedding = await self.embedding_client.aembed(query)
+        
+        return await sync_to_async(self._hybrid_search)(
+            query, query_embedding, filters, limit, ef_search, probes, with_facets
         )
+    
+    def _register_search(self, user, query: str):
+        user_vector_service.update_user_vectors_on_interaction(
+            user_id=str(user.id),
+            interaction_type='job_search',
+            content=query
+        )
+    
+    def _hybrid_search(self, query: str, query_embedding: Optional[List[float]], filters: Dict[str, Any],
+                       limit: int, ef_search: int = None, probes: int = None,
+                       with_facets: bool = False) -> Tuple[List[Jobs], Optional[Dict[str, Dict]]]:
+        """
+        Parte de base de datos de la búsqueda, con el embedding de la consulta ya calculado
+        
+        Un error de la búsqueda léxica se propaga (la vista responde 500) en lugar
+        de devolverse como una lista vacía de resultados.
+        """
+        if not query_embedding:
+            logger.warning("No se pudo obtener embedding, usando solo búsqueda de texto completo")
         
-        # Aplicar filtros
+        queryset = Jobs.objects.all()
         if filters:
             queryset = self._apply_filters(queryset, filters)
         
-        return queryset.order_by('-created_at')[:limit]
+        try:
+            return self._search_with_facets(query, query_embedding, queryset, limit, ef_search, probes, with_facets)
+        except DatabaseError as e:
+            if not query_embedding:
+                raise
+            # Fallo de la parte vectorial (índice, dimensiones, parámetros de sesión):
+            # la sesión ANN se revierte a su savepoint y se responde solo con texto completo
+            logger.error(f"Error en la búsqueda vectorial de trabajos, usando solo texto completo: {str(e)}")
+            return self._search_with_facets(query, None, queryset, limit, ef_search, probes, with_facets)
+    
+    @staticmethod
+    def _search_with_facets(query: str, query_embedding: Optional[List[float]], queryset: QuerySet, limit: int,
+                            ef_search: int = None, probes: int = None,
+                            with_facets: bool = False) -> Tuple[List[Jobs], Optional[Dict[str, Dict]]]:
+        results = hybrid_job_search.search(
+            query, query_embedding, queryset=queryset, limit=limit, ef_search=ef_search, probes=probes
+        )
+        facets = hybrid_job_search.facet_counts(
+            query, query_embedding, queryset=queryset, limit=limit, ef_search=ef_search, probes=probes
+        ) if with_facets else None
+        return results, facets
     
     def _apply_filters(self, queryset: QuerySet, filters: Dict[str, Any]) -> QuerySet:
         """
@@ -378,6 +385,7 @@ class JobsService:
         if filters.get('salary_max'):
             queryset = queryset.filter(salary_max__lte=filters['salary_max'])
         
+        # location y company__company_name tienen índices de trigramas para icontains
         if filters.get('location'):
             queryset = queryset.filter(location__icontains=filters['location'])
         
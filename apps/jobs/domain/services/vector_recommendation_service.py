@@ -1,13 +1,17 @@
 """
 Utilidades para manejo de vectores y recomendaciones con pgvector
 """
-import requests
 import logging
 from typing import List, Optional, Dict, Any
-from django.db.models import QuerySet, F, Q
+from django.db.models import QuerySet, F, Q, Case, When, Value, ExpressionWrapper, FloatField
 from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.db import transaction
 from apps.jobs.domain.entities.jobs import Jobs
+from apps.shared.domain.services.embedding_client import get_embedding_client
+from apps.shared.domain.services.vector_search import VectorParam, vector_search_planner, vector_similarity
+from apps.shared.infrastructure.task_queue import task_queue
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,7 @@ class VectorRecommendationService:
             embedding_service_url: URL del microservicio de embeddings
         """
         self.embedding_service_url = embedding_service_url or settings.EMBEDDING_SERVICE_URL
+        self.embedding_client = get_embedding_client(self.embedding_service_url)
     
     def get_embedding_from_microservice(self, job_data: Dict[str, Any]) -> Optional[List[float]]:
         """
@@ -61,38 +66,9 @@ class VectorRecommendationService:
             # Unir todo el texto
             job_text = ". ".join(job_text_parts)
             
-            # Preparar el payload según la API del microservicio
-            payload = {
-                "text": job_text,
-                "translate_to_english": True,  # Para mejor precisión en embeddings
-                "clean_text": True
-            }
-            
-            # Llamar al endpoint correcto
-            response = requests.post(
-                f"{self.embedding_service_url}/text-processing/vectorize/",
-                json=payload,
-                timeout=30,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                vector = result.get('vector')
-                
-                if vector:
-                    logger.info(f"Embedding generado exitosamente. Dimensiones: {result.get('dimension', len(vector))}")
-                    return vector
-                else:
-                    logger.error("El microservicio no devolvió un vector válido")
-                    return None
-            else:
-                logger.error(f"Error al obtener embedding: {response.status_code} - {response.text}")
-                return None
+            # Se traduce al inglés para mejor precisión en embeddings
+            return self.embedding_client.embed(job_text, translate_to_english=True, clean_text=True)
                 
-        except requests.RequestException as e:
-            logger.error(f"Error de conexión con el microservicio de embeddings: {str(e)}")
-            return None
         except Exception as e:
             logger.error(f"Error inesperado al obtener embedding: {str(e)}")
             return None
@@ -120,19 +96,34 @@ class VectorRecommendationService:
         
         if embedding:
             job.embedding = embedding
-            job.save(update_fields=['embedding'])
+            job.embedding_pending = False
+            job.save(update_fields=['embedding', 'embedding_pending'])
             logger.info(f"Embedding actualizado para job {job.id}: {job.title}")
             return True
         else:
             logger.warning(f"No se pudo actualizar el embedding para job {job.id}: {job.title}")
             return False
     
+    def schedule_job_embedding(self, job_id: int):
+        """
+        Marca el job como pendiente y encola la generación de su embedding al
+        confirmarse la transacción; si no se puede encolar, la marca se retira
+        """
+        def enqueue():
+            Jobs.objects.filter(id=job_id).update(embedding_pending=True)
+            if not task_queue.enqueue_now('jobs.update_job_embedding', str(job_id), job_id=job_id):
+                Jobs.objects.filter(id=job_id).update(embedding_pending=False)
+
+        transaction.on_commit(enqueue)
+    
     def get_similar_jobs(
         self, 
         user_embedding: List[float], 
         limit: int = 10,
         exclude_job_ids: List[int] = None,
-        similarity_threshold: float = 0.5  # Reducido el threshold para más resultados
+        similarity_threshold: float = 0.5,  # Reducido el threshold para más resultados
+        ef_search: int = None,
+        probes: int = None
     ) -> QuerySet:
         """
         Obtiene jobs similares basados en el embedding del usuario usando pgvector
@@ -143,40 +134,48 @@ class VectorRecommendationService:
             limit: Número máximo de resultados
             exclude_job_ids: IDs de jobs a excluir
             similarity_threshold: Umbral mínimo de similitud
+            ef_search: Recall del índice HNSW para esta consulta
+            probes: Recall del índice IVFFlat para esta consulta
             
         Returns:
             QuerySet con los jobs recomendados ordenados por score
         """
-        if not user_embedding:
+        if user_embedding is None or len(user_embedding) == 0:
             return self.get_fallback_jobs(limit=limit, exclude_job_ids=exclude_job_ids)
         
-        # Convertir el embedding a string para la consulta SQL
-        embedding_str = '[' + ','.join(map(str, user_embedding)) + ']'
+        # Vector del usuario enlazado una sola vez como parámetro
+        query_vector = VectorParam(user_embedding)
         
         # Construir filtros básicos
-        filters = Q(embedding__isnull=False)
+        filters = Q()
         
         if exclude_job_ids:
             filters &= ~Q(id__in=exclude_job_ids)
         
+        # Candidatos del índice ANN, el score compuesto se calcula solo sobre ellos
+        candidate_ids = vector_search_planner.nearest_ids(
+            Jobs.objects.filter(filters), 'embedding', query_vector,
+            k=vector_search_planner.candidate_limit(limit),
+            ef_search=ef_search, probes=probes
+        )
+        
         # Usar pgvector para calcular similitud coseno y crear score compuesto
-        similarity_sql = f"(1 - (embedding <#> '{embedding_str}'))"
+        similarity = vector_similarity('embedding', query_vector)
         hours_old_sql = "EXTRACT(EPOCH FROM (NOW() - created_at)) / 3600"
+        hours_old = RawSQL(hours_old_sql, [], output_field=FloatField())
+        interactions = Coalesce(F('interactions_score'), Value(0.0))
         
         # Score compuesto: 60% similitud, 30% interactions, 10% penalización tiempo
-        composite_score_sql = f"""
-            (
-                0.6 * {similarity_sql} +
-                0.3 * COALESCE(interactions_score, 0) -
-                0.1 * ({hours_old_sql})
-            )
-        """
+        composite_score = ExpressionWrapper(
+            0.6 * similarity + 0.3 * interactions - 0.1 * hours_old,
+            output_field=FloatField()
+        )
         
         # Intentar obtener jobs con embeddings
-        queryset = Jobs.objects.filter(filters).annotate(
-            similarity=RawSQL(similarity_sql, []),
-            hours_old=RawSQL(hours_old_sql, []),
-            recommendation_score=RawSQL(composite_score_sql, [])
+        queryset = Jobs.objects.filter(id__in=candidate_ids).annotate(
+            similarity=similarity,
+            hours_old=hours_old,
+            recommendation_score=composite_score
         ).filter(
             similarity__gte=similarity_threshold
         ).order_by('-recommendation_score')[:limit]
@@ -199,9 +198,15 @@ class VectorRecommendationService:
             return Jobs.objects.filter(
                 id__in=combined_ids
             ).annotate(
-                similarity=RawSQL(f"CASE WHEN embedding IS NOT NULL THEN {similarity_sql} ELSE 0.5 END", []),
-                hours_old=RawSQL(hours_old_sql, []),
-                recommendation_score=RawSQL(f"CASE WHEN embedding IS NOT NULL THEN {composite_score_sql} ELSE COALESCE(interactions_score, 0) * 0.5 END", [])
+                similarity=Case(
+                    When(embedding__isnull=False, then=similarity),
+                    default=Value(0.5), output_field=FloatField()
+                ),
+                hours_old=hours_old,
+                recommendation_score=Case(
+                    When(embedding__isnull=False, then=composite_score),
+                    default=interactions * 0.5, output_field=FloatField()
+                )
             ).order_by('-recommendation_score', '-created_at')[:limit]
         
         return queryset
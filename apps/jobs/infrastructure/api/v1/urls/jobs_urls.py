@@ -9,7 +9,8 @@ from apps.jobs.infrastructure.api.v1.views.postulants_views import (
 from apps.jobs.infrastructure.api.v1.views.recommendations_views import (
     JobRecommendationsView, 
     JobTrendingView, 
-    JobSemanticSearchView
+    JobSemanticSearchView,
+    JobSuggestView
 )
 
 urlpatterns = [
@@ -21,6 +22,7 @@ urlpatterns = [
     path('jobs/recommendations/', JobRecommendationsView.as_view(), name='jobs-recommendations'),
     path('jobs/trending/', JobTrendingView.as_view(), name='jobs-trending'),
     path('jobs/semantic-search/', JobSemanticSearchView.as_view(), name='jobs-semantic-search'),
+    path('jobs/suggest/', JobSuggestView.as_view(), name='jobs-suggest'),
     
     # Applications endpoints
     path('applications/', PostulantsView.as_view(), name='applications-list-create'),
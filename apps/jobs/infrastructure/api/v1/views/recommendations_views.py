@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -7,18 +8,20 @@ from django.db.models.expressions import RawSQL
 from apps.jobs.domain.entities.jobs import Jobs
 from apps.jobs.infrastructure.api.v1.serializers.jobs_serializer import JobsSerializer
 from apps.jobs.domain.services.jobs_service import JobsService
+from apps.jobs.domain.services.job_search_service import SUGGEST_FIELDS, hybrid_job_search
+from apps.shared.infrastructure.async_views import AsyncAPIView
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class JobRecommendationsView(APIView):
+class JobRecommendationsView(AsyncAPIView):
     """
     Obtiene recomendaciones personalizadas de trabajos basadas en el perfil del usuario
     """
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    async def get(self, request):
         try:
             limit = int(request.GET.get('limit', 10))
             limit = min(limit, 50)  # Máximo 50 recomendaciones
@@ -26,15 +29,17 @@ class JobRecommendationsView(APIView):
             limit = 10
 
         jobs_service = JobsService()
-        recommendations = jobs_service.get_personalized_job_recommendations(
+        recommendations = await sync_to_async(lambda: list(jobs_service.get_personalized_job_recommendations(
             user=request.user,
             limit=limit
-        )
+        )))()
         
-        serializer = JobsSerializer(recommendations, many=True, context={'request': request})
+        results = await sync_to_async(
+            lambda: JobsSerializer(recommendations, many=True, context={'request': request}).data
+        )()
         return Response({
             'count': len(recommendations),
-            'results': serializer.data
+            'results': results
         })
 
 
@@ -61,13 +66,13 @@ class JobTrendingView(APIView):
         })
 
 
-class JobSemanticSearchView(APIView):
+class JobSemanticSearchView(AsyncAPIView):
     """
-    Búsqueda semántica de trabajos usando embeddings y filtros avanzados
+    Búsqueda híbrida (texto completo + embeddings) de trabajos con filtros avanzados y facetas
     """
     permission_classes = [IsAuthenticated]
 
-    def post(self, request):
+    async def post(self, request):
         query = request.data.get('query', '')
         limit = request.data.get('limit', 10)
         filters = request.data.get('filters', {})
@@ -84,17 +89,50 @@ class JobSemanticSearchView(APIView):
             limit = 10
 
         jobs_service = JobsService()
-        search_results = jobs_service.semantic_search_jobs(
+        search_results, facets = await jobs_service.asemantic_search_jobs(
             query=query,
             filters=filters,
             limit=limit,
-            user=request.user
+            user=request.user,
+            with_facets=True
         )
         
-        serializer = JobsSerializer(search_results, many=True, context={'request': request})
+        results = await sync_to_async(
+            lambda: JobsSerializer(search_results, many=True, context={'request': request}).data
+        )()
         return Response({
             'query': query,
             'filters': filters,
             'count': len(search_results),
-            'results': serializer.data
+            'facets': facets,
+            'results': results
+        })
+
+
+class JobSuggestView(AsyncAPIView):
+    """
+    Autocompletado de ubicaciones y empresas para los filtros de búsqueda
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        field = request.GET.get('field', 'location')
+        term = request.GET.get('q', '').strip()
+
+        if field not in SUGGEST_FIELDS:
+            return Response(
+                {'error': f"field must be one of: {', '.join(SUGGEST_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = min(int(request.GET.get('limit', 10)), 20)
+        except (ValueError, TypeError):
+            limit = 10
+
+        suggestions = await sync_to_async(hybrid_job_search.suggest)(field, term, limit) if len(term) >= 2 else []
+        return Response({
+            'field': field,
+            'query': term,
+            'results': suggestions
         })
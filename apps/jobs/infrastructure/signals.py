@@ -11,24 +11,29 @@ logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Jobs)
-def handle_job_save(sender, instance, created, **kwargs):
+def handle_job_save(sender, instance, created, update_fields=None, **kwargs):
     """
     Signal que se ejecuta después de guardar un Job.
-    Genera automáticamente el embedding para el job.
+    Encola la generación del embedding para el job; el worker lo procesa en segundo plano.
     """
     try:
-        # Solo generar embedding si es un job nuevo o si no tiene embedding
-        if created or not instance.embedding:
-            logger.info(f"Generando embedding para job {'nuevo' if created else 'sin embedding'}: {instance.id} - {instance.title}")
-            success = vector_service.update_job_embedding(instance)
-            
-            if success:
-                logger.info(f"Embedding generado exitosamente para job {instance.id}")
-            else:
-                logger.error(f"Error al generar embedding para job {instance.id}")
+        # El propio guardado del embedding no debe volver a encolar el job
+        if update_fields and 'embedding' in update_fields:
+            return
+        
+        # Solo generar embedding si es un job nuevo o si no tiene embedding.
+        # Con el vector diferido se consulta en SQL en lugar de cargarlo
+        if 'embedding' in instance.get_deferred_fields():
+            missing_embedding = Jobs.objects.filter(id=instance.id, embedding__isnull=True).exists()
+        else:
+            missing_embedding = instance.embedding is None
+
+        if created or missing_embedding:
+            logger.info(f"Encolando embedding para job {'nuevo' if created else 'sin embedding'}: {instance.id} - {instance.title}")
+            vector_service.schedule_job_embedding(instance.id)
         
         # Si el job fue actualizado y ya tenía embedding, verificar si necesita actualización
-        elif not created and instance.embedding:
+        else:
             # Podrías agregar lógica aquí para detectar si el contenido cambió significativamente
             # Por ejemplo, verificar si title, description, requirements cambiaron
             logger.info(f"Job {instance.id} actualizado - embedding ya existe")
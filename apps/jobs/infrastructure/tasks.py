@@ -0,0 +1,23 @@
+"""
+Trabajos en segundo plano del módulo de jobs
+"""
+import logging
+
+from apps.jobs.domain.entities.jobs import Jobs
+from apps.jobs.domain.services.vector_recommendation_service import vector_service
+from apps.shared.infrastructure.task_queue import register_task
+
+logger = logging.getLogger(__name__)
+
+
+@register_task('jobs.update_job_embedding')
+def update_job_embedding(job_id: int) -> bool:
+    """
+    Genera el embedding de un job. Si el job fue eliminado el trabajo se da por terminado.
+    """
+    try:
+        job = Jobs.objects.select_related('company').get(id=job_id)
+    except Jobs.DoesNotExist:
+        logger.info(f"Job {job_id} eliminado antes de generar su embedding")
+        return True
+    return vector_service.update_job_embedding(job)
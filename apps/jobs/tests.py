@@ -1,3 +1,131 @@
-from django.test import TestCase
+import re
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.custom_auth.domain.entities.company import Company
+from apps.jobs.domain.entities.jobs import Jobs
+from apps.jobs.domain.services import job_search_service
+from apps.jobs.domain.services.job_search_service import hybrid_job_search
+from apps.jobs.domain.services.jobs_service import JobsService
+
+User = get_user_model()
+
+# Columnas vector(768) de ofertas y usuarios
+VECTOR_COLUMNS = re.compile(r'"(embedding|feed_recommendations_embedding|job_recommendations_embedding)"')
+
+
+class ListVectorColumnsTests(TestCase):
+    """
+    Los listados de ofertas no transfieren columnas vector
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='candidata@example.com', password='x', first_name='Ana', last_name='Candidata',
+            feed_recommendations_embedding=[0.1] * 768, job_recommendations_embedding=[0.1] * 768
+        )
+        self.company = Company.objects.create_user(
+            username='empresa@example.com', password='x', company_name='Empresa'
+        )
+        Jobs.objects.create(
+            company=self.company, title='Desarrolladora backend', description='Django y Postgres',
+            embedding=[0.1] * 768
+        )
+        self.client = APIClient()
+
+    def assertNoVectorColumns(self, url: str, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        leaked = [query['sql'] for query in queries if VECTOR_COLUMNS.search(query['sql'])]
+        self.assertEqual(leaked, [], f'{url} lee columnas vector')
+
+    def test_job_lists(self):
+        self.client.force_authenticate(self.user)
+        self.assertNoVectorColumns('/api/v1/jobs/')
+        self.assertNoVectorColumns('/api/v1/jobs/', q='backend', remote='false')
+        self.assertNoVectorColumns('/api/v1/jobs/trending/')
+
+    def test_company_job_list(self):
+        self.client.force_authenticate(self.company)
+        self.assertNoVectorColumns('/api/v1/jobs/')
+
+
+class JobSearchFacetsTests(SimpleTestCase):
+    """
+    Lectura de las filas de GROUPING SETS de facet_counts
+    """
+
+    def test_rows_are_grouped_by_facet(self):
+        rows = [
+            ('full_time', None, None, 12),
+            ('internship', None, None, 2),
+            (None, 'senior', None, 4),
+            (None, None, True, 3),
+            (None, None, False, 9),
+        ]
+        with mock.patch.object(job_search_service, 'connections') as connections:
+            cursor = connections.__getitem__.return_value.cursor.return_value.__enter__.return_value
+            cursor.fetchall.return_value = rows
+            facets = hybrid_job_search.facet_counts('backend')
+
+        self.assertEqual(facets, {
+            'job_type': {'full_time': 12, 'internship': 2},
+            'experience_level': {'senior': 4},
+            'is_remote': {True: 3, False: 9},
+        })
+        sql = cursor.execute.call_args[0][0]
+        self.assertIn('GROUPING SETS ((job_type), (experience_level), (is_remote))', sql)
+
+    def test_no_rows(self):
+        with mock.patch.object(job_search_service, 'connections') as connections:
+            cursor = connections.__getitem__.return_value.cursor.return_value.__enter__.return_value
+            cursor.fetchall.return_value = []
+            facets = hybrid_job_search.facet_counts('backend')
+
+        self.assertEqual(facets, {'job_type': {}, 'experience_level': {}, 'is_remote': {}})
+
+
+class JobSuggestTests(SimpleTestCase):
+    """
+    suggest descarta campos desconocidos y términos vacíos sin consultar la base de datos
+    """
+
+    def test_unknown_field(self):
+        self.assertEqual(hybrid_job_search.suggest('title', 'backend'), [])
+
+    def test_empty_term(self):
+        self.assertEqual(hybrid_job_search.suggest('location', ''), [])
+        self.assertEqual(hybrid_job_search.suggest('company', None), [])
+
+
+class HybridSearchFallbackTests(SimpleTestCase):
+    """
+    Un error de la parte vectorial responde con búsqueda solo por texto; un
+    error de la búsqueda por texto no se convierte en una lista vacía
+    """
+
+    def test_vector_failure_falls_back_to_lexical(self):
+        job = Jobs(id=1, title='Desarrolladora backend')
+
+        def search(query, embedding, **kwargs):
+            if embedding:
+                raise OperationalError('different vector dimensions')
+            return [job]
+
+        with mock.patch.object(hybrid_job_search, 'search', side_effect=search) as patched:
+            results, facets = JobsService()._hybrid_search('backend', [0.1] * 768, {}, limit=10)
+
+        self.assertEqual(results, [job])
+        self.assertIsNone(facets)
+        self.assertIsNone(patched.call_args_list[-1][0][1])
+
+    def test_lexical_failure_is_raised(self):
+        with mock.patch.object(hybrid_job_search, 'search', side_effect=OperationalError('timeout')):
+            with self.assertRaises(OperationalError):
+                JobsService()._hybrid_search('backend', None, {}, limit=10)
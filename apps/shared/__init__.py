@@ -0,0 +1 @@
+# Shared infrastructure module
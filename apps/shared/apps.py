@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class SharedConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.shared'
+    
+    def ready(self):
+        """
+        Registra el adaptador de pgvector en las conexiones nuevas
+        """
+        from apps.shared.infrastructure.pgvector_adapter import connect_signals
+        connect_signals()
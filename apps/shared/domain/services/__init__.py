@@ -0,0 +1 @@
+# Shared domain services
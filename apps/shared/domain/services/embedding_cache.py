@@ -0,0 +1,144 @@
+"""
+Cache direccionada por contenido para embeddings
+
+La clave es un hash de (texto normalizado, flags de traducción/limpieza, versión
+del modelo), por lo que cambiar EMBEDDING_MODEL_VERSION invalida todas las
+entradas anteriores. Tiene dos niveles: un LRU acotado en memoria del proceso y
+Redis compartido con TTL.
+"""
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from django.conf import settings
+
+from apps.shared.infrastructure.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = 'embedding'
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza el texto para que variantes triviales compartan la misma entrada
+    """
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class EmbeddingCache:
+    """
+    Cache de dos niveles (LRU en memoria + Redis) con métricas de aciertos y fallos
+    """
+
+    def __init__(self, model_version: str = None, max_entries: int = None, ttl: int = None):
+        self.model_version = model_version or settings.EMBEDDING_MODEL_VERSION
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.EMBEDDING_CACHE_TTL
+
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {
+            'memory_hits': 0,
+            'redis_hits': 0,
+            'misses': 0,
+            'redis_errors': 0,
+        }
+
+    def make_key(self, text: str, flags: Tuple[bool, bool]) -> str:
+        translate_to_english, clean_text = flags
+        raw = f"{self.model_version}|{int(translate_to_english)}|{int(clean_text)}|{normalize_text(text)}"
+        digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        # La versión va también en el prefijo para poder purgar por patrón
+        return f"{REDIS_KEY_PREFIX}:{self.model_version}:{digest}"
+
+    # Nivel en memoria
+
+    def get_local(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._local.get(key)
+            if vector is not None:
+                self._local.move_to_end(key)
+                self._metrics['memory_hits'] += 1
+            return vector
+
+    def _set_local(self, key: str, vector: List[float]):
+        with self._lock:
+            self._local[key] = vector
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    # Nivel Redis
+
+    def get_many_shared(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Busca en Redis las claves que no estaban en memoria. Las claves no
+        encontradas se cuentan como fallos.
+        """
+        if not keys:
+            return {}
+
+        found = {}
+        try:
+            values = get_redis().mget(keys)
+        except redis.RedisError as e:
+            logger.warning(f"Cache de embeddings no disponible en Redis: {str(e)}")
+            values = [None] * len(keys)
+            with self._lock:
+                self._metrics['redis_errors'] += 1
+
+        for key, value in zip(keys, values):
+            if value:
+                vector = array('f', value).tolist()
+                found[key] = vector
+                self._set_local(key, vector)
+
+        with self._lock:
+            self._metrics['redis_hits'] += len(found)
+            self._metrics['misses'] += len(keys) - len(found)
+        return found
+
+    def set_many(self, entries: Dict[str, List[float]]):
+        """
+        Guarda embeddings en ambos niveles
+        """
+        if not entries:
+            return
+
+        for key, vector in entries.items():
+            self._set_local(key, vector)
+
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for key, vector in entries.items():
+                # float32 es la misma precisión con la que pgvector almacena los vectores
+                pipe.set(key, array('f', vector).tobytes(), ex=self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"No se pudo guardar embeddings en Redis: {str(e)}")
+            with self._lock:
+                self._metrics['redis_errors'] += 1
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Métricas de la cache desde el inicio del proceso
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['memory_entries'] = len(self._local)
+        lookups = metrics['memory_hits'] + metrics['redis_hits'] + metrics['misses']
+        metrics['hit_ratio'] = round((metrics['memory_hits'] + metrics['redis_hits']) / lookups, 4) if lookups else 0.0
+        metrics['model_version'] = self.model_version
+        return metrics
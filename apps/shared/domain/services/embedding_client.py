@@ -0,0 +1,299 @@
+"""
+Cliente compartido para el microservicio de embeddings
+
+Mantiene un pool de conexiones keep-alive y agrupa las peticiones concurrentes
+en micro-lotes que se envían al endpoint batch del microservicio. Ofrece
+puntos de entrada síncronos (embed / embed_many) y asyncio (aembed / aembed_many).
+Los resultados se guardan en la cache de embeddings (memoria + Redis).
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from apps.shared.domain.services.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+VECTORIZE_PATH = '/text-processing/vectorize/'
+
+
+class _PendingEmbedding:
+    """
+    Petición de embedding encolada a la espera de ser agrupada en un lote
+    """
+    __slots__ = ('text', 'flags', 'key', 'future')
+
+    def __init__(self, text: str, flags: Tuple[bool, bool], key: Optional[str]):
+        self.text = text
+        self.flags = flags
+        self.key = key
+        self.future = Future()
+
+
+class EmbeddingClient:
+    """
+    Cliente HTTP con pool de conexiones y micro-batching para el microservicio de embeddings
+    """
+
+    def __init__(self, base_url: str = None):
+        self.base_url = (base_url or settings.EMBEDDING_SERVICE_URL).rstrip('/')
+        self.timeout = settings.EMBEDDING_SERVICE_TIMEOUT
+        self.batch_path = settings.EMBEDDING_BATCH_PATH
+        self.max_batch_size = max(1, settings.EMBEDDING_BATCH_MAX_SIZE)
+        self.batch_wait = settings.EMBEDDING_BATCH_WAIT_MS / 1000.0
+        self.pool_size = settings.EMBEDDING_POOL_SIZE
+
+        # Sesión compartida: reutiliza conexiones TCP entre llamadas
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+        # Si el microservicio no expone el endpoint batch se usa el individual
+        self.batch_supported = bool(self.batch_path)
+
+        self.cache = EmbeddingCache() if settings.EMBEDDING_CACHE_ENABLED else None
+
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='embedding-batch')
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    # Puntos de entrada síncronos
+
+    def embed(self, text: str, translate_to_english: bool = True, clean_text: bool = True) -> Optional[List[float]]:
+        """
+        Obtiene el embedding de un texto. Las llamadas concurrentes se agrupan en un mismo lote.
+
+        Args:
+            text: Texto para convertir a embedding
+            translate_to_english: Si el microservicio debe traducir el texto
+            clean_text: Si el microservicio debe limpiar el texto
+
+        Returns:
+            Vector embedding o None si hay error
+        """
+        if not text:
+            return None
+        future = self._submit(text, (translate_to_english, clean_text))
+        return self._wait(future)
+
+    def embed_many(self, texts: List[str], translate_to_english: bool = True, clean_text: bool = True) -> List[Optional[List[float]]]:
+        """
+        Obtiene los embeddings de varios textos, conservando el orden de entrada
+        """
+        flags = (translate_to_english, clean_text)
+        futures = [self._submit(text, flags) if text else None for text in texts]
+        return [self._wait(future) if future else None for future in futures]
+
+    # Puntos de entrada asyncio
+
+    async def aembed(self, text: str, translate_to_english: bool = True, clean_text: bool = True) -> Optional[List[float]]:
+        """
+        Versión asyncio de embed: no bloquea el event loop mientras espera el lote
+        """
+        if not text:
+            return None
+        future = self._submit(text, (translate_to_english, clean_text))
+        return await self._await(future)
+
+    async def aembed_many(self, texts: List[str], translate_to_english: bool = True, clean_text: bool = True) -> List[Optional[List[float]]]:
+        """
+        Versión asyncio de embed_many
+        """
+        return list(await asyncio.gather(*[
+            self.aembed(text, translate_to_english, clean_text) for text in texts
+        ]))
+
+    # Cola y agrupación en lotes
+
+    def _submit(self, text: str, flags: Tuple[bool, bool]) -> Future:
+        key = None
+        if self.cache:
+            key = self.cache.make_key(text, flags)
+            vector = self.cache.get_local(key)
+            if vector is not None:
+                future = Future()
+                future.set_result(vector)
+                return future
+
+        self._ensure_worker()
+        pending = _PendingEmbedding(text, flags, key)
+        self._queue.put(pending)
+        return pending.future
+
+    def _wait(self, future: Future) -> Optional[List[float]]:
+        try:
+            return future.result(timeout=self.timeout + self.batch_wait + 1)
+        except Exception as e:
+            logger.error(f"Error esperando embedding: {str(e)}")
+            return None
+
+    async def _await(self, future: Future) -> Optional[List[float]]:
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout + self.batch_wait + 1)
+        except Exception as e:
+            logger.error(f"Error esperando embedding: {str(e)}")
+            return None
+
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._collect_batches, name='embedding-batcher', daemon=True)
+            self._worker.start()
+
+    def _collect_batches(self):
+        """
+        Bucle del hilo agrupador: espera la primera petición y acumula las que
+        lleguen durante la ventana de batch_wait o hasta completar max_batch_size
+        """
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.batch_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Un lote por combinación de flags, el payload del microservicio es común a todo el lote
+            groups: Dict[Tuple[bool, bool], List[_PendingEmbedding]] = {}
+            for pending in batch:
+                groups.setdefault(pending.flags, []).append(pending)
+
+            for flags, items in groups.items():
+                self._executor.submit(self._dispatch, flags, items)
+
+    def _dispatch(self, flags: Tuple[bool, bool], items: List[_PendingEmbedding]):
+        results = {}
+        try:
+            # Textos idénticos dentro del lote se piden una sola vez
+            unique = {}
+            for item in items:
+                unique.setdefault(item.key or item.text, item.text)
+
+            if self.cache:
+                results.update(self.cache.get_many_shared(list(unique)))
+
+            missing = [key for key in unique if key not in results]
+            if missing:
+                vectors = self._request_vectors([unique[key] for key in missing], flags)
+                fetched = {key: vector for key, vector in zip(missing, vectors) if vector}
+                results.update(fetched)
+                if self.cache:
+                    self.cache.set_many(fetched)
+        except Exception as e:
+            logger.error(f"Error inesperado en lote de embeddings: {str(e)}")
+
+        for item in items:
+            if not item.future.done():
+                item.future.set_result(results.get(item.key or item.text))
+
+    # HTTP
+
+    def _request_vectors(self, texts: List[str], flags: Tuple[bool, bool]) -> List[Optional[List[float]]]:
+        if len(texts) > 1 and self.batch_supported:
+            vectors = self._request_batch(texts, flags)
+            if vectors is not None:
+                return vectors
+        return [self._request_single(text, flags) for text in texts]
+
+    def _request_single(self, text: str, flags: Tuple[bool, bool]) -> Optional[List[float]]:
+        translate_to_english, clean_text = flags
+        payload = {
+            "text": text,
+            "translate_to_english": translate_to_english,
+            "clean_text": clean_text
+        }
+        try:
+            response = self.session.post(f"{self.base_url}{VECTORIZE_PATH}", json=payload, timeout=self.timeout)
+
+            if response.status_code == 200:
+                result = response.json()
+                vector = result.get('vector')
+                if vector:
+                    logger.info(f"Embedding generado. Dimensiones: {result.get('dimension', len(vector))}")
+                    return vector
+                logger.error("El microservicio no devolvió un vector válido")
+                return None
+
+            logger.error(f"Error al obtener embedding: {response.status_code} - {response.text}")
+            return None
+
+        except requests.RequestException as e:
+            logger.error(f"Error de conexión con microservicio: {str(e)}")
+            return None
+
+    def _request_batch(self, texts: List[str], flags: Tuple[bool, bool]) -> Optional[List[Optional[List[float]]]]:
+        """
+        Envía un lote al endpoint batch. Retorna None si el lote debe reintentarse
+        con peticiones individuales.
+        """
+        translate_to_english, clean_text = flags
+        payload = {
+            "texts": texts,
+            "translate_to_english": translate_to_english,
+            "clean_text": clean_text
+        }
+        try:
+            response = self.session.post(f"{self.base_url}{self.batch_path}", json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.error(f"Error de conexión con microservicio (batch): {str(e)}")
+            return [None] * len(texts)
+
+        if response.status_code in (404, 405):
+            logger.warning("El microservicio no soporta vectorización en lote, usando peticiones individuales")
+            self.batch_supported = False
+            return None
+
+        if response.status_code != 200:
+            logger.error(f"Error al obtener embeddings en lote: {response.status_code} - {response.text}")
+            return [None] * len(texts)
+
+        result = response.json()
+        vectors = result.get('vectors')
+        if vectors is None and 'results' in result:
+            vectors = [item.get('vector') for item in result['results']]
+
+        if not isinstance(vectors, list) or len(vectors) != len(texts):
+            logger.error("El microservicio devolvió un lote de vectores inválido")
+            return [None] * len(texts)
+
+        logger.info(f"Lote de {len(texts)} embeddings generado")
+        return [vector or None for vector in vectors]
+
+
+_clients: Dict[str, EmbeddingClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_embedding_client(base_url: str = None) -> EmbeddingClient:
+    """
+    Retorna el cliente compartido del proceso para la URL indicada
+    """
+    base_url = (base_url or settings.EMBEDDING_SERVICE_URL).rstrip('/')
+    client = _clients.get(base_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(base_url)
+            if client is None:
+                client = EmbeddingClient(base_url)
+                _clients[base_url] = client
+    return client
@@ -0,0 +1,90 @@
+"""
+Fusión de búsqueda de texto completo y vectorial (reciprocal rank fusion)
+
+Las búsquedas híbridas combinan dos listas de candidatos del mismo modelo:
+
+- Léxica: filas que cumplen ``tsvector @@ tsquery`` (índice GIN), ordenadas
+  por ts_rank_cd.
+- Semántica: vecinos más cercanos del embedding de la consulta en el índice
+  HNSW (VectorSearchPlanner.candidates), con una similitud mínima.
+
+Ambas se ejecutan como CTEs de una única sentencia y se fusionan en SQL con
+``score = Σ 1 / (k + posición)``: un resultado que aparece arriba en las dos
+listas supera a uno que solo aparece en una. Solo viajan los ids fusionados;
+el servicio que llama carga después las filas con sus relaciones.
+"""
+import logging
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+
+from apps.shared.domain.services.vector_search import vector_search_planner
+
+logger = logging.getLogger(__name__)
+
+
+def compile_queryset(queryset: QuerySet) -> Tuple[str, tuple]:
+    """
+    SQL y parámetros de un queryset para usarlo dentro de una sentencia mayor
+    """
+    return queryset.query.get_compiler(using=queryset.db).as_sql()
+
+
+def rank_fusion_ids(lexical: QuerySet, semantic: Optional[QuerySet] = None, limit: int = 20,
+                    min_similarity: float = 0.0, rrf_k: int = None,
+                    ef_search: int = None, probes: int = None) -> List:
+    """
+    Claves primarias de los mejores resultados de la fusión, en orden
+
+    Args:
+        lexical: values_list('pk', rank) ordenado por rank descendente y con LIMIT
+        semantic: VectorSearchPlanner.candidates(...).values_list('pk', 'ann_distance');
+            None para una búsqueda solo léxica
+        limit: Número de resultados
+        min_similarity: Similitud mínima (1 - distancia) de los candidatos semánticos
+        rrf_k: Constante de RRF; más alta = menos peso a las primeras posiciones
+        ef_search: Recall del índice HNSW para esta consulta
+        probes: Recall del índice IVFFlat para esta consulta
+    """
+    rrf_k = rrf_k or settings.SEARCH_RRF_K
+
+    lexical_sql, lexical_params = compile_queryset(lexical)
+    ctes = [f'lexical (id, score) AS ({lexical_sql})']
+    params = list(lexical_params)
+    ranked = ['SELECT id, 1.0 / (%s + ROW_NUMBER() OVER (ORDER BY score DESC, id)) AS rrf FROM lexical']
+    ranked_params = [rrf_k]
+
+    if semantic is not None:
+        semantic_sql, semantic_params = compile_queryset(semantic)
+        ctes.append(f'semantic (id, distance) AS ({semantic_sql})')
+        params.extend(semantic_params)
+        # Misma similitud que vector_similarity: 1 - (embedding <#> consulta)
+        ranked.append(
+            'SELECT id, 1.0 / (%s + ROW_NUMBER() OVER (ORDER BY distance, id)) AS rrf '
+            'FROM semantic WHERE 1.0 - distance >= %s'
+        )
+        ranked_params.extend([rrf_k, min_similarity])
+
+    sql = (
+        f"WITH {', '.join(ctes)} "
+        f"SELECT id FROM ({' UNION ALL '.join(ranked)}) AS ranked "
+        f"GROUP BY id ORDER BY SUM(rrf) DESC, id LIMIT %s"
+    )
+    params.extend(ranked_params)
+    params.append(limit)
+
+    alias = lexical.db
+    # ef_search / probes fijados para el recorrido del índice HNSW dentro de la sentencia
+    session = (
+        vector_search_planner.session(alias, semantic.query.high_mark or limit, ef_search, probes)
+        if semantic is not None else nullcontext()
+    )
+    with session, connections[alias].cursor() as cursor:
+        cursor.execute(sql, params)
+        ids = [row[0] for row in cursor.fetchall()]
+
+    logger.debug(f"RRF {lexical.model.__name__}: {len(ids)} resultados ({'léxica y semántica' if semantic is not None else 'solo léxica'})")
+    return ids
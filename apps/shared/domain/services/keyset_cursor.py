@@ -0,0 +1,178 @@
+"""
+Cursores opacos para paginación keyset
+
+El cursor codifica la clave de orden del último elemento servido (score o
+fecha) junto con su id como desempate, el instante de referencia con el que se
+calcularon los scores dependientes del tiempo y una huella de los parámetros de
+la consulta (vector, filtros). Va firmado con SECRET_KEY y lleva timestamp, de
+modo que un cursor manipulado, caducado o emitido para otra consulta se ignora
+y se sirve la primera página.
+
+Los listados ordenados por similitud con un vector que cambia con el tiempo
+(p. ej. el vector de feed del usuario) guardan una instantánea del vector en
+float16 (vector_snapshot): todas las páginas del scroll se ordenan con ella,
+aunque el vector del usuario se actualice entre una página y otra.
+"""
+import base64
+import hashlib
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CURSOR_SALT = 'shared.keyset_cursor'
+
+
+def query_fingerprint(*parts: Any) -> str:
+    """
+    Huella corta de los parámetros de una consulta. Los vectores se resumen por
+    su contenido en float32.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            digest.update(b'\x00')
+        elif isinstance(part, (list, tuple, np.ndarray)) and len(part) and not isinstance(part[0], str):
+            digest.update(np.asarray(part, dtype=np.float32).tobytes())
+        else:
+            digest.update(repr(part).encode('utf-8'))
+        digest.update(b'|')
+    return digest.hexdigest()[:16]
+
+
+def vector_snapshot(vector) -> np.ndarray:
+    """
+    Vector de consulta con la precisión con que viaja en el cursor (float16);
+    la primera página también se ordena con él para que todas usen el mismo
+    """
+    return np.asarray(vector, dtype=np.float32).astype(np.float16).astype(np.float32)
+
+
+class KeysetCursor:
+    """
+    Posición dentro de un listado ordenado por (clave DESC, id DESC)
+    """
+    __slots__ = ('kind', 'key', 'id', 'ref_time', 'served', 'fingerprint', 'vector', 'depth')
+
+    def __init__(self, kind: str, key: Any, id: str, ref_time: datetime, served: int = 0, fingerprint: str = '',
+                 vector: Optional[np.ndarray] = None, depth: Optional[int] = None):
+        self.kind = kind
+        self.key = key
+        self.id = id
+        self.ref_time = ref_time
+        self.served = served
+        self.fingerprint = fingerprint
+        # Instantánea del vector de consulta y profundidad ANN con la que se generó
+        self.vector = vector
+        self.depth = depth
+
+    def encode(self) -> str:
+        key = self.key
+        key_type = 'f'
+        if isinstance(key, datetime):
+            key, key_type = key.isoformat(), 'dt'
+        payload = {
+            'k': self.kind,
+            'v': key,
+            'vt': key_type,
+            'i': str(self.id),
+            't': self.ref_time.timestamp(),
+            'n': self.served,
+            'f': self.fingerprint,
+        }
+        if self.vector is not None:
+            payload['q'] = base64.b64encode(np.asarray(self.vector, dtype=np.float16).tobytes()).decode('ascii')
+        if self.depth is not None:
+            payload['d'] = self.depth
+        return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+    @classmethod
+    def decode(cls, token: Optional[str], kind: str, fingerprint: str = '') -> Optional['KeysetCursor']:
+        """
+        Retorna el cursor o None si no es válido para esta consulta
+        """
+        if not token:
+            return None
+        try:
+            data = signing.loads(token, salt=CURSOR_SALT, max_age=settings.KEYSET_CURSOR_MAX_AGE)
+        except signing.BadSignature:
+            logger.info(f"Cursor inválido o caducado para {kind}, se sirve la primera página")
+            return None
+
+        if data.get('k') != kind or data.get('f', '') != fingerprint:
+            logger.info(f"Cursor emitido para otra consulta ({data.get('k')}), se sirve la primera página")
+            return None
+
+        key = data['v']
+        if data.get('vt') == 'dt' and key is not None:
+            key = datetime.fromisoformat(key)
+        vector = None
+        if data.get('q'):
+            vector = np.frombuffer(base64.b64decode(data['q']), dtype=np.float16).astype(np.float32)
+        return cls(
+            kind=kind,
+            key=key,
+            id=data['i'],
+            ref_time=datetime.fromtimestamp(data['t'], tz=dt_timezone.utc),
+            served=data.get('n', 0),
+            fingerprint=fingerprint,
+            vector=vector,
+            depth=data.get('d'),
+        )
+
+
+def keyset_filter(queryset: QuerySet, key_field: str, cursor: Optional[KeysetCursor]) -> QuerySet:
+    """
+    Filtra los elementos posteriores al cursor en el orden (key_field DESC, id DESC)
+
+    Un cursor sin clave (key None) apunta al inicio del listado.
+    """
+    if cursor is None or cursor.key is None:
+        return queryset
+    return queryset.filter(
+        Q(**{f'{key_field}__lt': cursor.key}) | Q(**{key_field: cursor.key, 'id__lt': cursor.id})
+    )
+
+
+def keyset_page(
+    items: List,
+    limit: int,
+    kind: str,
+    key_attr: str,
+    ref_time: datetime,
+    cursor: Optional[KeysetCursor] = None,
+    fingerprint: str = '',
+    vector: Optional[np.ndarray] = None,
+    depth: Optional[int] = None,
+) -> Tuple[List, bool, Optional[str]]:
+    """
+    Recorta una lista de limit + 1 elementos a la página y genera el cursor siguiente
+
+    Returns:
+        (items, has_next, next_cursor)
+    """
+    has_next = len(items) > limit
+    items = items[:limit]
+    next_cursor = None
+    if has_next and items:
+        last = items[-1]
+        served = (cursor.served if cursor else 0) + len(items)
+        next_cursor = KeysetCursor(
+            kind, getattr(last, key_attr), str(last.id), ref_time, served, fingerprint, vector, depth
+        ).encode()
+    return items, has_next, next_cursor
+
+
+def reference_time(cursor: Optional[KeysetCursor]) -> datetime:
+    """
+    Instante con el que se calculan los scores dependientes del tiempo; se
+    conserva entre páginas para que el orden no cambie mientras se pagina
+    """
+    return cursor.ref_time if cursor else timezone.now()
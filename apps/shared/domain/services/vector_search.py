@@ -0,0 +1,148 @@
+"""
+Planificador de búsquedas por similitud sobre pgvector
+
+Las consultas de similitud se resuelven en dos etapas:
+
+1. Candidatos: ``ORDER BY campo <#> vector LIMIT k`` sobre la tabla filtrada, la
+   única forma de consulta que puede usar los índices HNSW/IVFFlat.
+2. Re-ranking: el servicio que llama calcula sus scores compuestos (similitud,
+   engagement, recencia...) solo sobre esos k candidatos.
+
+``ef_search`` (HNSW) y ``probes`` (IVFFlat) se aplican con ``SET LOCAL`` dentro
+de la transacción de la etapa de candidatos, por lo que se pueden ajustar por
+consulta para intercambiar recall por latencia.
+
+El vector de consulta viaja como parámetro (``VectorParam``) y no como literal
+de 768 floats dentro del SQL: el texto de la consulta es siempre el mismo y
+Postgres puede reutilizar los prepared statements.
+"""
+import logging
+from contextlib import contextmanager
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Expression, ExpressionWrapper, FloatField, QuerySet, Value
+from pgvector.django import MaxInnerProduct, VectorField
+from pgvector.utils import Vector
+
+logger = logging.getLogger(__name__)
+
+# Límite de pgvector para hnsw.ef_search
+HNSW_MAX_EF_SEARCH = 1000
+
+
+class VectorParam(Expression):
+    """
+    Vector de consulta enlazado como parámetro. Se convierte una sola vez y la
+    misma instancia se reutiliza en todas las anotaciones de la consulta.
+    """
+    output_field = VectorField()
+
+    def __init__(self, vector: Sequence[float]):
+        super().__init__()
+        self.vector = vector if isinstance(vector, Vector) else Vector(vector)
+
+    def as_sql(self, compiler, connection):
+        # Con el adaptador de pgvector registrado el parámetro viaja tipado (binario)
+        if getattr(connection, 'pgvector_registered', False):
+            return '%s', [self.vector]
+        return '%s::vector', [self.vector.to_text()]
+
+    def get_group_by_cols(self):
+        return []
+
+
+def vector_similarity(field: str, query_vector: VectorParam) -> ExpressionWrapper:
+    """
+    Similitud ``1 - (campo <#> vector)`` usada por todas las consultas de recomendación
+    """
+    return ExpressionWrapper(Value(1.0) - MaxInnerProduct(field, query_vector), output_field=FloatField())
+
+
+class VectorSearchPlanner:
+    """
+    Obtiene los vecinos más cercanos usando los índices ANN de pgvector
+    """
+
+    def __init__(self):
+        self.ef_search = settings.VECTOR_SEARCH_EF_SEARCH
+        self.probes = settings.VECTOR_SEARCH_PROBES
+        self.candidate_factor = settings.VECTOR_SEARCH_CANDIDATE_FACTOR
+        self.max_candidates = settings.VECTOR_SEARCH_MAX_CANDIDATES
+        self.iterative_scan = settings.VECTOR_SEARCH_ITERATIVE_SCAN
+
+    def candidate_limit(self, limit: int) -> int:
+        """
+        Número de candidatos a pedir al índice para devolver ``limit`` resultados
+        tras aplicar umbrales y re-ranking
+        """
+        return max(limit, min(limit * self.candidate_factor, self.max_candidates))
+
+    def nearest_ids(
+        self,
+        queryset: QuerySet,
+        field: str,
+        vector: Sequence[float],
+        k: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> List:
+        """
+        Retorna las claves primarias de los k registros más cercanos al vector,
+        ordenadas de mayor a menor similitud (producto interno)
+
+        Args:
+            queryset: Consulta base con los filtros de negocio ya aplicados
+            field: Campo VectorField indexado
+            vector: Vector de consulta (lista, array o VectorParam)
+            k: Número de candidatos
+            ef_search: Tamaño de la lista dinámica de HNSW (más alto = más recall)
+            probes: Listas visitadas por IVFFlat (más alto = más recall)
+        """
+        if vector is None or k <= 0:
+            return []
+
+        candidates = self.candidates(queryset, field, vector, k).values_list('pk', flat=True)
+        with self.session(queryset.db, k, ef_search, probes):
+            ids = list(candidates)
+
+        logger.debug(f"ANN {queryset.model.__name__}.{field}: {len(ids)}/{k} candidatos")
+        return ids
+
+    def candidates(self, queryset: QuerySet, field: str, vector: Sequence[float], k: int) -> QuerySet:
+        """
+        Consulta (sin ejecutar) de los k registros más cercanos, anotada con
+        ann_distance; debe evaluarse dentro de session() para usar el índice
+        con los parámetros de recall de la consulta
+        """
+        if not isinstance(vector, VectorParam):
+            vector = VectorParam(vector)
+        return queryset.filter(**{f'{field}__isnull': False}).annotate(
+            ann_distance=MaxInnerProduct(field, vector)
+        ).order_by('ann_distance')[:k]
+
+    @contextmanager
+    def session(self, alias: str, k: int, ef_search: Optional[int] = None, probes: Optional[int] = None):
+        """
+        Transacción con ef_search / probes fijados para las consultas ANN que se ejecuten dentro
+        """
+        # HNSW nunca devuelve más de ef_search filas
+        ef_search = min(max(ef_search or self.ef_search, k), HNSW_MAX_EF_SEARCH)
+        probes = probes or self.probes
+
+        with transaction.atomic(using=alias):
+            with connections[alias].cursor() as cursor:
+                # set_config(..., true) equivale a SET LOCAL y admite parámetros
+                cursor.execute(
+                    "SELECT set_config('hnsw.ef_search', %s, true), set_config('ivfflat.probes', %s, true)",
+                    [str(ef_search), str(probes)]
+                )
+                if self.iterative_scan:
+                    # pgvector >= 0.8: sigue recorriendo el índice si los filtros descartan candidatos
+                    cursor.execute("SELECT set_config('hnsw.iterative_scan', %s, true)", [self.iterative_scan])
+            yield
+
+
+# Instancia global del planificador
+vector_search_planner = VectorSearchPlanner()
@@ -0,0 +1,77 @@
+"""
+Vistas asíncronas de DRF
+
+DRF 3.15 solo despacha vistas síncronas: bajo daphne cada petición ocupa un
+hilo del pool de ASGI mientras espera al microservicio de embeddings o a la
+base de datos. AsyncAPIView despacha handlers ``async def``: la autenticación,
+los permisos y el throttling se ejecutan con sync_to_async (usan la base de
+datos y Redis síncronos) y el handler corre en el event loop, así que las
+esperas de red no bloquean ningún hilo.
+
+Dentro de un handler, el ORM se usa con su API asíncrona (aget, afirst,
+``async for``) y el código síncrono que toque la base de datos (servicios,
+serializers con relaciones) debe envolverse en sync_to_async.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework.decorators import api_view
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView cuyos handlers (get, post...) son corrutinas
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            # options y http_method_not_allowed siguen siendo síncronos
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = await sync_to_async(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def async_api_view(http_method_names=None):
+    """
+    Equivalente de @api_view para funciones ``async def``
+
+    Admite los mismos decoradores de DRF (permission_classes,
+    authentication_classes, throttle_classes...) debajo de él.
+    """
+    def decorator(func):
+        wrapped_view = api_view(http_method_names)(func).cls
+
+        async def handler(self, *args, **kwargs):
+            return await func(*args, **kwargs)
+
+        methods = {
+            method: handler for method in wrapped_view.http_method_names if method != 'options'
+        }
+        view_class = type(wrapped_view.__name__, (AsyncAPIView, wrapped_view), {
+            '__module__': func.__module__,
+            '__doc__': func.__doc__,
+            **methods,
+        })
+        return view_class.as_view()
+
+    return decorator
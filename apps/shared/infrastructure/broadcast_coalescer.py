@@ -0,0 +1,135 @@
+"""
+Difusión agrupada de eventos de sala con mucha rotación
+
+Eventos como el conteo de conexiones se publican en cada connect/disconnect;
+enviarlos uno a uno con group_send hace que una tormenta de reconexiones
+genere O(N²) mensajes. El coalescer envía como mucho un mensaje por
+(grupo, evento) cada BROADCAST_COALESCE_INTERVAL segundos y prevalece el
+último valor publicado.
+
+La ventana se coordina en Redis, así que vale para todos los procesos de
+daphne: el primero que publica en una ventana se queda con ella, espera el
+intervalo y envía por el channel layer el último mensaje; los demás solo
+actualizan el mensaje pendiente. Si durante el envío llega otra publicación,
+el dueño mantiene la ventana y vuelve a enviar al final del siguiente
+intervalo.
+"""
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+
+import redis
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from apps.shared.infrastructure.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+WINDOW_KEY = 'coalesce:{group}:{event}'
+PAYLOAD_KEY = 'coalesce:{group}:{event}:payload'
+
+# Guarda el mensaje pendiente y devuelve 1 si esta llamada abre la ventana
+_OFFER_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+if redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# Retira el mensaje pendiente
+_TAKE_SCRIPT = """
+local payload = redis.call('GET', KEYS[1])
+redis.call('DEL', KEYS[1])
+return payload
+"""
+
+# Cierra la ventana salvo que haya llegado otro mensaje; en ese caso la renueva y devuelve 1
+_RELEASE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('PEXPIRE', KEYS[2], ARGV[1])
+    return 1
+end
+redis.call('DEL', KEYS[2])
+return 0
+"""
+
+
+class BroadcastCoalescer:
+    """
+    Limita los group_send de un evento por grupo a uno por intervalo
+    """
+
+    def __init__(self, interval: float = None, handler: str = 'group_message'):
+        self.interval = interval if interval is not None else settings.BROADCAST_COALESCE_INTERVAL
+        # Método del consumer que recibe el mensaje ({'type': handler, 'message': ...})
+        self.handler = handler
+        # Referencias a las tareas en curso para que no las recolecte el GC
+        self._tasks = set()
+
+    def _keys(self, group, event):
+        return [PAYLOAD_KEY.format(group=group, event=event), WINDOW_KEY.format(group=group, event=event)]
+
+    def _expiry_ms(self) -> int:
+        # Si el proceso dueño muere, la ventana se libera sola
+        return int(self.interval * 4000)
+
+    async def publish(self, group, event, message: Optional[dict] = None,
+                      build: Optional[Callable[[], Awaitable[Optional[dict]]]] = None):
+        """
+        Publica un evento en un grupo del channel layer de forma agrupada
+
+        Args:
+            group: Nombre del grupo del channel layer
+            event: Tipo de evento; cada evento del grupo tiene su propia ventana
+            message: Mensaje a enviar; si se publican varios en la misma
+                ventana se envía el último
+            build: Corrutina que construye el mensaje en el momento de
+                enviarlo, para valores que conviene leer al final de la
+                ventana (p. ej. conteos). Si devuelve None no se envía nada
+        """
+        payload = json.dumps(message) if message is not None else ''
+        try:
+            client = get_async_redis()
+            opened = await client.register_script(_OFFER_SCRIPT)(
+                keys=self._keys(group, event), args=[payload, self._expiry_ms()]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Redis no disponible para agrupar {event} en {group}, se envía directamente: {str(e)}")
+            await self._send(group, message, build)
+            return
+
+        if opened:
+            task = asyncio.create_task(self._flush(group, event, build))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, group, event, build):
+        keys = self._keys(group, event)
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                client = get_async_redis()
+                raw = await client.register_script(_TAKE_SCRIPT)(keys=keys[:1], args=[])
+                message = json.loads(raw) if raw else None
+                await self._send(group, message, build)
+                again = await client.register_script(_RELEASE_SCRIPT)(keys=keys, args=[self._expiry_ms()])
+                if not again:
+                    break
+        except redis.RedisError as e:
+            logger.error(f"Error enviando {event} agrupado en {group}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error inesperado enviando {event} agrupado en {group}: {str(e)}")
+
+    async def _send(self, group, message, build):
+        if build is not None:
+            message = await build()
+        if message is None:
+            return
+        await get_channel_layer().group_send(group, {'type': self.handler, 'message': message})
+
+
+# Instancia global del servicio
+broadcast_coalescer = BroadcastCoalescer()
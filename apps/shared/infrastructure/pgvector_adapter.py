@@ -0,0 +1,39 @@
+"""
+Registro del adaptador de pgvector en las conexiones de Django
+
+Con el adaptador registrado los vectores se envían como parámetros tipados
+(formato binario) y las columnas vector se cargan directamente como arrays.
+"""
+import logging
+
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+
+def register_pgvector(sender, connection, **kwargs):
+    """
+    Registra los tipos de pgvector en cada conexión nueva de psycopg 3
+    """
+    connection.pgvector_registered = False
+    if connection.vendor != 'postgresql':
+        return
+
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    if not is_psycopg3:
+        # psycopg2: los vectores se envían como texto con cast explícito
+        return
+
+    import psycopg
+    from pgvector.psycopg import register_vector
+
+    try:
+        register_vector(connection.connection)
+        connection.pgvector_registered = True
+    except psycopg.Error as e:
+        # Por ejemplo antes de crear la extensión en una base nueva
+        logger.warning(f"No se pudo registrar el adaptador de pgvector: {str(e)}")
+
+
+def connect_signals():
+    connection_created.connect(register_pgvector, dispatch_uid='shared.register_pgvector')
@@ -0,0 +1,190 @@
+"""
+Presencia de conexiones WebSocket por sala, en Redis
+
+Cada sala guarda un sorted set presence:{room} con una entrada por conexión
+(el channel_name del consumer) cuyo score es el instante en que caduca, y un
+hash presence:{room}:users con el usuario de cada conexión. Las altas, bajas y
+conteos son scripts Lua, así que se ejecutan de forma atómica aunque se
+conecten muchos clientes a la vez, y en cada uno se descartan las conexiones
+caducadas: si un proceso de daphne muere sin llamar a disconnect, sus
+conexiones dejan de contarse al pasar PRESENCE_TTL sin latido.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+from apps.shared.infrastructure.broadcast_coalescer import broadcast_coalescer
+from apps.shared.infrastructure.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+CONNECTIONS_KEY = 'presence:{room}'
+USERS_KEY = 'presence:{room}:users'
+
+# Descarta las conexiones caducadas de KEYS[1] y su usuario en KEYS[2]
+_PRUNE = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, connection in ipairs(expired) do
+    redis.call('HDEL', KEYS[2], connection)
+end
+if #expired > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+end
+"""
+
+# ARGV: ahora, caducidad, conexión, usuario ('' si es anónima), ttl en ms
+JOIN_SCRIPT = _PRUNE + """
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+if ARGV[4] ~= '' then
+    redis.call('HSET', KEYS[2], ARGV[3], ARGV[4])
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[5])
+redis.call('PEXPIRE', KEYS[2], ARGV[5])
+return redis.call('ZCARD', KEYS[1])
+"""
+
+# ARGV: ahora, conexión
+LEAVE_SCRIPT = _PRUNE + """
+redis.call('ZREM', KEYS[1], ARGV[2])
+redis.call('HDEL', KEYS[2], ARGV[2])
+return redis.call('ZCARD', KEYS[1])
+"""
+
+# ARGV: ahora. Devuelve {conexiones, usuarios distintos}
+COUNT_SCRIPT = _PRUNE + """
+local users = {}
+local total = 0
+for _, user in ipairs(redis.call('HVALS', KEYS[2])) do
+    if not users[user] then
+        users[user] = true
+        total = total + 1
+    end
+end
+return {redis.call('ZCARD', KEYS[1]), total}
+"""
+
+
+class Presence:
+    """
+    Conexiones activas por sala con latido y caducidad
+    """
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl or settings.PRESENCE_TTL
+
+    @staticmethod
+    def _keys(room):
+        return [CONNECTIONS_KEY.format(room=room), USERS_KEY.format(room=room)]
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    async def join(self, room, connection_id, user_id=None) -> Optional[int]:
+        """
+        Registra una conexión o renueva su caducidad (latido)
+
+        Returns:
+            Conexiones activas en la sala, o None si Redis no está disponible
+        """
+        now = self._now_ms()
+        ttl_ms = self.ttl * 1000
+        try:
+            client = get_async_redis()
+            return await client.register_script(JOIN_SCRIPT)(
+                keys=self._keys(room),
+                args=[now, now + ttl_ms, connection_id, '' if user_id is None else str(user_id), ttl_ms]
+            )
+        except redis.RedisError as e:
+            logger.error(f"Error registrando la conexión {connection_id} en la sala {room}: {str(e)}")
+            return None
+
+    async def leave(self, room, connection_id) -> Optional[int]:
+        """
+        Elimina una conexión de la sala
+
+        Returns:
+            Conexiones que quedan en la sala, o None si Redis no está disponible
+        """
+        try:
+            client = get_async_redis()
+            return await client.register_script(LEAVE_SCRIPT)(
+                keys=self._keys(room), args=[self._now_ms(), connection_id]
+            )
+        except redis.RedisError as e:
+            logger.error(f"Error eliminando la conexión {connection_id} de la sala {room}: {str(e)}")
+            return None
+
+    async def acount(self, room) -> Optional[int]:
+        counts = await self._acounts(room)
+        return counts[0] if counts else None
+
+    async def acount_users(self, room) -> Optional[int]:
+        counts = await self._acounts(room)
+        return counts[1] if counts else None
+
+    def count(self, room) -> Optional[int]:
+        """
+        Conexiones activas en la sala, para vistas síncronas
+        """
+        counts = self._counts(room)
+        return counts[0] if counts else None
+
+    def count_users(self, room) -> Optional[int]:
+        """
+        Usuarios distintos conectados a la sala, para vistas síncronas
+        """
+        counts = self._counts(room)
+        return counts[1] if counts else None
+
+    async def _acounts(self, room):
+        try:
+            client = get_async_redis()
+            return await client.register_script(COUNT_SCRIPT)(keys=self._keys(room), args=[self._now_ms()])
+        except redis.RedisError as e:
+            logger.warning(f"Error leyendo la presencia de la sala {room}: {str(e)}")
+            return None
+
+    def _counts(self, room):
+        try:
+            client = get_redis()
+            return client.register_script(COUNT_SCRIPT)(keys=self._keys(room), args=[self._now_ms()])
+        except redis.RedisError as e:
+            logger.warning(f"Error leyendo la presencia de la sala {room}: {str(e)}")
+            return None
+
+    async def publish_connection_count(self, room):
+        """
+        Notifica a la sala su número de conexiones activas
+
+        Los conteos se agrupan con broadcast_coalescer: como mucho un envío por
+        intervalo, con el valor leído al enviarlo.
+        """
+        async def build():
+            count = await self.acount(room)
+            if count is None:
+                return None
+            return {'type': 'connection_count', 'active_connections': count}
+
+        await broadcast_coalescer.publish(room, 'connection_count', build=build)
+
+    def start_heartbeat(self, room, connection_id, user_id=None) -> asyncio.Task:
+        """
+        Renueva la conexión cada tercio del TTL hasta que se cancela la tarea
+
+        El consumer debe cancelarla en disconnect antes de llamar a leave.
+        """
+        async def beat():
+            while True:
+                await asyncio.sleep(self.ttl / 3)
+                await self.join(room, connection_id, user_id)
+
+        return asyncio.create_task(beat())
+
+
+# Instancia global del servicio
+presence = Presence()
@@ -0,0 +1,142 @@
+"""
+Conexión compartida a Redis para servicios síncronos (caches, colas, contadores)
+y asíncronos (consumers de WebSocket, presencia)
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import Dict
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Como mucho un aviso por este intervalo (segundos) mientras el pool asíncrono hace esperar
+POOL_WAIT_LOG_INTERVAL = 60
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Los pools de redis.asyncio quedan ligados al event loop en el que se crean
+_async_pools = weakref.WeakKeyDictionary()
+
+
+def get_redis_pool() -> redis.ConnectionPool:
+    """
+    Retorna el pool de conexiones del proceso, configurado desde settings
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = redis.ConnectionPool(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    password=settings.REDIS_PASSWORD,
+                    db=0,
+                    max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                )
+    return _pool
+
+
+def get_redis() -> redis.Redis:
+    """
+    Retorna un cliente Redis que reutiliza el pool compartido
+    """
+    return redis.Redis(connection_pool=get_redis_pool())
+
+
+class MeteredBlockingConnectionPool(aioredis.BlockingConnectionPool):
+    """
+    Pool asíncrono que cuenta las esperas por conexión libre y los timeouts,
+    y registra pool_stats() cuando el pool hace esperar a un comando
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.timeouts = 0
+        self._last_wait_log = None
+
+    async def get_connection(self, command_name, *keys, **options):
+        waited = not self.can_get_connection()
+        if waited:
+            self.waits += 1
+            now = time.monotonic()
+            if self._last_wait_log is None or now - self._last_wait_log >= POOL_WAIT_LOG_INTERVAL:
+                self._last_wait_log = now
+                logger.warning(f"Pool asíncrono de Redis sin conexiones libres ({self.waits} esperas): {pool_stats()}")
+        try:
+            return await super().get_connection(command_name, *keys, **options)
+        except redis.ConnectionError:
+            # Los fallos al conectar con Redis no cuentan como agotamiento del pool
+            if waited:
+                self.timeouts += 1
+                logger.error(f"Timeout esperando una conexión del pool asíncrono de Redis: {pool_stats()}")
+            raise
+
+
+def get_async_redis() -> aioredis.Redis:
+    """
+    Retorna un cliente redis.asyncio que reutiliza el pool del event loop actual
+
+    En daphne hay un único loop por proceso, así que todos los consumers del
+    proceso comparten el mismo pool: un número acotado de conexiones a Redis
+    sin importar cuántos WebSocket haya abiertos. Si se agotan, los comandos
+    esperan hasta REDIS_SOCKET_TIMEOUT en lugar de abrir más.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        pool = MeteredBlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD,
+            db=0,
+            max_connections=settings.REDIS_ASYNC_POOL_MAX_CONNECTIONS,
+            timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+        _async_pools[loop] = pool
+    return aioredis.Redis(connection_pool=pool)
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Métricas de los pools de Redis del proceso
+
+    'sync' es el pool de get_redis(); 'async' suma los pools de
+    get_async_redis() de todos los event loops vivos.
+    """
+    stats = {
+        'sync': {'max_connections': settings.REDIS_POOL_MAX_CONNECTIONS, 'open': 0, 'in_use': 0, 'idle': 0},
+        'async': {
+            'max_connections': settings.REDIS_ASYNC_POOL_MAX_CONNECTIONS,
+            'pools': 0, 'open': 0, 'in_use': 0, 'idle': 0, 'waits': 0, 'timeouts': 0,
+        },
+    }
+    pool = _pool
+    if pool is not None:
+        with pool._lock:
+            in_use = len(pool._in_use_connections)
+            idle = len(pool._available_connections)
+        stats['sync'].update(open=in_use + idle, in_use=in_use, idle=idle)
+
+    for pool in list(_async_pools.values()):
+        in_use = len(pool._in_use_connections)
+        idle = len(pool._available_connections)
+        entry = stats['async']
+        entry['pools'] += 1
+        entry['open'] += in_use + idle
+        entry['in_use'] += in_use
+        entry['idle'] += idle
+        entry['waits'] += pool.waits
+        entry['timeouts'] += pool.timeouts
+    return stats
@@ -0,0 +1,205 @@
+"""
+Cola de trabajos en segundo plano respaldada por Redis
+
+Cada trabajo tiene una clave idempotente (p. ej. el id del post): encolar dos
+veces la misma clave mientras está pendiente produce un único trabajo. Los
+trabajos se reclaman con un plazo de visibilidad; si el worker muere, el trabajo
+vuelve a la cola al vencer el plazo. Los fallos se reintentan con backoff
+exponencial y, agotados los intentos, pasan a la cola de trabajos muertos.
+"""
+import json
+import logging
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from apps.shared.infrastructure.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+QUEUE_PREFIX = 'task_queue'
+
+# Mueve los trabajos vencidos de la cola programada a la de procesamiento
+_CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, key in ipairs(due) do
+    redis.call('ZREM', KEYS[1], key)
+    redis.call('ZADD', KEYS[2], ARGV[3], key)
+end
+return due
+"""
+
+# Devuelve a la cola los trabajos cuyo plazo de visibilidad expiró (worker caído)
+_REAP_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, key in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], key)
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[1], key)
+end
+return #expired
+"""
+
+# Confirma un trabajo; si se volvió a encolar mientras se procesaba conserva el
+# payload con los intentos a cero (ARGV[2])
+_ACK_SCRIPT = """
+redis.call('ZREM', KEYS[2], ARGV[1])
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+elseif ARGV[2] then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+end
+return 1
+"""
+
+_registry: Dict[str, Callable] = {}
+
+
+def register_task(name: str):
+    """
+    Decorador para registrar un handler de trabajos. El handler recibe el
+    payload como kwargs y debe retornar un valor falso o lanzar una excepción
+    para que el trabajo se reintente.
+    """
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+class TaskQueue:
+    """
+    Cola de trabajos idempotente con reintentos y backoff
+    """
+
+    def __init__(self, name: str = 'default'):
+        self.scheduled_key = f'{QUEUE_PREFIX}:{name}:scheduled'
+        self.processing_key = f'{QUEUE_PREFIX}:{name}:processing'
+        self.payloads_key = f'{QUEUE_PREFIX}:{name}:payloads'
+        self.dead_key = f'{QUEUE_PREFIX}:{name}:dead'
+        self.max_attempts = settings.TASK_QUEUE_MAX_ATTEMPTS
+        self.backoff_base = settings.TASK_QUEUE_BACKOFF_BASE
+        self.backoff_max = settings.TASK_QUEUE_BACKOFF_MAX
+        self.visibility_timeout = settings.TASK_QUEUE_VISIBILITY_TIMEOUT
+
+    @staticmethod
+    def job_key(task: str, key: str) -> str:
+        return f'{task}:{key}'
+
+    def enqueue(self, task: str, key: str, **payload):
+        """
+        Encola un trabajo cuando la transacción actual se confirma, de forma que
+        el worker nunca vea filas que todavía no existen
+        """
+        transaction.on_commit(lambda: self.enqueue_now(task, key, **payload))
+
+    def schedule(self, pipe, task: str, key: str, delay: float = 0, **payload):
+        """
+        Añade el encolado de un trabajo a un pipeline de Redis del llamador, para
+        programarlo en el mismo viaje de red que las escrituras que lo motivan.
+        Si el trabajo ya estaba pendiente o en proceso se conservan su hora
+        programada, su payload y sus intentos, de modo que reprogramarlo en cada
+        escritura no impide que un trabajo que falla llegue a max_attempts.
+        """
+        job_key = self.job_key(task, key)
+        job = {'task': task, 'payload': payload, 'attempts': 0}
+        pipe.hsetnx(self.payloads_key, job_key, json.dumps(job))
+        pipe.zadd(self.scheduled_key, {job_key: time.time() + delay}, nx=True)
+
+    def enqueue_now(self, task: str, key: str, delay: float = 0, **payload) -> bool:
+        job_key = self.job_key(task, key)
+        try:
+            pipe = get_redis().pipeline()
+            self.schedule(pipe, task, key, delay, **payload)
+            pipe.execute()
+            logger.info(f"Trabajo encolado: {job_key}")
+            return True
+        except redis.RedisError as e:
+            logger.error(f"No se pudo encolar el trabajo {job_key}: {str(e)}")
+            return False
+
+    def claim(self, batch_size: int) -> List[str]:
+        now = time.time()
+        client = get_redis()
+        client.eval(_REAP_SCRIPT, 2, self.scheduled_key, self.processing_key, now)
+        keys = client.eval(
+            _CLAIM_SCRIPT, 2, self.scheduled_key, self.processing_key,
+            now, batch_size, now + self.visibility_timeout
+        )
+        return [key.decode() if isinstance(key, bytes) else key for key in keys]
+
+    def load(self, job_key: str) -> Optional[dict]:
+        raw = get_redis().hget(self.payloads_key, job_key)
+        return json.loads(raw) if raw else None
+
+    def ack(self, job_key: str, job: Optional[dict] = None):
+        args = [job_key]
+        if job is not None:
+            # Si se reprogramó mientras se procesaba, la siguiente ejecución empieza sin intentos fallidos
+            args.append(json.dumps({'task': job['task'], 'payload': job['payload'], 'attempts': 0}))
+        get_redis().eval(_ACK_SCRIPT, 3, self.scheduled_key, self.processing_key, self.payloads_key, *args)
+
+    def retry(self, job_key: str, job: dict, error: str):
+        job['attempts'] += 1
+        job['last_error'] = error
+        client = get_redis()
+
+        if job['attempts'] >= self.max_attempts:
+            pipe = client.pipeline()
+            pipe.zrem(self.processing_key, job_key)
+            pipe.hdel(self.payloads_key, job_key)
+            pipe.hset(self.dead_key, job_key, json.dumps(job))
+            pipe.execute()
+            logger.error(f"Trabajo {job_key} descartado tras {job['attempts']} intentos: {error}")
+            return
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (job['attempts'] - 1)))
+        delay += random.uniform(0, delay / 2)
+        pipe = client.pipeline()
+        pipe.zrem(self.processing_key, job_key)
+        pipe.hset(self.payloads_key, job_key, json.dumps(job))
+        pipe.zadd(self.scheduled_key, {job_key: time.time() + delay})
+        pipe.execute()
+        logger.warning(f"Trabajo {job_key} reintentará en {delay:.1f}s (intento {job['attempts']}): {error}")
+
+    def run(self, job_key: str) -> bool:
+        """
+        Ejecuta un trabajo reclamado y lo confirma o reprograma
+        """
+        job = self.load(job_key)
+        if job is None:
+            self.ack(job_key)
+            return True
+
+        handler = _registry.get(job['task'])
+        if handler is None:
+            self.retry(job_key, job, f"Handler no registrado: {job['task']}")
+            return False
+
+        try:
+            result = handler(**job['payload'])
+        except Exception as e:
+            self.retry(job_key, job, str(e))
+            return False
+
+        if result is False:
+            self.retry(job_key, job, 'El handler reportó un fallo')
+            return False
+
+        self.ack(job_key, job)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        client = get_redis()
+        return {
+            'scheduled': client.zcard(self.scheduled_key),
+            'processing': client.zcard(self.processing_key),
+            'dead': client.hlen(self.dead_key),
+        }
+
+
+# Instancia global de la cola
+task_queue = TaskQueue()
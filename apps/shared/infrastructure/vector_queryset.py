@@ -0,0 +1,106 @@
+"""
+Carga diferida de las columnas vectoriales de pgvector
+
+Un vector de 768 dimensiones ocupa ~3 KB por fila y se convierte a float en
+Python al cargarla, aunque casi ninguna vista lo lea. Los modelos con
+VectorManager no cargan sus columnas vector salvo que se pidan con
+with_vectors(), y su select_related() difiere también las columnas vector de
+los modelos relacionados (p. ej. los embeddings del autor de un post).
+
+Lo mismo vale para las columnas tsvector de la búsqueda de texto completo,
+que solo se usan en SQL y no se cargan nunca.
+
+Las consultas de similitud no se ven afectadas: el vector se usa en SQL
+(ORDER BY, anotaciones) sin traerlo a Python. Si se lee el atributo de una
+instancia sin vectores, Django lo carga con una consulta adicional.
+"""
+from typing import Tuple
+
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from pgvector.django import VectorField
+
+
+def vector_field_names(model) -> Tuple[str, ...]:
+    return tuple(field.name for field in model._meta.concrete_fields if isinstance(field, VectorField))
+
+
+def search_vector_field_names(model) -> Tuple[str, ...]:
+    # Incluye los GeneratedField cuyo tipo es tsvector
+    return tuple(
+        field.name for field in model._meta.concrete_fields
+        if isinstance(getattr(field, 'output_field', field), SearchVectorField)
+    )
+
+
+def deferred_field_names(model) -> Tuple[str, ...]:
+    return vector_field_names(model) + search_vector_field_names(model)
+
+
+class VectorQuerySet(models.QuerySet):
+    """
+    QuerySet que difiere las columnas vector de las relaciones de select_related
+    """
+
+    def select_related(self, *fields):
+        clone = super().select_related(*fields)
+        # Con only() las columnas a cargar ya están decididas
+        if not clone.query.deferred_loading[1] or fields == (None,):
+            return clone
+
+        related = []
+        for path in fields:
+            model = self.model
+            parts = path.split('__')
+            for depth, part in enumerate(parts, start=1):
+                try:
+                    model = model._meta.get_field(part).related_model
+                except FieldDoesNotExist:
+                    break
+                if model is None:
+                    break
+                prefix = '__'.join(parts[:depth])
+                related.extend(f'{prefix}__{name}' for name in deferred_field_names(model))
+        return clone.defer(*related) if related else clone
+
+    def only(self, *fields):
+        # QuerySet.only() descarta los campos ya diferidos; los pedidos aquí
+        # (p. ej. un vector en la carga perezosa de refresh_from_db) deben cargarse
+        deferred, defer = self.query.deferred_loading
+        requested = deferred & set(fields) if defer else set()
+        queryset = self.with_vectors(*requested) if requested else self
+        return super(VectorQuerySet, queryset).only(*fields)
+
+    def with_vectors(self, *fields):
+        """
+        Vuelve a cargar columnas vector diferidas
+
+        Args:
+            fields: Columnas a cargar, con la ruta de la relación si son de un
+                modelo relacionado ('author__feed_recommendations_embedding');
+                sin argumentos, las del propio modelo
+        """
+        deferred, defer = self.query.deferred_loading
+        if not defer:
+            return self
+        clone = self._chain()
+        clone.query.deferred_loading = (frozenset(deferred - set(fields or vector_field_names(self.model))), True)
+        return clone
+
+
+class DeferVectorsMixin:
+    """
+    Mixin de manager que difiere las columnas vector y tsvector del modelo por defecto
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = deferred_field_names(self.model)
+        return queryset.defer(*fields) if fields else queryset
+
+
+class VectorManager(DeferVectorsMixin, models.Manager.from_queryset(VectorQuerySet)):
+    """
+    Manager por defecto de los modelos con columnas vector o que las alcanzan con select_related
+    """
@@ -0,0 +1,97 @@
+"""
+Management command que procesa la cola de trabajos en segundo plano
+"""
+import logging
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.shared.infrastructure.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Procesa los trabajos encolados (embeddings de posts, jobs y usuarios)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesa los trabajos pendientes y termina',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=32,
+            help='Número de trabajos a reclamar por iteración (default: 32)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Trabajos ejecutados en paralelo; las llamadas concurrentes al microservicio se agrupan en lotes (default: 8)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Segundos de espera cuando la cola está vacía (default: 1.0)',
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        batch_size = options['batch_size']
+        poll_interval = options['poll_interval']
+        processed = failed = 0
+
+        self.stdout.write(f"Worker iniciado (concurrencia: {options['concurrency']}, lote: {batch_size})")
+
+        with ThreadPoolExecutor(max_workers=options['concurrency'], thread_name_prefix='task-worker') as executor:
+            while self.running:
+                try:
+                    job_keys = task_queue.claim(batch_size)
+                except redis.RedisError as e:
+                    if options['once']:
+                        raise CommandError(f'Redis no disponible: {str(e)}')
+                    logger.error(f"Error reclamando trabajos: {str(e)}")
+                    time.sleep(poll_interval)
+                    continue
+
+                if not job_keys:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                for success in executor.map(self._run_job, job_keys):
+                    if success:
+                        processed += 1
+                    else:
+                        failed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Worker detenido. Trabajos completados: {processed}, fallidos: {failed}')
+        )
+
+    def _run_job(self, job_key: str) -> bool:
+        close_old_connections()
+        try:
+            return task_queue.run(job_key)
+        except redis.RedisError as e:
+            # El trabajo sigue en la cola de procesamiento y se reintentará al vencer su plazo
+            logger.error(f"Error de Redis procesando {job_key}: {str(e)}")
+            return False
+        finally:
+            close_old_connections()
+
+    def _stop(self, signum, frame):
+        self.stdout.write('Deteniendo worker tras el lote actual...')
+        self.running = False
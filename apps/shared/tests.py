@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase
+
+from apps.shared.infrastructure.redis_client import get_redis
+from apps.shared.infrastructure.task_queue import TaskQueue, register_task
+
+FAILING_TASK = 'tests.failing'
+CALLS = []
+
+
+@register_task(FAILING_TASK)
+def failing_task(**payload):
+    CALLS.append(payload)
+    return False
+
+
+class TaskQueueScheduleTests(SimpleTestCase):
+    """
+    Reprogramar un trabajo pendiente o en proceso (como hacen los volcados
+    write-behind en cada escritura) no reinicia sus intentos
+    """
+
+    def setUp(self):
+        self.queue = TaskQueue(name='tests')
+        self.queue.backoff_base = 0
+        self.queue.backoff_max = 0
+        self.job_key = self.queue.job_key(FAILING_TASK, 'debate')
+        CALLS.clear()
+        self.addCleanup(get_redis().delete, self.queue.scheduled_key, self.queue.processing_key,
+                        self.queue.payloads_key, self.queue.dead_key)
+
+    def _schedule(self, **payload):
+        pipe = get_redis().pipeline()
+        self.queue.schedule(pipe, FAILING_TASK, 'debate', **payload)
+        pipe.execute()
+
+    def test_rescheduling_keeps_attempts(self):
+        self._schedule(debate_id='1')
+        self.assertEqual(self.queue.claim(10), [self.job_key])
+        self.queue.run(self.job_key)
+        self.assertEqual(self.queue.load(self.job_key)['attempts'], 1)
+
+        self._schedule(debate_id='1')
+        self.assertEqual(self.queue.load(self.job_key)['attempts'], 1)
+
+    def test_rescheduling_during_processing_keeps_payload(self):
+        self._schedule(debate_id='1')
+        self.queue.claim(10)
+        self._schedule(debate_id='2')
+        self.assertEqual(self.queue.load(self.job_key)['payload'], {'debate_id': '1'})
+
+    def test_failing_job_rescheduled_on_every_write_reaches_dead_letter(self):
+        for _ in range(self.queue.max_attempts):
+            self._schedule(debate_id='1')
+            for job_key in self.queue.claim(10):
+                self.queue.run(job_key)
+
+        self.assertEqual(len(CALLS), self.queue.max_attempts)
+        self.assertTrue(get_redis().hexists(self.queue.dead_key, self.job_key))
+        self.assertIsNone(self.queue.load(self.job_key))
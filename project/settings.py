@@ -9,6 +9,9 @@ load_dotenv()  # Carga las variables de entorno del archivo .env
 REDIS_HOST = os.getenv('REDIS_HOST', 'redis')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')  # Lee la contraseña de Redis del archivo .env
+REDIS_POOL_MAX_CONNECTIONS = int(os.getenv('REDIS_POOL_MAX_CONNECTIONS', 50))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 5))
+REDIS_ASYNC_POOL_MAX_CONNECTIONS = int(os.getenv('REDIS_ASYNC_POOL_MAX_CONNECTIONS', 50))  # Por proceso, compartido por todos los consumers
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
     'apps.custom_auth',
     'apps.jobs',
     'apps.feeds',
+    'apps.shared',
 ]
 # ada
 
@@ -113,7 +117,12 @@ DATABASES = {
         'OPTIONS': {
             # PostgreSQL specific options
             'sslmode': 'prefer',
+            # psycopg 3: parámetros enlazados en el servidor y prepared statements tras N ejecuciones
+            'server_side_binding': os.getenv('DB_SERVER_SIDE_BINDING', 'False') == 'True',
+            'prepare_threshold': int(os.getenv('DB_PREPARE_THRESHOLD')) if os.getenv('DB_PREPARE_THRESHOLD') else None,
         },
+        # Los prepared statements viven en la conexión, solo se reutilizan con conexiones persistentes
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
     }
 }
 
@@ -257,7 +266,74 @@ LOGGING = {
 
 # Configuración del microservicio de embeddings
 EMBEDDING_SERVICE_URL = os.getenv('EMBEDDING_SERVICE_URL', 'http://localhost:8001')
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv('EMBEDDING_SERVICE_TIMEOUT', 30))
+EMBEDDING_BATCH_PATH = os.getenv('EMBEDDING_BATCH_PATH', '/text-processing/vectorize/batch/')
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', 32))  # Textos por lote
+EMBEDDING_BATCH_WAIT_MS = int(os.getenv('EMBEDDING_BATCH_WAIT_MS', 10))  # Ventana para agrupar llamadas concurrentes
+EMBEDDING_POOL_SIZE = int(os.getenv('EMBEDDING_POOL_SIZE', 10))  # Conexiones keep-alive al microservicio
+EMBEDDING_MODEL_VERSION = os.getenv('EMBEDDING_MODEL_VERSION', 'v1')  # Cambiarla invalida la cache de embeddings
+
+# Cache de embeddings (memoria LRU + Redis)
+EMBEDDING_CACHE_ENABLED = os.getenv('EMBEDDING_CACHE_ENABLED', 'True') == 'True'
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 1024))
+EMBEDDING_CACHE_TTL = int(os.getenv('EMBEDDING_CACHE_TTL', 60 * 60 * 24 * 7))  # 7 días
+
+# Cola de trabajos en segundo plano (Redis)
+TASK_QUEUE_MAX_ATTEMPTS = int(os.getenv('TASK_QUEUE_MAX_ATTEMPTS', 5))
+TASK_QUEUE_BACKOFF_BASE = float(os.getenv('TASK_QUEUE_BACKOFF_BASE', 5))  # Segundos antes del primer reintento
+TASK_QUEUE_BACKOFF_MAX = float(os.getenv('TASK_QUEUE_BACKOFF_MAX', 600))
+TASK_QUEUE_VISIBILITY_TIMEOUT = int(os.getenv('TASK_QUEUE_VISIBILITY_TIMEOUT', 300))  # Plazo antes de reasignar un trabajo reclamado
 
 # Configuración de vectores
 VECTOR_DIMENSIONS = 768  # Dimensiones del modelo de embeddings
 
+# Búsqueda aproximada (índices HNSW de pgvector)
+VECTOR_SEARCH_EF_SEARCH = int(os.getenv('VECTOR_SEARCH_EF_SEARCH', 64))  # hnsw.ef_search: más alto = más recall, más latencia
+VECTOR_SEARCH_PROBES = int(os.getenv('VECTOR_SEARCH_PROBES', 10))  # ivfflat.probes, solo aplica a índices IVFFlat
+VECTOR_SEARCH_CANDIDATE_FACTOR = int(os.getenv('VECTOR_SEARCH_CANDIDATE_FACTOR', 4))  # Candidatos por resultado antes del re-ranking
+VECTOR_SEARCH_MAX_CANDIDATES = int(os.getenv('VECTOR_SEARCH_MAX_CANDIDATES', 400))
+VECTOR_SEARCH_ITERATIVE_SCAN = os.getenv('VECTOR_SEARCH_ITERATIVE_SCAN', '')  # 'relaxed_order' con pgvector >= 0.8
+
+# Timelines de feed materializados en Redis
+FEED_TIMELINE_MAX_LENGTH = int(os.getenv('FEED_TIMELINE_MAX_LENGTH', 500))  # Posts por usuario
+FEED_TIMELINE_TTL = int(os.getenv('FEED_TIMELINE_TTL', 60 * 60 * 24))  # Se renueva en cada lectura
+FEED_TIMELINE_ACTIVE_WINDOW = int(os.getenv('FEED_TIMELINE_ACTIVE_WINDOW', 60 * 60 * 24 * 7))  # Usuarios que reciben fan-out
+FEED_TIMELINE_FAN_OUT_BATCH_SIZE = int(os.getenv('FEED_TIMELINE_FAN_OUT_BATCH_SIZE', 1000))
+FEED_TIMELINE_MAX_AGE = int(os.getenv('FEED_TIMELINE_MAX_AGE', 60 * 60))  # La primera página reconstruye timelines más antiguos (engagement desfasado)
+
+# Contadores de interacción de posts con escritura diferida (Redis -> base de datos)
+FEED_COUNTER_FLUSH_INTERVAL = float(os.getenv('FEED_COUNTER_FLUSH_INTERVAL', 10))  # Segundos entre volcados
+FEED_COUNTER_FLUSH_BATCH_SIZE = int(os.getenv('FEED_COUNTER_FLUSH_BATCH_SIZE', 500))  # Posts por UPDATE
+
+# Recalculo periódico del engagement_score en SQL
+FEED_ENGAGEMENT_RECOMPUTE_INTERVAL = int(os.getenv('FEED_ENGAGEMENT_RECOMPUTE_INTERVAL', 60 * 15))  # Segundos entre recalculos
+FEED_ENGAGEMENT_RECOMPUTE_CHUNK_SIZE = int(os.getenv('FEED_ENGAGEMENT_RECOMPUTE_CHUNK_SIZE', 5000))  # Posts por UPDATE
+FEED_ENGAGEMENT_DRIFT_THRESHOLD = float(os.getenv('FEED_ENGAGEMENT_DRIFT_THRESHOLD', 0.5))  # Deriva reportada en --dry-run
+
+# Búsquedas híbridas (texto completo + vectorial, fusión por rango recíproco)
+SEARCH_RRF_K = int(os.getenv('SEARCH_RRF_K', 60))  # Constante k de RRF: más alto = menos peso a las primeras posiciones
+FEED_SEARCH_MIN_SIMILARITY = float(os.getenv('FEED_SEARCH_MIN_SIMILARITY', 0.5))  # Similitud mínima de los candidatos vectoriales
+FEED_SEARCH_MIN_CONTENT_LENGTH = int(os.getenv('FEED_SEARCH_MIN_CONTENT_LENGTH', 31))  # Caracteres; excluye posts muy cortos
+JOB_SEARCH_MIN_SIMILARITY = float(os.getenv('JOB_SEARCH_MIN_SIMILARITY', 0.0))  # 0 = todos los vecinos del índice, como la búsqueda semántica previa
+
+# Paginación keyset: los cursores caducan pasado este tiempo (segundos) y se vuelve a la primera página
+KEYSET_CURSOR_MAX_AGE = int(os.getenv('KEYSET_CURSOR_MAX_AGE', 60 * 60 * 6))
+
+# Cache de rankings de consenso por (grupo, método, estado de las papeletas)
+CONSENSUS_CACHE_TTL = int(os.getenv('CONSENSUS_CACHE_TTL', 60 * 60 * 24))
+
+# Presencia en WebSocket: una conexión sin latido durante este tiempo (segundos) deja de contarse
+PRESENCE_TTL = int(os.getenv('PRESENCE_TTL', 60))
+
+# Eventos de sala con mucha rotación (p. ej. connection_count): como mucho un envío por este intervalo (segundos)
+BROADCAST_COALESCE_INTERVAL = float(os.getenv('BROADCAST_COALESCE_INTERVAL', 0.5))
+
+# Chat de debates con escritura diferida (Redis -> base de datos)
+CHAT_FLUSH_INTERVAL = float(os.getenv('CHAT_FLUSH_INTERVAL', 1))  # Segundos entre volcados de un debate
+CHAT_FLUSH_BATCH_SIZE = int(os.getenv('CHAT_FLUSH_BATCH_SIZE', 500))  # Mensajes por bulk_create
+CHAT_FLUSH_MAX_BATCHES = int(os.getenv('CHAT_FLUSH_MAX_BATCHES', 20))  # Lotes por ejecución del volcado; el resto se reprograma
+CHAT_REPLAY_LIMIT = int(os.getenv('CHAT_REPLAY_LIMIT', 200))  # Mensajes por respuesta del endpoint de replay
+
+# Instantáneas del usuario o empresa autenticado por sujeto del token (segundos)
+AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv('AUTH_PRINCIPAL_CACHE_TTL', 60))
+